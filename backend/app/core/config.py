@@ -20,12 +20,129 @@ class Settings(BaseSettings):
 
     mongo_uri: str = "mongodb://mongo:27017/skillval"
     mongo_db_name: str = "skillval"
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 10
+    mongo_max_idle_time_ms: int = 300_000
+    mongo_wait_queue_timeout_ms: int = 2_000
+    mongo_server_selection_timeout_ms: int = 5_000
+    mongo_compressors: list[str] = ["zstd", "snappy", "zlib"]
+    mongo_read_preference: str = "primary"
+    mongo_read_concern: Literal["local", "majority", "available"] = "local"
+    mongo_write_concern: str = "majority"
+    mongo_write_timeout_ms: int = 10_000
+    mongo_warmup_connections: int = 10
+    mongo_ready_timeout_seconds: float = 2.0
 
     deepgram_api_key: str
     openai_api_key: str
 
     frontend_origin: str = "http://localhost:3000"
 
+    http2_enabled: bool = True
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 60.0
+    http_warmup_urls: list[str] = ["https://api.openai.com", "https://api.deepgram.com"]
+
+    llm_cache_max_entries: int = 2048
+    llm_cache_ttl_seconds: int = 30 * 24 * 3600
+
+    analysis_combined_llm_call: bool = False
+    analysis_step_timeouts: dict[str, float] = {"stt": 600.0, "indicators": 35.0, "fraud": 25.0, "combined": 40.0}
+
+    indicator_index_features: int = 2**14
+    indicator_shortlist_k: int = 8
+    indicator_offline_min_score: float = 0.2
+    traject_cache_poll_seconds: float = 30.0
+    traject_cache_retry_seconds: float = 5.0
+    coverage_required_percent: float = 80.0
+
+    audit_batch_size: int = 200
+    audit_flush_interval_ms: int = 250
+    audit_queue_max: int = 10_000
+    audit_overflow_policy: Literal["block", "write_through", "drop"] = "block"
+    audit_block_compressor: str | None = "zstd"
+    audit_retention_months: int = 24
+    audit_archive_prefix: str = "audit-archive"
+
+    # Stilometrie is niet gekalibreerd: standaard gaat alles naar de LLM. Met de gate aan slaan
+    # alleen lange teksten met een duidelijk lage score de LLM over; markeren doet altijd de LLM.
+    fraud_local_gate: bool = False
+    fraud_local_low: float = 0.1
+    fraud_local_min_words: int = 60
+
+    near_duplicate_num_perm: int = 128
+    near_duplicate_bands: int = 32
+    near_duplicate_shingle_size: int = 3
+    near_duplicate_min_shingles: int = 15
+    near_duplicate_threshold: float = 0.6
+    near_duplicate_max_matches: int = 5
+    near_duplicate_candidate_limit: int = 500
+
+    image_hash_chunks: int = 4
+    image_hash_max_distance: int = 10
+    image_hash_max_bytes: int = 25 * 1024 * 1024
+    image_hash_candidate_limit: int = 500
+    image_hash_max_matches: int = 5
+
+    report_area_token_budget: int = 6_000
+    report_item_token_limit: int = 800
+    report_reduce_token_budget: int = 12_000
+    report_area_concurrency: int = 4
+    report_draft_flush_seconds: float = 0.5
+    report_draft_lease_seconds: int = 30
+
+    stt_base_url: str = "https://api.deepgram.com"
+    stt_segment_seconds: float = 120.0
+    stt_overlap_seconds: float = 4.0
+    stt_concurrency: int = 4
+    stt_segment_timeout_seconds: float = 60.0
+    stt_segment_attempts: int = 3
+    # Schatting van de duur als de audio niet te decoderen is (~128 kbit/s).
+    stt_whole_bytes_per_second: int = 16_000
+    stt_sample_rate: int = 16_000
+    stt_ffmpeg_path: str = "ffmpeg"
+    live_stt_language: str = "nl"
+    live_stt_connect_timeout_seconds: float = 10.0
+    live_stt_finalize_timeout_seconds: float = 5.0
+    live_stt_max_frame_bytes: int = 256 * 1024
+    live_notes_flush_count: int = 20
+    live_notes_flush_ms: int = 500
+    live_notes_inline_max: int | None = None
+
+    llm_requests_per_minute: int = 120
+    llm_tokens_per_minute: int = 200_000
+    tenant_llm_limits: dict[str, dict[str, int]] = {}
+    bulk_ingest_concurrency: int = 8
+    bulk_ingest_max_concurrency: int = 32
+    bulk_ingest_poll_seconds: float = 0.5
+    bulk_ingest_max_line_bytes: int = 1024 * 1024
+
+    upload_chunk_bytes: int = 1024 * 1024
+    upload_staging_dir: str = "storage/.staging"
+    max_upload_bytes: int = 2 * 1024 * 1024 * 1024
+    tenant_upload_limits: dict[str, int] = {}
+
+    storage_backend: Literal["local", "s3"] = "local"
+    local_storage_root: str = "storage"
+    s3_endpoint_url: str | None = None
+    s3_bucket: str = "skillval-evidence"
+    s3_access_key: str | None = None
+    s3_secret_key: str | None = None
+    s3_region: str = "us-east-1"
+    s3_presign_expiry_seconds: int = 3600
+    s3_multipart_part_bytes: int = 64 * 1024 * 1024
+    pending_upload_max_age_seconds: int = 24 * 3600
+    pending_upload_sweep_seconds: float = 3600.0
+    pending_upload_ttl_seconds: int = 7 * 24 * 3600
+
+    job_visibility_timeout_seconds: int = 300
+    job_max_attempts: int = 5
+    job_backoff_base_seconds: float = 5.0
+    job_backoff_max_seconds: float = 900.0
+    worker_concurrency: int = 4
+    worker_poll_interval_seconds: float = 1.0
+
 
 def _load_dotenv_if_local() -> None:
     if os.getenv("APP_ENV", "local") != "local":
@@ -0,0 +1,165 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+
+from app.core.config import Settings, get_settings
+from app.db.partitions import add_months, audit_partition
+
+logger = logging.getLogger(__name__)
+
+# Mongo-foutcodes wanneer een index met dezelfde naam/keys maar andere opties al bestaat.
+INDEX_OPTIONS_CONFLICT = 85
+INDEX_KEY_SPECS_CONFLICT = 86
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: tuple[tuple[str, int], ...]
+    unique: bool = False
+    expire_after_seconds: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        # Zelfde naam als Mongo standaard kiest, zodat eerder aangemaakte indexes herkend worden.
+        return "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+    def options(self) -> dict[str, Any]:
+        options: dict[str, Any] = {"name": self.name}
+        if self.unique:
+            options["unique"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return options
+
+
+def audit_partition_indexes(collection: str) -> list[IndexSpec]:
+    """Indexes per maandpartitie van de auditlog; `_id` als tiebreaker voor keyset-paginatie."""
+    return [
+        IndexSpec(collection, (("tenantId", 1), ("targetId", 1), ("createdAt", 1), ("_id", 1))),
+        IndexSpec(collection, (("tenantId", 1), ("createdAt", 1), ("_id", 1))),
+    ]
+
+
+def declared_indexes(settings: Optional[Settings] = None, now: Optional[datetime] = None) -> list[IndexSpec]:
+    """Alle indexes die de queries in app/ nodig hebben, per collectie.
+
+    Van de auditpartities staan alleen de lopende en de volgende maand erin; oudere partities
+    kregen hun indexes toen ze werden aangemaakt.
+    """
+    settings = settings or get_settings()
+    now = now or datetime.utcnow()
+    audit_indexes = [
+        spec for month in (now, add_months(now, 1)) for spec in audit_partition_indexes(audit_partition(month))
+    ]
+    return [
+        IndexSpec("users", (("email", 1),), unique=True),
+        IndexSpec("trajecten", (("tenantId", 1), ("domain", 1))),
+        IndexSpec("evidenceItems", (("candidateId", 1),)),
+        # Keyset-paginatie van get_candidate_evidence: nieuwste eerst op (timestamp, _id).
+        IndexSpec("evidence", (("candidateId", 1), ("timestamp", -1), ("_id", -1))),
+        # candidateId voorop: dekt ook `find({"candidateId": ...})` in het rapportdossier.
+        IndexSpec("assessments", (("candidateId", 1), ("tenantId", 1), ("assessorId", 1))),
+        IndexSpec("assessmentNotes", (("candidateId", 1), ("createdAt", 1))),
+        IndexSpec("llmCache", (("createdAt", 1),), expire_after_seconds=settings.llm_cache_ttl_seconds),
+        IndexSpec("evidenceSignatures", (("tenantId", 1), ("bands", 1))),
+        IndexSpec("imageHashes", (("tenantId", 1), ("chunks", 1))),
+        IndexSpec("jobs", (("status", 1), ("runAt", 1))),
+        IndexSpec("jobs", (("status", 1), ("leaseExpiresAt", 1))),
+        # Statuspoll per evidence item; dubbel inplannen (bulk-import) voorkomt de vaste `_id`.
+        IndexSpec("jobs", (("payload.evidenceId", 1), ("createdAt", -1))),
+        # Repair-sweep van blobs met refCount <= 0; alle andere blob-lookups gaan via `_id`.
+        IndexSpec("blobs", (("refCount", 1),)),
+        # Coverage-recompute: `distinct("trajectId", {tenantId})` en `update_many({tenantId, trajectId})`.
+        IndexSpec("candidates", (("tenantId", 1), ("trajectId", 1))),
+        # Vangnet; de sweep in de worker breekt verlaten multipart uploads eerder af (pending_uploads.py).
+        IndexSpec("pendingUploads", (("createdAt", 1),), expire_after_seconds=settings.pending_upload_ttl_seconds),
+        IndexSpec("ingestItems", (("tenantId", 1), ("manifestId", 1), ("status", 1))),
+        *audit_indexes,
+    ]
+
+
+@dataclass
+class IndexReport:
+    missing: list[IndexSpec] = field(default_factory=list)
+    changed: list[tuple[IndexSpec, dict[str, Any]]] = field(default_factory=list)
+    undeclared: list[tuple[str, dict[str, Any]]] = field(default_factory=list)
+    unused: list[tuple[str, str, dict[str, Any]]] = field(default_factory=list)
+
+    @property
+    def in_sync(self) -> bool:
+        return not self.missing and not self.changed
+
+
+async def apply_indexes(db: AsyncIOMotorDatabase, specs: Optional[list[IndexSpec]] = None) -> list[str]:
+    """Maakt de gedeclareerde indexes aan (idempotent); geeft de namen terug die niet lukten.
+
+    Een gewijzigde TTL wordt via `collMod` bijgewerkt. Andere conflicten (bijv. dubbele e-mails
+    bij een unique index) loggen we in plaats van de start van de app te blokkeren.
+    """
+    failed: list[str] = []
+    for spec in specs if specs is not None else declared_indexes():
+        try:
+            await db[spec.collection].create_index(list(spec.keys), **spec.options())
+        except OperationFailure as exc:
+            if exc.code == INDEX_OPTIONS_CONFLICT and spec.expire_after_seconds is not None:
+                await db.command(
+                    "collMod",
+                    spec.collection,
+                    index={"keyPattern": dict(spec.keys), "expireAfterSeconds": spec.expire_after_seconds},
+                )
+                continue
+            logger.warning("index %s.%s niet aangemaakt: %s", spec.collection, spec.name, exc)
+            failed.append(f"{spec.collection}.{spec.name}")
+    return failed
+
+
+async def _index_stats(collection) -> dict[str, dict[str, Any]]:
+    """`$indexStats` per indexnaam; leeg als de server (of het account) het niet ondersteunt."""
+    try:
+        return {row["name"]: row.get("accesses", {}) async for row in collection.aggregate([{"$indexStats": {}}])}
+    except OperationFailure:
+        return {}
+
+
+async def diff_indexes(db: AsyncIOMotorDatabase, specs: Optional[list[IndexSpec]] = None) -> IndexReport:
+    """Vergelijkt de registry met de live database, inclusief ongebruikte indexes sinds de laatste restart."""
+    specs = specs if specs is not None else declared_indexes()
+    report = IndexReport()
+    by_collection: dict[str, list[IndexSpec]] = {}
+    for spec in specs:
+        by_collection.setdefault(spec.collection, []).append(spec)
+
+    for collection_name, collection_specs in by_collection.items():
+        collection = db[collection_name]
+        live = await collection.index_information()
+        stats = await _index_stats(collection)
+        declared_names = set()
+
+        for spec in collection_specs:
+            declared_names.add(spec.name)
+            info = live.get(spec.name)
+            if info is None:
+                report.missing.append(spec)
+                continue
+            if (
+                tuple((key, int(direction)) for key, direction in info["key"]) != spec.keys
+                or bool(info.get("unique")) != spec.unique
+                or info.get("expireAfterSeconds") != spec.expire_after_seconds
+            ):
+                report.changed.append((spec, info))
+
+        for name, info in live.items():
+            if name == "_id_":
+                continue
+            if name not in declared_names:
+                report.undeclared.append((collection_name, {"name": name, **info}))
+            accesses = stats.get(name)
+            if accesses and int(accesses.get("ops", 0)) == 0:
+                report.unused.append((collection_name, name, accesses))
+
+    return report
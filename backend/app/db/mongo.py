@@ -1,24 +1,221 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+from collections import defaultdict
+from typing import Any
+
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import monitoring
 
 from app.core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+# Compressor -> Python-pakket dat pymongo ervoor nodig heeft (zlib zit in de stdlib).
+_COMPRESSOR_PACKAGES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
 _client: AsyncIOMotorClient | None = None
+_database: AsyncIOMotorDatabase | None = None
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Telt verbindingen per server, zodat /health/ready pool-verzadiging kan tonen.
+
+    pymongo roept de listener vanuit eigen threads aan; vandaar de lock.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.open: dict[str, int] = defaultdict(int)
+            self.checked_out: dict[str, int] = defaultdict(int)
+            self.waiting: dict[str, int] = defaultdict(int)
+            self.peak_checked_out: dict[str, int] = defaultdict(int)
+            self.checkout_failures: dict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def _key(event: Any) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def _add(self, counter: dict[str, int], event: Any, delta: int) -> None:
+        with self._lock:
+            counter[self._key(event)] += delta
+
+    def pool_created(self, event: Any) -> None:
+        pass
+
+    def pool_ready(self, event: Any) -> None:
+        pass
+
+    def pool_cleared(self, event: Any) -> None:
+        pass
+
+    def pool_closed(self, event: Any) -> None:
+        with self._lock:
+            key = self._key(event)
+            self.open.pop(key, None)
+            self.checked_out.pop(key, None)
+            self.waiting.pop(key, None)
+
+    def connection_created(self, event: Any) -> None:
+        self._add(self.open, event, 1)
+
+    def connection_ready(self, event: Any) -> None:
+        pass
+
+    def connection_closed(self, event: Any) -> None:
+        self._add(self.open, event, -1)
+
+    def connection_check_out_started(self, event: Any) -> None:
+        self._add(self.waiting, event, 1)
+
+    def connection_check_out_failed(self, event: Any) -> None:
+        with self._lock:
+            key = self._key(event)
+            self.waiting[key] -= 1
+            self.checkout_failures[key] += 1
+
+    def connection_checked_out(self, event: Any) -> None:
+        with self._lock:
+            key = self._key(event)
+            self.waiting[key] -= 1
+            self.checked_out[key] += 1
+            self.peak_checked_out[key] = max(self.peak_checked_out[key], self.checked_out[key])
+
+    def connection_checked_in(self, event: Any) -> None:
+        self._add(self.checked_out, event, -1)
+
+    def snapshot(self, max_pool_size: int) -> dict[str, Any]:
+        with self._lock:
+            servers = {
+                key: {
+                    "open": self.open.get(key, 0),
+                    "checkedOut": self.checked_out.get(key, 0),
+                    "waiting": max(self.waiting.get(key, 0), 0),
+                    "peakCheckedOut": self.peak_checked_out.get(key, 0),
+                    "checkoutFailures": self.checkout_failures.get(key, 0),
+                    "saturation": round(self.checked_out.get(key, 0) / max_pool_size, 3) if max_pool_size else 0.0,
+                }
+                for key in set(self.open) | set(self.checked_out) | set(self.checkout_failures)
+            }
+        return {
+            "maxPoolSize": max_pool_size,
+            "saturation": max((server["saturation"] for server in servers.values()), default=0.0),
+            "waiting": sum(server["waiting"] for server in servers.values()),
+            "servers": servers,
+        }
+
+
+pool_monitor = PoolMonitor()
+
+
+def _compressors(requested: list[str]) -> list[str]:
+    available = []
+    for name in requested:
+        package = _COMPRESSOR_PACKAGES.get(name)
+        if package is not None and importlib.util.find_spec(package) is None:
+            logger.warning("Mongo-compressie %s gevraagd maar pakket '%s' ontbreekt; overgeslagen", name, package)
+            continue
+        available.append(name)
+    return available
+
+
+def _build_client() -> AsyncIOMotorClient:
+    settings = get_settings()
+    options: dict[str, Any] = {
+        "appname": settings.app_name,
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "readPreference": settings.mongo_read_preference,
+        "readConcernLevel": settings.mongo_read_concern,
+        "w": int(settings.mongo_write_concern) if settings.mongo_write_concern.isdigit() else settings.mongo_write_concern,
+        "wTimeoutMS": settings.mongo_write_timeout_ms,
+        "event_listeners": [pool_monitor],
+    }
+    compressors = _compressors(settings.mongo_compressors)
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return AsyncIOMotorClient(settings.mongo_uri, **options)
 
 
 def get_client() -> AsyncIOMotorClient:
+    # Lazy fallback voor scripts zonder lifespan; de app opent de client in `connect`.
     global _client
     if _client is None:
-        settings = get_settings()
-        _client = AsyncIOMotorClient(settings.mongo_uri)
+        _client = _build_client()
     return _client
 
 
 def get_database() -> AsyncIOMotorDatabase:
-    client = get_client()
-    settings = get_settings()
-    return client[settings.mongo_db_name]
+    global _database
+    if _database is None:
+        _database = get_client()[get_settings().mongo_db_name]
+    return _database
 
 
 def get_collection(collection_name: str) -> AsyncIOMotorCollection:
     db = get_database()
     return db[collection_name]
+
+
+async def connect() -> AsyncIOMotorClient:
+    """Opent de client binnen de event loop van de app en warmt de pool op."""
+    global _client, _database
+    if _client is None:
+        _client = _build_client()
+        _database = None
+    await warm_up(_client)
+    return _client
+
+
+async def warm_up(client: AsyncIOMotorClient) -> None:
+    """Gelijktijdige pings dwingen `mongo_warmup_connections` verbindingen af voor het eerste request."""
+    settings = get_settings()
+    try:
+        await asyncio.gather(
+            *(client.admin.command("ping") for _ in range(max(settings.mongo_warmup_connections, 1)))
+        )
+    except Exception as exc:
+        logger.warning("Mongo warm-up mislukt: %s", exc)
+
+
+async def close() -> None:
+    global _client, _database
+    if _client is not None:
+        _client.close()
+        _client = None
+        _database = None
+        pool_monitor.reset()
+
+
+async def readiness() -> dict[str, Any]:
+    """Ping met korte timeout plus pool-statistieken; `ok` is False als Mongo niet antwoordt."""
+    settings = get_settings()
+    try:
+        await asyncio.wait_for(get_client().admin.command("ping"), timeout=settings.mongo_ready_timeout_seconds)
+        ok = True
+    except Exception:
+        ok = False
+    return {"ok": ok, "pool": pool_monitor.snapshot(settings.mongo_max_pool_size)}
+
+
+class DatabaseBound:
+    """Services binden pas bij gebruik aan de database, niet bij het importeren van de singleton."""
+
+    _db: AsyncIOMotorDatabase | None = None
+
+    @property
+    def db(self) -> AsyncIOMotorDatabase:
+        return self._db if self._db is not None else get_database()
+
+    @db.setter
+    def db(self, value: AsyncIOMotorDatabase | None) -> None:
+        self._db = value
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Optional
+
+# Auditlogs staan per kalendermaand (UTC) in een eigen collectie, bijv. `auditLogs_202405`.
+AUDIT_PARTITION_PREFIX = "auditLogs_"
+
+
+def month_start(when: datetime) -> datetime:
+    return datetime(when.year, when.month, 1)
+
+
+def add_months(when: datetime, months: int) -> datetime:
+    index = when.year * 12 + when.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def audit_partition(when: datetime) -> str:
+    return f"{AUDIT_PARTITION_PREFIX}{when:%Y%m}"
+
+
+def audit_partition_month(name: str) -> Optional[datetime]:
+    """Eerste dag van de maand van een partitie; None voor collecties die geen auditpartitie zijn."""
+    if not name.startswith(AUDIT_PARTITION_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name[len(AUDIT_PARTITION_PREFIX):], "%Y%m")
+    except ValueError:
+        return None
+
+
+def audit_partitions_between(start: datetime, end: datetime) -> list[str]:
+    """Partitienamen die [start, end) raken, oudste eerst."""
+    names = []
+    current = month_start(start)
+    while current < end:
+        names.append(audit_partition(current))
+        current = add_months(current, 1)
+    return names
@@ -1,12 +1,38 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
-from app.routers import assessments, auth, candidates, evidence, status, trajecten, ws_live
+from app.db.indexes import apply_indexes
+from app.db import mongo
+from app.routers import assessments, audit, auth, candidates, evidence, health, ingest, status, trajecten, ws_live
+from app.services.audit_service import audit_service
+from app.services.http_client import http_client_pool
+from app.services.traject_catalog import traject_catalog
 
 settings = get_settings()
 
-app = FastAPI(title=settings.app_name)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start/stop gedeelde resources (Mongo-client, HTTP-pool, indexes, trajectcache, auditbuffer) één keer per proces."""
+    await mongo.connect()
+    await http_client_pool.startup()
+    # Eerst de auditpartities (met compressie) aanmaken; apply_indexes zou ze anders kaal aanmaken.
+    await audit_service.start()
+    await apply_indexes(mongo.get_database())
+    await traject_catalog.start()
+    try:
+        yield
+    finally:
+        await audit_service.stop()
+        await traject_catalog.stop()
+        await http_client_pool.shutdown()
+        await mongo.close()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["Authorization", "Content-Type"],
+    expose_headers=["Link", "X-Next-Cursor"],
 )
 
 app.include_router(auth.router)
@@ -21,8 +48,11 @@ app.include_router(candidates.router)
 app.include_router(assessments.router)
 app.include_router(trajecten.router)
 app.include_router(evidence.router)
+app.include_router(ingest.router)
 app.include_router(status.router)
 app.include_router(ws_live.router)
+app.include_router(health.router)
+app.include_router(audit.router)
 
 
 @app.get("/")
@@ -13,6 +13,8 @@ class EvidenceItem(BaseModel):
     uploaded_by_user_id: str = Field(alias="uploadedByUserId")
     type: Literal["text", "audio", "video", "image", "document"]
     path_or_blob_ref: str = Field(alias="pathOrBlobRef")
+    checksum: str | None = None
+    size_bytes: int | None = Field(default=None, alias="sizeBytes")
     description: str | None = None
     timestamp: datetime
     ai_generated_likelihood: float = Field(alias="aiGeneratedLikelihood")
@@ -1,20 +1,22 @@
+import json
 from datetime import datetime
+from typing import Optional
 
 from bson import ObjectId
 from bson.errors import InvalidId
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
 from app.db.mongo import get_database
 from app.routers.auth import get_current_user
 from app.services.ai_service import ai_service
 from app.services.audit_service import audit_service
+from app.services.report_stream import report_stream_service
 
 router = APIRouter(prefix="/assessments", tags=["assessments"])
 
 
-@router.post("/{candidate_id}/generate-report")
-async def generate_report(candidate_id: str, user=Depends(get_current_user)):
-    """Genereert concept-assessorrapport zodat beoordeling sneller verloopt."""
+async def _authorize_candidate(candidate_id: str, user: dict) -> dict:
     if user["role"] not in {"assessor", "admin"}:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Assessor-only endpoint")
 
@@ -30,6 +32,14 @@ async def generate_report(candidate_id: str, user=Depends(get_current_user)):
 
     if candidate["tenantId"] != user["tenantId"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cross-tenant access denied")
+    return candidate
+
+
+@router.post("/{candidate_id}/generate-report")
+async def generate_report(candidate_id: str, user=Depends(get_current_user)):
+    """Genereert concept-assessorrapport zodat beoordeling sneller verloopt."""
+    await _authorize_candidate(candidate_id, user)
+    db = get_database()
 
     report_text = await ai_service.generate_assessment_report(candidate_id)
 
@@ -54,3 +64,76 @@ async def generate_report(candidate_id: str, user=Depends(get_current_user)):
     )
 
     return {"draftReportText": report_text}
+
+
+def _sse(event: str, data: dict, event_id: int | None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _resume_draft(candidate_id: str, assessment_id: str, user: dict) -> dict:
+    try:
+        draft = await report_stream_service.get_draft(assessment_id)
+    except InvalidId:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid assessment id")
+    if not draft or draft["candidateId"] != candidate_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Draft not found")
+    if draft["tenantId"] != user["tenantId"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cross-tenant access denied")
+    return draft
+
+
+def _event_stream(draft: dict, last_event_id: Optional[str]) -> StreamingResponse:
+    offset = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    async def events():
+        async for event, data, event_id in report_stream_service.events(draft, offset=offset):
+            yield _sse(event, data, event_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{candidate_id}/generate-report/stream")
+async def stream_report(
+    candidate_id: str,
+    assessment_id: Optional[str] = Query(None, alias="assessmentId"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    user=Depends(get_current_user),
+):
+    """Zelfde concept als `generate-report`, maar tokens komen als SSE binnen zodra het model ze levert.
+
+    Het concept wordt tussentijds bewaard; opnieuw verbinden met `assessmentId` en `Last-Event-ID`
+    (tekenpositie) levert de ontbrekende tekst en hervat de generatie waar die stopte.
+    """
+    await _authorize_candidate(candidate_id, user)
+
+    if assessment_id:
+        draft = await _resume_draft(candidate_id, assessment_id, user)
+    else:
+        draft = await report_stream_service.create_draft(
+            tenant_id=user["tenantId"], candidate_id=candidate_id, assessor_id=user["sub"]
+        )
+        last_event_id = None
+    return _event_stream(draft, last_event_id)
+
+
+@router.get("/{candidate_id}/generate-report/stream")
+async def resume_report_stream(
+    candidate_id: str,
+    assessment_id: str = Query(..., alias="assessmentId"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    user=Depends(get_current_user),
+):
+    """Hervat een bestaand concept via GET, zodat een SSE-client met automatische herverbinding het kan volgen.
+
+    Maakt nooit een nieuw concept aan; start eerst met de POST-variant.
+    """
+    await _authorize_candidate(candidate_id, user)
+    return _event_stream(await _resume_draft(candidate_id, assessment_id, user), last_event_id)
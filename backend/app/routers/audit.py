@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.routers.auth import get_current_user
+from app.services.audit_partitions import audit_partitions
+from app.utils.pagination import InvalidCursor, next_page_headers
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+AUDIT_PAGE_SIZE = 100
+AUDIT_PAGE_MAX = 1000
+AUDIT_CSV_COLUMNS = ["id", "createdAt", "tenantId", "userId", "action", "targetType", "targetId"]
+
+
+def _require_admin(user: dict) -> None:
+    if user["role"] != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Alleen admins mogen de auditlog inzien")
+
+
+def _utc(value: datetime | None) -> datetime | None:
+    # createdAt staat als naive UTC in Mongo.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _audit_item(doc: dict[str, Any]) -> dict[str, Any]:
+    item = {key: value for key, value in doc.items() if key != "_id"}
+    item["id"] = str(doc["_id"])
+    if isinstance(doc.get("createdAt"), datetime):
+        item["createdAt"] = doc["createdAt"].isoformat()
+    return item
+
+
+def _filters(target_id: str | None, target_type: str | None, action: str | None, user_id: str | None) -> dict[str, Any]:
+    return {"targetId": target_id, "targetType": target_type, "action": action, "userId": user_id}
+
+
+async def _ndjson(entries: AsyncIterator[dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for doc in entries:
+        yield (json.dumps(_audit_item(doc), default=str) + "\n").encode()
+
+
+async def _csv(entries: AsyncIterator[dict[str, Any]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=AUDIT_CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    async for doc in entries:
+        writer.writerow(_audit_item(doc))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+@router.get("/logs")
+async def list_audit_logs(
+    request: Request,
+    target_id: str | None = Query(None, alias="targetId"),
+    target_type: str | None = Query(None, alias="targetType"),
+    action: str | None = None,
+    user_id: str | None = Query(None, alias="userId"),
+    since: datetime | None = Query(None, alias="from"),
+    until: datetime | None = Query(None, alias="to"),
+    cursor: str | None = None,
+    limit: int = Query(AUDIT_PAGE_SIZE, ge=1, le=AUDIT_PAGE_MAX),
+    user=Depends(get_current_user),
+):
+    """Auditlog van de eigen tenant, nieuwste eerst; volgende pagina via `Link`/`X-Next-Cursor`."""
+    _require_admin(user)
+    try:
+        docs, next_cursor = await audit_partitions.page(
+            user["tenantId"],
+            _filters(target_id, target_type, action, user_id),
+            since=_utc(since),
+            until=_utc(until),
+            cursor=cursor,
+            limit=limit,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ongeldige cursor")
+    return JSONResponse([_audit_item(doc) for doc in docs], headers=next_page_headers(request.url, next_cursor))
+
+
+@router.get("/export")
+async def export_audit_logs(
+    target_id: str | None = Query(None, alias="targetId"),
+    target_type: str | None = Query(None, alias="targetType"),
+    action: str | None = None,
+    user_id: str | None = Query(None, alias="userId"),
+    since: datetime | None = Query(None, alias="from"),
+    until: datetime | None = Query(None, alias="to"),
+    format: Literal["ndjson", "csv"] = "ndjson",
+    user=Depends(get_current_user),
+):
+    """Compliance-export (AVG): alle entries in chronologische volgorde, gestreamd per partitie."""
+    _require_admin(user)
+    entries = audit_partitions.stream(
+        user["tenantId"], _filters(target_id, target_type, action, user_id), since=_utc(since), until=_utc(until)
+    )
+    filename = f"audit-{user['tenantId']}-{datetime.utcnow():%Y%m%d}.{format}"
+    headers = {"content-disposition": f'attachment; filename="{filename}"'}
+    if format == "csv":
+        return StreamingResponse(_csv(entries), media_type="text/csv", headers=headers)
+    return StreamingResponse(_ndjson(entries), media_type="application/x-ndjson", headers=headers)
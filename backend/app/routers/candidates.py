@@ -1,6 +1,5 @@
 import json
 from datetime import datetime
-from pathlib import Path
 from typing import List, Optional
 
 from bson import ObjectId
@@ -9,17 +8,16 @@ from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, s
 
 from app.db.mongo import get_database
 from app.routers.auth import get_current_user
-from app.services.ai_service import ai_service
 from app.services.audit_service import audit_service
-from app.services.fraud_service import fraud_service
-from app.services.stt_service import stt_service
+from app.services.blob_store import blob_store
+from app.services.evidence_processor import PROCESS_EVIDENCE_JOB
+from app.services.job_queue import job_queue
+from app.services.upload_service import upload_service
 
 router = APIRouter(prefix="/candidates", tags=["candidates"])
 
-STORAGE_ROOT = Path("storage")
 
-
-@router.post("/{candidate_id}/evidence", status_code=201)
+@router.post("/{candidate_id}/evidence", status_code=status.HTTP_202_ACCEPTED)
 async def upload_evidence(
     candidate_id: str,
     description: str = Form(...),
@@ -28,7 +26,11 @@ async def upload_evidence(
     file: Optional[UploadFile] = File(None),
     user=Depends(get_current_user),
 ):
-    """Voegt bewijs toe zodat portfolio (jeugdzorg) of praktijk (autotechniek) kan worden beoordeeld."""
+    """Voegt bewijs toe zodat portfolio (jeugdzorg) of praktijk (autotechniek) kan worden beoordeeld.
+
+    Analyse (STT, indicator-mapping, fraudescore) loopt via de job queue; de status volgt
+    `uploaded → processing → ready/flagged` op het evidence document.
+    """
     try:
         candidate_oid = ObjectId(candidate_id)
     except InvalidId:
@@ -43,29 +45,23 @@ async def upload_evidence(
     if candidate["tenantId"] != tenant_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cross-tenant access denied")
 
-    content_text = text or ""
-    transcript_text = None
     evidence_type = "text"
     path_ref = None
+    checksum = None
+    size_bytes = None
+    file_name = None
+    content_type = None
 
     if file is not None:
-        storage_dir = STORAGE_ROOT / tenant_id / candidate_id
-        storage_dir.mkdir(parents=True, exist_ok=True)
-        file_bytes = await file.read()
-        file_path = storage_dir / file.filename
-        file_path.write_bytes(file_bytes)
-        path_ref = str(file_path)
+        staged = await upload_service.stage(file, tenant_id=tenant_id)
+        path_ref = await blob_store.put(staged, tenant_id=tenant_id)
+        checksum = staged.checksum
+        size_bytes = staged.size_bytes
+        file_name = staged.filename
+        content_type = staged.content_type
         evidence_type = _detect_type(file.content_type or file.filename)
-
-        if evidence_type == "audio":
-            stt_result = await stt_service.transcribe_audio(file_bytes, file.content_type or "audio/mpeg")
-            transcript_text = stt_result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0].get("transcript")
-            content_text = transcript_text or description
-        else:
-            content_text = text or description
     else:
         path_ref = f"text::{candidate_id}::{datetime.utcnow().isoformat()}"
-        content_text = text or description
 
     hints: List[str] = []
     if indicator_hints:
@@ -74,35 +70,31 @@ async def upload_evidence(
         except json.JSONDecodeError:
             hints = [indicator_hints]
 
-    analysis = await ai_service.analyze_evidence(content_text, candidate_id)
-    fraud_analysis = await fraud_service.score_text_for_ai_origin(content_text)
-
-    ai_likelihood = float(fraud_analysis.get("aiGeneratedLikelihood", analysis.get("aiGeneratedLikelihood", 0.0)))
-    fraud_flags_ai = analysis.get("fraudFlags", []) or []
-    fraud_flags_service = fraud_analysis.get("fraudFlags", []) or []
-    fraud_flags = [*fraud_flags_ai, *fraud_flags_service]
-    mapped_indicators = analysis.get("mappedIndicators", []) or hints
-    if isinstance(mapped_indicators, str):
-        mapped_indicators = [mapped_indicators]
-
     evidence_doc = {
         "tenantId": tenant_id,
         "candidateId": candidate_id,
         "uploadedByUserId": user["sub"],
         "type": evidence_type,
+        "status": "uploaded",
         "pathOrBlobRef": path_ref,
+        "checksum": checksum,
+        "sizeBytes": size_bytes,
+        "fileName": file_name,
+        "contentType": content_type,
         "description": description,
+        "extractedText": text,
+        "indicatorHints": hints,
         "timestamp": datetime.utcnow(),
-        "aiGeneratedLikelihood": ai_likelihood,
-        "mappedIndicators": mapped_indicators,
-        "transcript": transcript_text,
-        "fraudFlags": fraud_flags,
+        "aiGeneratedLikelihood": None,
+        "mappedIndicators": [],
+        "transcript": None,
+        "fraudFlags": [],
     }
 
     result = await db["evidenceItems"].insert_one(evidence_doc)
     evidence_id = str(result.inserted_id)
 
-    await _update_indicator_coverage(db, candidate_oid, mapped_indicators, evidence_id)
+    job_id = await job_queue.enqueue(PROCESS_EVIDENCE_JOB, {"evidenceId": evidence_id}, tenant_id=tenant_id)
     await audit_service.log(
         tenant_id=tenant_id,
         user_id=user["sub"],
@@ -111,7 +103,45 @@ async def upload_evidence(
         target_id=candidate_id,
     )
 
-    return {"evidenceId": evidence_id, "mappedIndicators": mapped_indicators, "aiGeneratedLikelihood": ai_likelihood, "fraudFlags": fraud_flags}
+    return {"evidenceId": evidence_id, "status": "uploaded", "jobId": job_id}
+
+
+@router.get("/{candidate_id}/evidence/{evidence_id}")
+async def get_evidence_status(candidate_id: str, evidence_id: str, user=Depends(get_current_user)):
+    """Laat de client pollen tot de analyse van een upload klaar is."""
+    try:
+        evidence_oid = ObjectId(evidence_id)
+    except InvalidId:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid evidence id")
+
+    db = get_database()
+    evidence = await db["evidenceItems"].find_one(
+        {"_id": evidence_oid, "candidateId": candidate_id},
+        {"tenantId": 1, "status": 1, "mappedIndicators": 1, "aiGeneratedLikelihood": 1, "fraudFlags": 1, "transcript": 1},
+    )
+    if not evidence:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evidence not found")
+
+    if evidence["tenantId"] != user["tenantId"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cross-tenant access denied")
+
+    job = await job_queue.latest_for_evidence(evidence_id)
+    return {
+        "evidenceId": evidence_id,
+        "status": evidence.get("status", "ready"),
+        "job": {
+            "id": str(job["_id"]),
+            "status": job["status"],
+            "attempts": job["attempts"],
+            "maxAttempts": job.get("maxAttempts"),
+            "runAt": job["runAt"].isoformat() if job.get("runAt") else None,
+            "lastError": job.get("lastError"),
+        } if job else None,
+        "mappedIndicators": evidence.get("mappedIndicators", []),
+        "aiGeneratedLikelihood": evidence.get("aiGeneratedLikelihood"),
+        "fraudFlags": evidence.get("fraudFlags", []),
+        "transcript": evidence.get("transcript"),
+    }
 
 
 def _detect_type(content_type: str) -> str:
@@ -124,20 +154,3 @@ def _detect_type(content_type: str) -> str:
     if "pdf" in content_type:
         return "document"
     return "text"
-
-
-async def _update_indicator_coverage(db, candidate_oid: ObjectId, indicators: list[str], evidence_id: str) -> None:
-    """Zet indicatoren op 'gedekt' zodat kandidaat dashboard direct procenten ziet."""
-    if not indicators:
-        return
-
-    set_updates = {f"indicatorCoverage.{indicator}.covered": True for indicator in indicators}
-    add_updates = {f"indicatorCoverage.{indicator}.evidenceIds": evidence_id for indicator in indicators}
-
-    await db["candidates"].update_one(
-        {"_id": candidate_oid},
-        {
-            "$set": set_updates,
-            "$addToSet": add_updates,
-        },
-    )
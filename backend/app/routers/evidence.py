@@ -1,16 +1,35 @@
 import json
 import os
 from datetime import datetime
-from typing import Any
+from typing import Any, AsyncIterator, Literal
 
 from bson import ObjectId
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, File, Form, HTTPException, Query, Request, UploadFile, status
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 
 from app.db.mongo import get_collection
+from app.schemas.evidence import DirectUploadCompleteRequest, DirectUploadRequest
+from app.services.blob_store import blob_store, is_blob_ref
+from app.services.upload_service import upload_service
+from app.utils.http_range import file_response
+from app.utils.pagination import InvalidCursor, encode_cursor, keyset_filter, keyset_sort, next_page_headers
 
 router = APIRouter(prefix="/evidence", tags=["evidence"])
 
+EVIDENCE_PAGE_SIZE = 50
+EVIDENCE_PAGE_MAX = 500
+EVIDENCE_STREAM_BATCH = 100
+EVIDENCE_LIST_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "competencyAreaId": 1,
+    "type": 1,
+    "status": 1,
+    "timestamp": 1,
+    "pathOrBlobRef": 1,
+    "mappedIndicators": 1,
+}
+
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_evidence(
@@ -30,37 +49,26 @@ async def create_evidence(
         raise HTTPException(status_code=404, detail="Kandidaat niet gevonden")
 
     # Bepaal file type
-    content_type = file.content_type or ""
-    if "image" in content_type:
-        evidence_type = "image"
-    elif "audio" in content_type:
-        evidence_type = "audio"
-    elif "video" in content_type:
-        evidence_type = "video"
-    elif "pdf" in content_type or "document" in content_type:
-        evidence_type = "document"
-    else:
-        evidence_type = "document"
-
-    # Genereer file path (in productie zou dit naar blob storage gaan)
-    file_extension = file.filename.split(".")[-1] if "." in file.filename else "bin"
-    file_path = f"uploads/{candidate_id}/{ObjectId()}.{file_extension}"
-
-    # Sla file op (simpele versie - in productie naar cloud storage)
-    os.makedirs(f"uploads/{candidate_id}", exist_ok=True)
-    content = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(content)
+    evidence_type = _detect_type(file.content_type or "")
+
+    # Stream file in chunks naar staging; identieke bytes worden per tenant één keer bewaard
+    tenant_id = candidate_doc.get("tenantId", "default")
+    staged = await upload_service.stage(file, tenant_id=tenant_id)
+    blob_ref = await blob_store.put(staged, tenant_id=tenant_id)
 
     # Maak evidence document
     evidence_id = str(ObjectId())
     evidence_doc = {
         "_id": evidence_id,
-        "tenantId": candidate_doc.get("tenantId", "default"),
+        "tenantId": tenant_id,
         "candidateId": candidate_id,
         "uploadedByUserId": candidate_doc.get("userId", candidate_id),
         "type": evidence_type,
-        "pathOrBlobRef": file_path,
+        "pathOrBlobRef": blob_ref,
+        "checksum": staged.checksum,
+        "sizeBytes": staged.size_bytes,
+        "fileName": staged.filename,
+        "contentType": staged.content_type,
         "title": title,
         "description": description,
         "competencyAreaId": competency_area_id,
@@ -82,32 +90,213 @@ async def create_evidence(
     }
 
 
+def _detect_type(content_type: str) -> str:
+    if "image" in content_type:
+        return "image"
+    if "audio" in content_type:
+        return "audio"
+    if "video" in content_type:
+        return "video"
+    return "document"
+
+
+@router.post("/uploads", status_code=status.HTTP_201_CREATED)
+async def start_direct_upload(body: DirectUploadRequest) -> dict[str, Any]:
+    """
+    Start een directe browser-upload naar object storage via pre-signed multipart URLs.
+    """
+    backend = blob_store.backend
+    if not backend.supports_presigned_uploads:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Directe uploads vereisen object storage; gebruik POST /evidence/",
+        )
+
+    candidate_doc = await get_collection("candidates").find_one({"_id": body.candidate_id})
+    if not candidate_doc:
+        raise HTTPException(status_code=404, detail="Kandidaat niet gevonden")
+
+    tenant_id = candidate_doc.get("tenantId", "default")
+    if body.size_bytes > upload_service.limit_for(tenant_id):
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Bestand te groot")
+
+    upload_id = str(ObjectId())
+    staging_key = f"staging/{tenant_id}/{upload_id}"
+    multipart = await backend.create_multipart_upload(staging_key, body.content_type, body.size_bytes)
+
+    await get_collection("pendingUploads").insert_one(
+        {
+            "_id": upload_id,
+            "tenantId": tenant_id,
+            "candidateId": body.candidate_id,
+            "uploadedByUserId": candidate_doc.get("userId", body.candidate_id),
+            "stagingKey": staging_key,
+            "multipartUploadId": multipart["uploadId"],
+            "title": body.title,
+            "description": body.description,
+            "competencyAreaId": body.competency_area_id,
+            "fileName": body.filename,
+            "contentType": body.content_type,
+            "sizeBytes": body.size_bytes,
+            "checksum": body.checksum,
+            "createdAt": datetime.utcnow(),
+        }
+    )
+
+    return {"uploadId": upload_id, "partSize": multipart["partSize"], "parts": multipart["parts"]}
+
+
+@router.post("/uploads/{upload_id}/complete", status_code=status.HTTP_201_CREATED)
+async def complete_direct_upload(upload_id: str, body: DirectUploadCompleteRequest) -> dict[str, Any]:
+    """
+    Rondt een directe upload af en maakt het evidence document aan.
+    """
+    pending_coll = get_collection("pendingUploads")
+    pending = await pending_coll.find_one({"_id": upload_id})
+    if not pending:
+        raise HTTPException(status_code=404, detail="Upload niet gevonden")
+
+    backend = blob_store.backend
+    staging_key = pending["stagingKey"]
+    await backend.complete_multipart_upload(
+        staging_key,
+        pending["multipartUploadId"],
+        [{"partNumber": part.part_number, "etag": part.etag} for part in body.parts],
+    )
+
+    stored_size = await backend.size(staging_key)
+    if stored_size != pending["sizeBytes"]:
+        await backend.delete(staging_key)
+        await pending_coll.delete_one({"_id": upload_id})
+        raise HTTPException(status_code=400, detail="Geüploade grootte wijkt af van aangemelde grootte")
+
+    # De blob-key is de checksum; die mag dus niet van de client komen zonder dat we hem narekenen.
+    actual_checksum = await upload_service.checksum_stream(
+        backend.open_stream(staging_key, upload_service.settings.upload_chunk_bytes)
+    )
+    if actual_checksum != pending["checksum"]:
+        await backend.delete(staging_key)
+        await pending_coll.delete_one({"_id": upload_id})
+        raise HTTPException(status_code=400, detail="Checksum van de upload wijkt af van de aangemelde checksum")
+
+    blob_ref = await blob_store.adopt(
+        staging_key,
+        tenant_id=pending["tenantId"],
+        checksum=pending["checksum"],
+        size_bytes=stored_size,
+        content_type=pending["contentType"],
+    )
+
+    evidence_id = str(ObjectId())
+    evidence_doc = {
+        "_id": evidence_id,
+        "tenantId": pending["tenantId"],
+        "candidateId": pending["candidateId"],
+        "uploadedByUserId": pending["uploadedByUserId"],
+        "type": _detect_type(pending["contentType"]),
+        "pathOrBlobRef": blob_ref,
+        "checksum": actual_checksum,
+        "checksumVerified": True,
+        "sizeBytes": stored_size,
+        "fileName": pending["fileName"],
+        "contentType": pending["contentType"],
+        "title": pending["title"],
+        "description": pending["description"],
+        "competencyAreaId": pending["competencyAreaId"],
+        "timestamp": datetime.utcnow(),
+        "aiGeneratedLikelihood": 0.0,
+        "mappedIndicators": [],
+        "transcript": None,
+        "fraudFlags": [],
+        "status": "pending",
+    }
+    await get_collection("evidence").insert_one(evidence_doc)
+    await pending_coll.delete_one({"_id": upload_id})
+
+    return {"evidenceId": evidence_id, "message": "Bewijs succesvol toegevoegd", "status": "pending"}
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_direct_upload(upload_id: str) -> dict[str, str]:
+    """
+    Breekt een directe upload af en ruimt de al geüploade parts op.
+    """
+    pending_coll = get_collection("pendingUploads")
+    pending = await pending_coll.find_one({"_id": upload_id})
+    if not pending:
+        raise HTTPException(status_code=404, detail="Upload niet gevonden")
+
+    await blob_store.backend.abort_multipart_upload(pending["stagingKey"], pending["multipartUploadId"])
+    await pending_coll.delete_one({"_id": upload_id})
+
+    return {"message": "Upload afgebroken"}
+
+
+def _evidence_item(doc: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": doc["_id"],
+        "title": doc.get("title", "Onbekend"),
+        "description": doc.get("description", ""),
+        "competencyAreaId": doc.get("competencyAreaId", ""),
+        "type": doc["type"],
+        "status": doc.get("status", "pending"),
+        "timestamp": doc["timestamp"].isoformat() if isinstance(doc["timestamp"], datetime) else doc["timestamp"],
+        "pathOrBlobRef": doc["pathOrBlobRef"],
+        "mappedIndicators": doc.get("mappedIndicators", []),
+    }
+
+
+async def _ndjson_evidence(cursor) -> AsyncIterator[bytes]:
+    try:
+        async for doc in cursor:
+            yield (json.dumps(_evidence_item(doc), default=str) + "\n").encode()
+    finally:
+        await cursor.close()
+
+
 @router.get("/candidate/{candidate_id}")
-async def get_candidate_evidence(candidate_id: str) -> list[dict[str, Any]]:
+async def get_candidate_evidence(
+    candidate_id: str,
+    request: Request,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=EVIDENCE_PAGE_MAX),
+    format: Literal["json", "ndjson"] = "json",
+):
     """
-    Haal alle bewijs op voor een kandidaat.
+    Haal bewijs op voor een kandidaat, nieuwste eerst.
+
+    Zonder `limit` en `cursor` komt de volledige lijst terug (bestaande clients). Met een van beide
+    wordt er gepagineerd; de volgende pagina staat in `Link`/`X-Next-Cursor`. Met `format=ndjson`
+    wordt alles na de cursor (of `limit` items) regel voor regel gestreamd.
     """
+    try:
+        after = keyset_filter("timestamp", cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ongeldige cursor")
+
     evidence_coll = get_collection("evidence")
-    cursor = evidence_coll.find({"candidateId": candidate_id})
-    evidence_docs = await cursor.to_list(length=None)
-
-    result = []
-    for doc in evidence_docs:
-        result.append(
-            {
-                "id": doc["_id"],
-                "title": doc.get("title", "Onbekend"),
-                "description": doc.get("description", ""),
-                "competencyAreaId": doc.get("competencyAreaId", ""),
-                "type": doc["type"],
-                "status": doc.get("status", "pending"),
-                "timestamp": doc["timestamp"].isoformat() if isinstance(doc["timestamp"], datetime) else doc["timestamp"],
-                "pathOrBlobRef": doc["pathOrBlobRef"],
-                "mappedIndicators": doc.get("mappedIndicators", []),
-            }
-        )
+    query = {"candidateId": candidate_id, **after}
+    sort = keyset_sort("timestamp")
+
+    if format == "ndjson":
+        db_cursor = evidence_coll.find(query, EVIDENCE_LIST_PROJECTION).sort(sort).batch_size(EVIDENCE_STREAM_BATCH)
+        if limit is not None:
+            db_cursor = db_cursor.limit(limit)
+        return StreamingResponse(_ndjson_evidence(db_cursor), media_type="application/x-ndjson")
+
+    if cursor is None and limit is None:
+        docs = await evidence_coll.find(query, EVIDENCE_LIST_PROJECTION).sort(sort).to_list(length=None)
+        return JSONResponse([_evidence_item(doc) for doc in docs])
 
-    return result
+    page_size = limit or EVIDENCE_PAGE_SIZE
+    # Eén extra document ophalen om te weten of er een volgende pagina is.
+    docs = await evidence_coll.find(query, EVIDENCE_LIST_PROJECTION).sort(sort).limit(page_size + 1).to_list(length=page_size + 1)
+    next_cursor = None
+    if len(docs) > page_size:
+        docs = docs[:page_size]
+        next_cursor = encode_cursor(docs[-1]["timestamp"], docs[-1]["_id"])
+
+    return JSONResponse([_evidence_item(doc) for doc in docs], headers=next_page_headers(request.url, next_cursor))
 
 
 @router.get("/{evidence_id}")
@@ -138,28 +327,43 @@ async def get_evidence_by_id(evidence_id: str) -> dict[str, Any]:
     }
 
 
-@router.get("/{evidence_id}/download")
-async def download_evidence(evidence_id: str):
+@router.api_route("/{evidence_id}/download", methods=["GET", "HEAD"])
+async def download_evidence(evidence_id: str, request: Request):
     """
-    Download het bewijs bestand.
+    Download het bewijs bestand (Range, ETag en conditional GET voor doorspoelen in media).
     """
     evidence_coll = get_collection("evidence")
-    evidence_doc = await evidence_coll.find_one({"_id": evidence_id})
+    evidence_doc = await evidence_coll.find_one(
+        {"_id": evidence_id},
+        {"tenantId": 1, "pathOrBlobRef": 1, "fileName": 1, "title": 1, "checksum": 1, "contentType": 1},
+    )
 
     if not evidence_doc:
         raise HTTPException(status_code=404, detail="Bewijs niet gevonden")
 
-    file_path = evidence_doc["pathOrBlobRef"]
-
-    # Check of bestand bestaat
-    if not os.path.exists(file_path):
+    tenant_id = evidence_doc.get("tenantId", "default")
+    file_ref = evidence_doc["pathOrBlobRef"]
+    source_name = evidence_doc.get("fileName") or file_ref
+    filename = evidence_doc.get("title", "download") + "." + source_name.split(".")[-1]
+
+    file_path = blob_store.local_path(tenant_id, file_ref)
+    if file_path is None:
+        # Object storage: browser haalt de bytes rechtstreeks uit de bucket (die doet zelf Range/ETag)
+        url = await blob_store.download_url(tenant_id, file_ref, filename)
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    checksum = evidence_doc.get("checksum")
+    try:
+        return await file_response(
+            request,
+            file_path,
+            etag=f'"{checksum}"' if checksum else None,
+            filename=filename,
+            media_type=evidence_doc.get("contentType"),
+        )
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Bestand niet gevonden")
 
-    return FileResponse(
-        file_path,
-        filename=evidence_doc.get("title", "download") + "." + file_path.split(".")[-1],
-    )
-
 
 @router.put("/{evidence_id}")
 async def update_evidence(
@@ -209,12 +413,17 @@ async def delete_evidence(evidence_id: str) -> dict[str, str]:
     if not evidence_doc:
         raise HTTPException(status_code=404, detail="Bewijs niet gevonden")
 
-    # Verwijder bestand
-    file_path = evidence_doc["pathOrBlobRef"]
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    # Verwijder bestand; gedeelde blobs pas bij de laatste referentie
+    file_ref = evidence_doc["pathOrBlobRef"]
+    if is_blob_ref(file_ref):
+        await blob_store.release(evidence_doc.get("tenantId", "default"), file_ref)
+    elif os.path.exists(file_ref):
+        os.remove(file_ref)
 
     # Verwijder document
     await evidence_coll.delete_one({"_id": evidence_id})
+    # Tekst-signaturen en beeldhashes horen bij `evidenceItems` (de AI-pijplijn), niet bij `evidence`;
+    # die collectie heeft nog geen verwijderpad. Zodra die er is: near_duplicate_index.remove en
+    # image_hash_index.remove daar aanroepen.
 
     return {"message": "Bewijs succesvol verwijderd"}
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.db.mongo import readiness
+from app.services.audit_service import audit_service
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def live() -> dict[str, str]:
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready() -> JSONResponse:
+    """Readiness voor de load balancer; toont ook Mongo-poolverzadiging en de auditbuffer om throughput te tunen."""
+    mongo = await readiness()
+    return JSONResponse(
+        {"status": "ok" if mongo["ok"] else "unavailable", "mongo": mongo, "audit": audit_service.stats()},
+        status_code=200 if mongo["ok"] else 503,
+    )
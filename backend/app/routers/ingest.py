@@ -0,0 +1,49 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.core.config import get_settings
+from app.routers.auth import get_current_user
+from app.services.bulk_ingest import bulk_ingest_service
+
+router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+
+def _require_admin(user: dict) -> None:
+    if user["role"] != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Alleen admins mogen bulk importeren")
+
+
+@router.post("/bulk/{manifest_id}")
+async def bulk_ingest(
+    manifest_id: str,
+    request: Request,
+    concurrency: int | None = Query(None, ge=1),
+    user=Depends(get_current_user),
+):
+    """Onboarding van een complete cohort: NDJSON-manifest in, NDJSON-resultaat per item uit.
+
+    Zelfde `manifest_id` opnieuw insturen hervat de import; afgeronde items komen terug als `skipped`.
+    """
+    _require_admin(user)
+    settings = get_settings()
+    limit = min(concurrency or settings.bulk_ingest_concurrency, settings.bulk_ingest_max_concurrency)
+
+    async def results():
+        async for result in bulk_ingest_service.run(
+            request.stream(),
+            tenant_id=user["tenantId"],
+            user_id=user["sub"],
+            manifest_id=manifest_id,
+            concurrency=limit,
+        ):
+            yield json.dumps(result, default=str) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.get("/bulk/{manifest_id}")
+async def bulk_ingest_progress(manifest_id: str, user=Depends(get_current_user)):
+    _require_admin(user)
+    return await bulk_ingest_service.progress(user["tenantId"], manifest_id)
@@ -2,8 +2,8 @@ from bson import ObjectId
 from bson.errors import InvalidId
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from app.db.mongo import get_database
 from app.routers.auth import get_current_user
+from app.services.coverage import coverage_service
 
 router = APIRouter(prefix="/candidates", tags=["status"])
 
@@ -16,8 +16,7 @@ async def candidate_status(candidate_id: str, user=Depends(get_current_user)):
     except InvalidId:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid candidate id")
 
-    db = get_database()
-    candidate = await db["candidates"].find_one({"_id": candidate_oid})
+    candidate = await coverage_service.status(candidate_oid, user["tenantId"])
     if not candidate:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Candidate not found")
 
@@ -26,6 +25,7 @@ async def candidate_status(candidate_id: str, user=Depends(get_current_user)):
 
     return {
         "indicatorCoverage": candidate.get("indicatorCoverage", {}),
+        "coverageSummary": candidate.get("coverageSummary"),
         "fraudFlags": candidate.get("fraudFlags", []),
         "statusPhase": candidate.get("statusPhase"),
     }
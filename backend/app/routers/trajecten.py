@@ -1,81 +1,80 @@
 """API endpoints voor trajecten (competentieprofielen)."""
-from fastapi import APIRouter, Depends, HTTPException, status
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response
 
-from app.db.mongo import get_database
 from app.models.traject import Traject, Domain
+from app.services.traject_catalog import CatalogEntry, list_etag, traject_catalog
+from app.utils.http_range import is_not_modified
 
 router = APIRouter(prefix="/trajecten", tags=["trajecten"])
 
+CACHE_HEADERS = {"cache-control": "private, max-age=0, must-revalidate"}
+
+
+def _json_response(request: Request, body: bytes, etag: str) -> Response:
+    """Voorgeserialiseerde JSON uit de catalogus; 304 als de client de versie al heeft."""
+    headers = {**CACHE_HEADERS, "etag": etag}
+    if is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _require_valid(entries: list[CatalogEntry]) -> None:
+    if any(entry.body is None for entry in entries):
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Traject data is invalid")
+
+
+def _list_response(request: Request, entries: list[CatalogEntry]) -> Response:
+    _require_valid(entries)
+    return _json_response(request, b"[" + b",".join(entry.body for entry in entries) + b"]", list_etag(entries))
+
 
 @router.get("/{traject_id}", response_model=Traject)
-async def get_traject(
-    traject_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
-):
+async def get_traject(traject_id: str, request: Request):
     """Haal een specifiek traject op met alle deskundigheidsgebieden en indicatoren."""
     from bson import ObjectId
     from bson.errors import InvalidId
 
     try:
-        traject_oid = ObjectId(traject_id)
+        ObjectId(traject_id)
     except InvalidId:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid traject ID format"
         )
 
-    traject = await db.trajecten.find_one({"_id": traject_oid})
+    entry = await traject_catalog.get(traject_id)
 
-    if not traject:
+    if not entry:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Traject with ID {traject_id} not found"
         )
 
-    # Convert ObjectId to string for JSON serialization
-    traject["_id"] = str(traject["_id"])
-    return traject
+    _require_valid([entry])
+    return _json_response(request, entry.body, entry.etag)
 
 
 @router.get("/domain/{domain}", response_model=list[Traject])
 async def get_trajecten_by_domain(
     domain: Domain,
+    request: Request,
     tenant_id: str = "skillval-demo",
-    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Haal alle trajecten op voor een specifiek domein (bijv. 'jeugdzorg' of 'autotechniek')."""
-    cursor = db.trajecten.find({
-        "tenantId": tenant_id,
-        "domain": domain.value
-    })
-
-    trajecten = await cursor.to_list(length=100)
+    entries = await traject_catalog.list_for(tenant_id, domain.value)
 
-    if not trajecten:
+    if not entries:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No trajecten found for domain '{domain}'"
         )
 
-    # Convert ObjectId to string for JSON serialization
-    for traject in trajecten:
-        traject["_id"] = str(traject["_id"])
-
-    return trajecten
+    return _list_response(request, entries)
 
 
 @router.get("/", response_model=list[Traject])
-async def get_all_trajecten(
-    tenant_id: str = "skillval-demo",
-    db: AsyncIOMotorDatabase = Depends(get_database)
-):
+async def get_all_trajecten(request: Request, tenant_id: str = "skillval-demo"):
     """Haal alle trajecten op voor een tenant."""
-    cursor = db.trajecten.find({"tenantId": tenant_id})
-    trajecten = await cursor.to_list(length=100)
-
-    # Convert ObjectId to string for JSON serialization
-    for traject in trajecten:
-        traject["_id"] = str(traject["_id"])
-
-    return trajecten
+    entries = await traject_catalog.list_for(tenant_id)
+    return _list_response(request, entries)
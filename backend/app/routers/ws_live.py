@@ -1,20 +1,101 @@
+import asyncio
 import json
+import logging
 from datetime import datetime
+from typing import Any
 
 from bson import ObjectId
 from bson.errors import InvalidId
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from app.core.config import get_settings
 from app.db.mongo import get_database
 from app.services.audit_service import audit_service
+from app.services.live_notes import LiveNoteBuffer
+from app.services.live_stt import LiveSTTSession, live_stt_service
 from app.utils.jwt import decode_token
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
+def _parse_text_frame(message: str) -> dict[str, Any]:
+    """Platte tekst is een notitie; JSON-frames zijn `{"type": "note", "text", "seq"}` of `{"type": "audio_end"}`."""
+    if message.startswith("{"):
+        try:
+            frame = json.loads(message)
+        except ValueError:
+            frame = None
+        if isinstance(frame, dict) and frame.get("type") in {"note", "audio_end"}:
+            return frame
+    return {"type": "note", "text": message}
+
+
+class _TranscriptRelay:
+    """Koppelt één STT-sessie aan de socket: segmenten naar de client, finale segmenten als notitie."""
+
+    def __init__(self, websocket: WebSocket, session: LiveSTTSession, store) -> None:
+        self.websocket = websocket
+        self.session = session
+        self.store = store
+        self.client_connected = True
+        self.task = asyncio.create_task(self._run())
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        if not self.client_connected:
+            return
+        try:
+            await self.websocket.send_text(json.dumps(message))
+        except Exception:
+            # Client is weg; finale segmenten worden wel nog opgeslagen.
+            self.client_connected = False
+
+    async def _run(self) -> None:
+        async for segment in self.session.results():
+            message: dict[str, Any] = {
+                "type": "transcript",
+                "isFinal": segment.is_final,
+                "text": segment.text,
+                "start": segment.start,
+                "end": segment.end,
+            }
+            if segment.is_final:
+                note = {
+                    "text": segment.text,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "source": "stt",
+                    "audioStart": segment.start,
+                    "audioEnd": segment.end,
+                }
+                await self.store(note, "assessment_live_transcript")
+                message["note"] = note
+            await self._send(message)
+
+    async def finish(self, timeout: float) -> None:
+        """Einde audio: wacht (begrensd) op de laatste finale segmenten en sluit de sessie."""
+        try:
+            await self.session.finish()
+            await asyncio.wait_for(self.task, timeout=timeout)
+        except Exception:
+            pass
+        finally:
+            self.task.cancel()
+            try:
+                await self.session.close()
+            except Exception:
+                pass
+
+
 @router.websocket("/ws/assessor/live/{candidate_id}")
 async def assessor_live(websocket: WebSocket, candidate_id: str) -> None:
-    """Laat assessoren live notities sturen tijdens praktijkobservaties."""
+    """Laat assessoren live notities sturen tijdens praktijkobservaties.
+
+    Tekstframes zijn notities; binaire frames zijn audio die naar streaming-STT gaat
+    (`?encoding=linear16&sample_rate=16000` voor ruwe PCM, anders detecteert Deepgram het formaat).
+    Notities worden direct ge-ackt met hun `seq` en gebufferd weggeschreven; `{"type": "persisted"}`
+    meldt welke volgnummers in Mongo staan.
+    """
     token = websocket.query_params.get("token")
     if not token:
         await websocket.close(code=4401)
@@ -44,38 +125,93 @@ async def assessor_live(websocket: WebSocket, candidate_id: str) -> None:
 
     await websocket.accept()
 
+    settings = get_settings()
+    encoding = websocket.query_params.get("encoding")
+    sample_rate = websocket.query_params.get("sample_rate")
+    relay: _TranscriptRelay | None = None
+    stt_unavailable = False
+
+    async def persisted(seqs: list[int]) -> None:
+        try:
+            await websocket.send_text(json.dumps({"type": "persisted", "seqs": seqs}))
+        except Exception:
+            pass
+
+    notes = LiveNoteBuffer(
+        db,
+        tenant_id=payload["tenantId"],
+        candidate_id=candidate_id,
+        assessor_id=payload["sub"],
+        on_persisted=persisted,
+    )
+
+    async def store(note: dict[str, Any], action: str) -> None:
+        notes.add(note)
+        await audit_service.log(
+            tenant_id=payload["tenantId"],
+            user_id=payload["sub"],
+            action=action,
+            target_type="candidate",
+            target_id=candidate_id,
+        )
+
     try:
         while True:
-            message = await websocket.receive_text()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            audio = message.get("bytes")
+            if audio is not None:
+                if stt_unavailable:
+                    continue
+                if len(audio) > settings.live_stt_max_frame_bytes:
+                    await websocket.send_text(json.dumps({"type": "error", "detail": "Audioframe te groot"}))
+                    continue
+                if relay is None:
+                    try:
+                        session = await live_stt_service.open_session(
+                            encoding=encoding,
+                            sample_rate=int(sample_rate) if sample_rate and sample_rate.isdigit() else None,
+                        )
+                    except Exception:
+                        # Notities blijven werken; audio van deze sessie wordt genegeerd.
+                        stt_unavailable = True
+                        await websocket.send_text(
+                            json.dumps({"type": "transcript_unavailable", "detail": "Live transcriptie niet beschikbaar"})
+                        )
+                        continue
+                    relay = _TranscriptRelay(websocket, session, store)
+                try:
+                    await relay.session.send(audio)
+                except Exception:
+                    await relay.finish(settings.live_stt_finalize_timeout_seconds)
+                    relay = None
+                continue
+
+            frame = _parse_text_frame(message.get("text") or "")
+            if frame["type"] == "audio_end":
+                if relay is not None:
+                    await relay.finish(settings.live_stt_finalize_timeout_seconds)
+                    relay = None
+                await websocket.send_text(json.dumps({"type": "audio_end"}))
+                continue
+
             note = {
-                "text": message,
+                "text": str(frame.get("text") or ""),
                 "timestamp": datetime.utcnow().isoformat(),
+                "seq": notes.next_seq(frame.get("seq")),
             }
-            await db["assessments"].update_one(
-                {
-                    "tenantId": payload["tenantId"],
-                    "candidateId": candidate_id,
-                    "assessorId": payload["sub"],
-                },
-                {
-                    "$setOnInsert": {
-                        "sessionMeta": {},
-                        "notes": [],
-                        "mediaIds": [],
-                        "draftReportText": None,
-                        "createdAt": datetime.utcnow(),
-                    },
-                    "$push": {"notes": note},
-                },
-                upsert=True,
-            )
-            await audit_service.log(
-                tenant_id=payload["tenantId"],
-                user_id=payload["sub"],
-                action="assessment_live_note",
-                target_type="candidate",
-                target_id=candidate_id,
-            )
-            await websocket.send_text(json.dumps({"status": "ok", "note": note}))
+            # Alleen bufferen, dus de ack wacht niet op Mongo.
+            await store(note, "assessment_live_note")
+            await websocket.send_text(json.dumps({"status": "ok", "note": note, "seq": note["seq"]}))
     except WebSocketDisconnect:
-        await websocket.close()
+        pass
+    finally:
+        if relay is not None:
+            relay.client_connected = False
+            await relay.finish(settings.live_stt_finalize_timeout_seconds)
+        try:
+            await notes.close()
+        except Exception:
+            logger.exception("live-notities voor kandidaat %s niet weggeschreven bij disconnect", candidate_id)
@@ -17,3 +17,16 @@ class FollowupRequest(BaseModel):
 class FraudCheckRequest(BaseModel):
     tenant_id: str = Field(..., alias="tenantId")
     evidence: dict[str, Any] = {}
+
+
+class BulkIngestItem(AnalyzeRequest):
+    """Eén regel uit een NDJSON-manifest: tekst en/of een eerder geüploade blob (`sha256:...`)."""
+
+    tenant_id: str | None = Field(default=None, alias="tenantId")
+    item_id: str = Field(..., alias="itemId", min_length=1, max_length=200)
+    candidate_id: str = Field(..., alias="candidateId")
+    description: str = ""
+    text: str = ""
+    blob_ref: str | None = Field(default=None, alias="blobRef")
+    file_name: str | None = Field(default=None, alias="fileName")
+    indicator_hints: list[str] = Field(default_factory=list, alias="indicatorHints")
@@ -21,3 +21,23 @@ class EvidenceResponse(BaseModel):
     indicator_matches: list[dict[str, Any]]
     fraud_flags: dict[str, Any]
     created_at: datetime = Field(..., alias="createdAt")
+
+
+class DirectUploadRequest(BaseModel):
+    candidate_id: str = Field(..., alias="candidateId")
+    competency_area_id: str = Field(..., alias="competencyAreaId")
+    title: str
+    description: str | None = None
+    filename: str
+    content_type: str = Field(..., alias="contentType")
+    size_bytes: int = Field(..., gt=0, alias="sizeBytes")
+    checksum: str = Field(..., pattern="^[0-9a-f]{64}$")
+
+
+class UploadedPart(BaseModel):
+    part_number: int = Field(..., alias="partNumber")
+    etag: str
+
+
+class DirectUploadCompleteRequest(BaseModel):
+    parts: list[UploadedPart]
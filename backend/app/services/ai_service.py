@@ -1,31 +1,112 @@
+import asyncio
 import json
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 import httpx
+
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 
 from app.core.config import get_settings
-from app.db.mongo import get_database
+from app.db.mongo import DatabaseBound
+from app.services.http_client import HTTPClientPool, http_client_pool
+from app.services.indicator_index import IndicatorIndex, IndicatorMatch, indicator_index
+from app.services.live_notes import SPILLED_NOTES_COLLECTION
+from app.services.llm_cache import LLMCache, llm_cache
+from app.services.report_dossier import AreaSlice, render_area, split_by_area
+from app.services.traject_catalog import TrajectCatalog, traject_catalog
+from app.utils.tokens import truncate_to_tokens
+
+LLM_MODEL = "gpt-4o-mini"
+# Verhoog bij elke promptwijziging zodat oude cache-entries niet meer matchen.
+ANALYZE_PROMPT_VERSION = "analyze-evidence-v2"
+COMBINED_PROMPT_VERSION = "analyze-combined-v2"
+REPORT_AREA_PROMPT_VERSION = "report-area-v1"
+
+REPORT_PLACEHOLDER = (
+    "Concept-rapport placeholder. Verzamel observaties en evidence handmatig "
+    "totdat de AI-service beschikbaar is."
+)
 
 
-class AIService:
+def _llm_unavailable() -> dict[str, Any]:
+    return {
+        "mappedIndicators": [],
+        "aiGeneratedLikelihood": 0.5,
+        "fraudFlags": [
+            {
+                "type": "llm_unavailable",
+                "message": "LLM-response niet beschikbaar; handmatige controle noodzakelijk.",
+                "score": 0.2,
+            }
+        ],
+    }
+
+
+class AIService(DatabaseBound):
     """Bundles LLM calls that helpen kandidaten en assessoren focussen op inhoud."""
 
-    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None) -> None:
-        self.db = db or get_database()
+    def __init__(
+        self,
+        db: Optional[AsyncIOMotorDatabase] = None,
+        http: Optional[HTTPClientPool] = None,
+        cache: Optional[LLMCache] = None,
+        indicators: Optional[IndicatorIndex] = None,
+        catalog: Optional[TrajectCatalog] = None,
+    ) -> None:
+        self.db = db
+        self.http = http or http_client_pool
+        self.cache = cache or llm_cache
+        self.indicators = indicators or indicator_index
+        self.catalog = catalog or traject_catalog
         self.settings = get_settings()
 
-    async def analyze_evidence(self, text: str, candidate_id: str) -> dict[str, Any]:
-        """Labels bewijsstuk met indicatoren zodat dekking/hiaten zichtbaar blijven."""
-        prompt = (
-            "Je bent een EVC-assistent voor SkillVal. "
-            "Ontleed de tekst, koppel relevante indicatorId's (gebruik bestaande ID's) "
-            "en geef een kans dat dit AI-gegenereerd is (0-1). "
-            "Lever JSON met 'mappedIndicators', 'aiGeneratedLikelihood', 'fraudFlags'."
+    async def traject_version_for(self, candidate_id: str) -> tuple[str | None, str]:
+        """Geeft (trajectId, versie) van de kandidaat; versie is de inhoudshash (etag) uit de catalogus.
+
+        `version`/`updatedAt` worden niet bij elke bewerking opgehoogd; met de hash verloopt
+        de indicatorindex en de LLM-cache ook dan.
+        """
+        try:
+            candidate_lookup: Any = ObjectId(candidate_id)
+        except Exception:
+            candidate_lookup = candidate_id
+        candidate_doc = await self.db["candidates"].find_one({"_id": candidate_lookup}, {"trajectId": 1})
+        traject_id = (candidate_doc or {}).get("trajectId")
+        if not traject_id:
+            return None, "-"
+
+        entry = await self.catalog.get(str(traject_id))
+        version = entry.etag.strip('"') if entry else "0"
+        return str(traject_id), f"{traject_id}@{version}"
+
+    async def _cached_json_completion(
+        self,
+        *,
+        namespace: str,
+        prompt_version: str,
+        prompt: str,
+        text: str,
+        candidate_id: str,
+        timeout: float,
+        fallback: dict[str, Any],
+        traject: tuple[str | None, str] | None = None,
+    ) -> dict[str, Any]:
+        """JSON-chatcompletion via de LLM-cache; de fallback wordt nooit gecachet."""
+        traject_id, traject_version = traject or await self.traject_version_for(candidate_id)
+        cache_key, cache_meta = self.cache.make_key(
+            namespace=namespace,
+            text=text,
+            prompt_version=prompt_version,
+            model=LLM_MODEL,
+            traject_version=traject_version,
         )
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         payload = {
-            "model": "gpt-4o-mini",
+            "model": LLM_MODEL,
             "messages": [
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": text},
@@ -34,93 +115,274 @@ class AIService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.settings.openai_api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json=payload,
-                )
-                response.raise_for_status()
-                data = response.json()
-                return json.loads(data["choices"][0]["message"]["content"])
+            response = await self.http.client.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.settings.openai_api_key}",
+                    "Content-Type": "application/json",
+                },
+                json=payload,
+                timeout=timeout,
+            )
+            response.raise_for_status()
+            data = response.json()
+            result = json.loads(data["choices"][0]["message"]["content"])
         except Exception:
             # Fallback ensures MVP blijft draaien wanneer LLM niet beschikbaar is.
-            return {
-                "mappedIndicators": [],
-                "aiGeneratedLikelihood": 0.5,
-                "fraudFlags": [
-                    {
-                        "type": "llm_unavailable",
-                        "message": "LLM-response niet beschikbaar; handmatige controle noodzakelijk.",
-                        "score": 0.2,
-                    }
-                ],
-            }
+            return fallback
 
-    async def generate_assessment_report(self, candidate_id: str) -> str:
-        """Combineert portfolio + observaties tot concept-rapport per deskundigheidsgebied."""
+        await self.cache.set(cache_key, cache_meta, result, traject_id=traject_id)
+        return result
+
+    async def _indicator_context(self, text: str, candidate_id: str) -> tuple[tuple[str | None, str], list[IndicatorMatch], str]:
+        """Shortlist uit de lokale indicatorindex plus de user-content die de LLM te zien krijgt."""
+        traject = await self.traject_version_for(candidate_id)
+        traject_id, traject_version = traject
+        shortlist = await self.indicators.shortlist(traject_id, traject_version, text) if traject_id else []
+        if not shortlist:
+            return traject, shortlist, text
+
+        catalog = "\n".join(f"- {match.indicator_id}: {match.label}" for match in shortlist)
+        return traject, shortlist, f"Kandidaat-indicatoren:\n{catalog}\n\nBewijs:\n{text}"
+
+    def _restrict_indicators(self, result: dict[str, Any], traject_id: str | None, shortlist: list[IndicatorMatch]) -> dict[str, Any]:
+        """Laat alleen indicatorId's door die in het traject bestaan (geen verzonnen ID's)."""
+        allowed = {match.indicator_id for match in shortlist} | (self.indicators.known_ids(traject_id) if traject_id else set())
+        mapped = result.get("mappedIndicators") or []
+        if isinstance(mapped, str):
+            mapped = [mapped]
+        if allowed:
+            mapped = [indicator for indicator in mapped if indicator in allowed]
+        return {**result, "mappedIndicators": mapped}
+
+    def _offline_fallback(self, shortlist: list[IndicatorMatch]) -> dict[str, Any]:
+        """Zonder LLM: de best scorende indicatoren uit de lokale index als voorlopige mapping."""
+        fallback = _llm_unavailable()
+        fallback["mappedIndicators"] = [
+            match.indicator_id for match in shortlist if match.score >= self.settings.indicator_offline_min_score
+        ][:3]
+        if fallback["mappedIndicators"]:
+            fallback["fraudFlags"][0]["message"] = (
+                "LLM-response niet beschikbaar; indicatoren lokaal voorgesteld, handmatige controle noodzakelijk."
+            )
+        return fallback
+
+    async def analyze_evidence(self, text: str, candidate_id: str) -> dict[str, Any]:
+        """Labels bewijsstuk met indicatoren zodat dekking/hiaten zichtbaar blijven."""
+        traject, shortlist, content = await self._indicator_context(text, candidate_id)
+        prompt = (
+            "Je bent een EVC-assistent voor SkillVal. "
+            "Ontleed de tekst en koppel relevante indicatorId's; kies alleen uit de kandidaat-indicatoren "
+            "en laat indicatoren weg waarvoor het bewijs tekortschiet. "
+            "Geef ook een kans dat dit AI-gegenereerd is (0-1). "
+            "Lever JSON met 'mappedIndicators', 'aiGeneratedLikelihood', 'fraudFlags'."
+        )
+        result = await self._cached_json_completion(
+            namespace="analyze_evidence",
+            prompt_version=ANALYZE_PROMPT_VERSION,
+            prompt=prompt,
+            text=content,
+            candidate_id=candidate_id,
+            timeout=30.0,
+            fallback=self._offline_fallback(shortlist),
+            traject=traject,
+        )
+        return self._restrict_indicators(result, traject[0], shortlist)
+
+    async def analyze_evidence_combined(self, text: str, candidate_id: str) -> dict[str, Any]:
+        """Eén LLM-call voor indicator-mapping én AI-herkomst, in plaats van twee aparte prompts."""
+        traject, shortlist, content = await self._indicator_context(text, candidate_id)
+        prompt = (
+            "Je bent een EVC-assistent voor SkillVal. "
+            "1) Ontleed de tekst en koppel relevante indicatorId's; kies alleen uit de kandidaat-indicatoren. "
+            "2) Beoordeel of de tekst vermoedelijk AI-gegenereerd is en geef een kans (0-1) met toelichting. "
+            "Lever JSON met 'mappedIndicators', 'aiGeneratedLikelihood' en 'fraudFlags' "
+            "(lijst van {type, message, score})."
+        )
+        result = await self._cached_json_completion(
+            namespace="analyze_combined",
+            prompt_version=COMBINED_PROMPT_VERSION,
+            prompt=prompt,
+            text=content,
+            candidate_id=candidate_id,
+            timeout=30.0,
+            fallback=self._offline_fallback(shortlist),
+            traject=traject,
+        )
+        return self._restrict_indicators(result, traject[0], shortlist)
+
+    async def _load_dossier(self, candidate_id: str) -> tuple[dict[str, Any] | None, dict[str, Any] | None, list, list]:
         candidate_lookup: Any = candidate_id
         try:
             candidate_lookup = ObjectId(candidate_id)
         except Exception:
             candidate_lookup = candidate_id
 
-        candidate_doc = await self.db["candidates"].find_one({"_id": candidate_lookup})
+        candidate_doc = await self.db["candidates"].find_one(
+            {"_id": candidate_lookup},
+            {"trajectId": 1, "statusPhase": 1, "indicatorCoverage": 1},
+        )
         traject_doc: dict[str, Any] | None = None
         if candidate_doc and candidate_doc.get("trajectId"):
-            traject_id = candidate_doc["trajectId"]
-            lookup_id = traject_id
-            try:
-                lookup_id = ObjectId(traject_id)
-            except Exception:
-                lookup_id = traject_id
-            traject_doc = await self.db["trajects"].find_one({"_id": lookup_id})
-            candidate_doc["traject"] = traject_doc
-
-        evidence_cursor = self.db["evidenceItems"].find({"candidateId": candidate_id})
+            entry = await self.catalog.get(str(candidate_doc["trajectId"]))
+            traject_doc = entry.doc if entry else None
+
+        evidence_cursor = self.db["evidenceItems"].find(
+            {"candidateId": candidate_id},
+            {
+                "type": 1,
+                "description": 1,
+                "extractedText": 1,
+                "transcript": 1,
+                "mappedIndicators": 1,
+                "aiGeneratedLikelihood": 1,
+                "timestamp": 1,
+            },
+        )
         evidence = [doc async for doc in evidence_cursor]
 
-        assessment_cursor = self.db["assessments"].find({"candidateId": candidate_id})
+        assessment_cursor = self.db["assessments"].find({"candidateId": candidate_id}, {"notes": 1})
         assessments = [doc async for doc in assessment_cursor]
+        # Notities van lange live-sessies die niet meer in het assessment-document pasten.
+        spilled_cursor = self.db[SPILLED_NOTES_COLLECTION].find({"candidateId": candidate_id}, {"note": 1})
+        spilled = [doc["note"] async for doc in spilled_cursor]
+        if spilled:
+            assessments.append({"notes": spilled})
+        return candidate_doc, traject_doc, evidence, assessments
 
-        summary = {
-            "candidate": candidate_doc,
-            "traject": traject_doc,
-            "evidence": evidence,
-            "assessments": assessments,
-        }
+    async def _summarize_area(self, area: AreaSlice, text: str, candidate_id: str) -> dict[str, Any]:
+        base = {"areaId": area.area_id, "name": area.name}
+        if area.empty:
+            # Geen LLM-call nodig voor een leeg gebied.
+            return {**base, "samenvatting": "Nog geen bewijs of observaties.", "indicatoren": [], "advies": ""}
+
+        prompt = (
+            "Je bent assessor-assistent. Vat het bewijs en de observaties voor dit deskundigheidsgebied samen. "
+            "Beoordeel per indicator of er voldoende onderbouwing is en noem ontbrekend bewijs. "
+            "Lever JSON met 'samenvatting', 'indicatoren' (lijst van {id, oordeel, onderbouwing}) en 'advies'."
+        )
+        summary = await self._cached_json_completion(
+            namespace="report_area",
+            prompt_version=REPORT_AREA_PROMPT_VERSION,
+            prompt=prompt,
+            text=text,
+            candidate_id=candidate_id,
+            timeout=45.0,
+            fallback={"unavailable": True},
+        )
+        return {**base, **summary}
+
+    async def summarize_areas(self, candidate_id: str) -> list[dict[str, Any]]:
+        """Map-stap: per deskundigheidsgebied parallel een samenvatting binnen het tokenbudget."""
+        candidate_doc, traject_doc, evidence, assessments = await self._load_dossier(candidate_id)
+        coverage = (candidate_doc or {}).get("indicatorCoverage") or {}
+        areas = split_by_area(traject_doc, evidence, assessments)
+
+        semaphore = asyncio.Semaphore(self.settings.report_area_concurrency)
+
+        async def summarize(area: AreaSlice) -> dict[str, Any]:
+            text = render_area(
+                area,
+                coverage=coverage,
+                budget_tokens=self.settings.report_area_token_budget,
+                item_token_limit=self.settings.report_item_token_limit,
+            )
+            async with semaphore:
+                return await self._summarize_area(area, text, candidate_id)
+
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(summarize(area)) for area in areas]
+        return [task.result() for task in tasks]
+
+    def _reduce_input(self, summaries: list[dict[str, Any]]) -> str:
+        """Reduce-invoer; elk gebied krijgt een gelijk deel van het budget."""
+        per_area = self.settings.report_reduce_token_budget // max(len(summaries), 1)
+        return "\n\n".join(
+            truncate_to_tokens(json.dumps(summary, ensure_ascii=False, default=str), per_area) for summary in summaries
+        )
+
+    async def report_reduce_payload(self, candidate_id: str) -> dict[str, Any] | None:
+        """Chat-payload voor de reduce-stap; None wanneer geen enkel gebied samengevat kon worden."""
+        summaries = await self.summarize_areas(candidate_id)
+        if not summaries or all(summary.get("unavailable") for summary in summaries):
+            return None
 
         prompt = (
-            "Je bent assessor-assistent. Genereer een conceptverslag per deskundigheidsgebied, "
-            "vul indicatoren met samenvatting en advies. Return enkel tekst."
+            "Je bent assessor-assistent. Je krijgt per deskundigheidsgebied een samenvatting als JSON. "
+            "Genereer een conceptverslag per deskundigheidsgebied, vul indicatoren met samenvatting en advies "
+            "en sluit af met een totaaladvies. Gebieden met 'unavailable' markeer je als handmatig te beoordelen. "
+            "Return enkel tekst."
         )
+        return {
+            "model": LLM_MODEL,
+            "messages": [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": self._reduce_input(summaries)},
+            ],
+        }
+
+    async def stream_assessment_report(self, candidate_id: str, partial_text: str = "") -> AsyncIterator[str]:
+        """Streamt de reduce-stap token voor token; met `partial_text` gaat het model verder waar het was.
+
+        Fouten worden doorgegeven zodat de aanroeper een half concept kan bewaren en later hervatten.
+        """
+        payload = await self.report_reduce_payload(candidate_id)
+        if payload is None:
+            if not partial_text:
+                yield REPORT_PLACEHOLDER
+            return
+
+        if partial_text:
+            payload["messages"].extend(
+                [
+                    {"role": "assistant", "content": partial_text},
+                    {"role": "user", "content": "Ga precies verder waar je tekst ophield, zonder iets te herhalen."},
+                ]
+            )
+        payload["stream"] = True
+
+        async with self.http.client.stream(
+            "POST",
+            "https://api.openai.com/v1/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.settings.openai_api_key}",
+                "Content-Type": "application/json",
+            },
+            json=payload,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+
+    async def generate_assessment_report(self, candidate_id: str) -> str:
+        """Combineert portfolio + observaties tot concept-rapport per deskundigheidsgebied (map-reduce)."""
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.settings.openai_api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "gpt-4o-mini",
-                        "messages": [
-                            {"role": "system", "content": prompt},
-                            {"role": "user", "content": json.dumps(summary, default=str)},
-                        ],
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
-                return data["choices"][0]["message"]["content"]
-        except Exception:
-            return (
-                "Concept-rapport placeholder. Verzamel observaties en evidence handmatig "
-                "totdat de AI-service beschikbaar is."
+            payload = await self.report_reduce_payload(candidate_id)
+            if payload is None:
+                return REPORT_PLACEHOLDER
+            response = await self.http.client.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.settings.openai_api_key}",
+                    "Content-Type": "application/json",
+                },
+                json=payload,
+                timeout=60.0,
             )
+            response.raise_for_status()
+            data = response.json()
+            return data["choices"][0]["message"]["content"]
+        except Exception:
+            return REPORT_PLACEHOLDER
 
 
 ai_service = AIService()
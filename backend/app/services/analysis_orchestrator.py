@@ -0,0 +1,159 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Optional
+
+from app.core.config import get_settings
+from app.services.ai_service import AIService, ai_service
+from app.services.fraud_service import FraudService, fraud_service
+from app.services.rate_limiter import TenantRateLimiter, tenant_rate_limiter
+from app.services.stt_service import STTService, TranscriptionIncomplete, stt_service
+from app.utils.tokens import count_tokens
+
+# Vaste systeemprompt + JSON-antwoord per LLM-call bovenop de bewijstekst.
+PROMPT_OVERHEAD_TOKENS = 700
+
+
+@dataclass
+class StepResult:
+    name: str
+    ok: bool
+    value: Any = None
+    error: str | None = None
+    duration_ms: int = 0
+
+    def summary(self) -> dict[str, Any]:
+        return {"step": self.name, "ok": self.ok, "error": self.error, "durationMs": self.duration_ms}
+
+
+@dataclass
+class AnalysisOutcome:
+    """Samengevoegd resultaat; `steps` laat zien welke takken faalden of time-outten."""
+
+    content_text: str
+    transcript: str | None = None
+    mapped_indicators: list[str] = field(default_factory=list)
+    ai_generated_likelihood: float = 0.0
+    fraud_flags: list[dict[str, Any]] = field(default_factory=list)
+    steps: list[StepResult] = field(default_factory=list)
+
+    @property
+    def partial(self) -> bool:
+        return any(not step.ok for step in self.steps)
+
+
+def _transcript_from(stt_result: dict[str, Any]) -> str | None:
+    return stt_result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0].get("transcript")
+
+
+class AnalysisOrchestrator:
+    """Zet onafhankelijke analysestappen parallel uit met per-stap timeouts.
+
+    STT is een voorwaarde voor audio; indicator-mapping en fraudescore lopen daarna
+    gelijktijdig, zodat de latency die van de traagste tak is in plaats van de som.
+    """
+
+    def __init__(
+        self,
+        ai: Optional[AIService] = None,
+        fraud: Optional[FraudService] = None,
+        stt: Optional[STTService] = None,
+        limiter: Optional[TenantRateLimiter] = None,
+    ) -> None:
+        self.ai = ai or ai_service
+        self.fraud = fraud or fraud_service
+        self.stt = stt or stt_service
+        self.limiter = limiter or tenant_rate_limiter
+        self.settings = get_settings()
+
+    async def _run_step(self, name: str, factory: Callable[[], Awaitable[Any]]) -> StepResult:
+        timeout = self.settings.analysis_step_timeouts.get(name)
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(timeout):
+                value = await factory()
+        except TimeoutError:
+            return StepResult(name, False, error=f"timeout na {timeout}s", duration_ms=_elapsed_ms(started))
+        except TranscriptionIncomplete:
+            # Geen gedeeltelijk transcript doorzetten: de job faalt en de queue probeert opnieuw.
+            raise
+        except Exception as exc:
+            return StepResult(name, False, error=f"{type(exc).__name__}: {exc}", duration_ms=_elapsed_ms(started))
+        return StepResult(name, True, value=value, duration_ms=_elapsed_ms(started))
+
+    async def analyze(
+        self,
+        *,
+        candidate_id: str,
+        text: str,
+        audio: AsyncIterable[bytes] | None = None,
+        audio_mimetype: str = "audio/mpeg",
+        indicator_hints: list[str] | None = None,
+        tenant_id: str | None = None,
+    ) -> AnalysisOutcome:
+        outcome = AnalysisOutcome(content_text=text)
+
+        if audio is not None:
+            stt_step = await self._run_step("stt", lambda: self.stt.transcribe_audio(audio, audio_mimetype))
+            outcome.steps.append(stt_step)
+            if stt_step.ok:
+                outcome.transcript = _transcript_from(stt_step.value)
+                outcome.content_text = outcome.transcript or text
+
+        content_text = outcome.content_text
+        if tenant_id is not None:
+            # Budget vooraf reserveren; de wachttijd telt niet mee in de staptimeouts.
+            llm_calls = 1 if self.settings.analysis_combined_llm_call else 2
+            await self.limiter.acquire(
+                tenant_id,
+                requests=llm_calls,
+                tokens=llm_calls * (count_tokens(content_text) + PROMPT_OVERHEAD_TOKENS),
+            )
+
+        if self.settings.analysis_combined_llm_call:
+            combined = await self._run_step("combined", lambda: self.ai.analyze_evidence_combined(content_text, candidate_id))
+            outcome.steps.append(combined)
+            analysis = combined.value if combined.ok else {}
+            fraud_analysis = analysis
+        else:
+            async with asyncio.TaskGroup() as group:
+                indicators_task = group.create_task(
+                    self._run_step("indicators", lambda: self.ai.analyze_evidence(content_text, candidate_id))
+                )
+                fraud_task = group.create_task(
+                    self._run_step("fraud", lambda: self.fraud.score_text_for_ai_origin(content_text))
+                )
+            outcome.steps.extend([indicators_task.result(), fraud_task.result()])
+            analysis = indicators_task.result().value if indicators_task.result().ok else {}
+            fraud_analysis = fraud_task.result().value if fraud_task.result().ok else {}
+
+        outcome.ai_generated_likelihood = float(
+            fraud_analysis.get("aiGeneratedLikelihood", analysis.get("aiGeneratedLikelihood", 0.0)) or 0.0
+        )
+        fraud_flags = [*(analysis.get("fraudFlags", []) or [])]
+        if fraud_analysis is not analysis:
+            fraud_flags.extend(fraud_analysis.get("fraudFlags", []) or [])
+        for step in outcome.steps:
+            if not step.ok:
+                fraud_flags.append(
+                    {
+                        "type": f"{step.name}_unavailable",
+                        "message": "Analysestap niet afgerond; handmatige controle noodzakelijk.",
+                        "score": 0.2,
+                        "details": step.error,
+                    }
+                )
+        outcome.fraud_flags = fraud_flags
+
+        mapped_indicators = analysis.get("mappedIndicators", []) or indicator_hints or []
+        if isinstance(mapped_indicators, str):
+            mapped_indicators = [mapped_indicators]
+        outcome.mapped_indicators = mapped_indicators
+        return outcome
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
+
+
+analysis_orchestrator = AnalysisOrchestrator()
@@ -0,0 +1,125 @@
+import asyncio
+import io
+import shutil
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterable
+
+import aiofiles
+
+
+@dataclass
+class AudioSegment:
+    index: int
+    start_frame: int
+    frame_count: int
+    frame_rate: int
+
+    @property
+    def offset_seconds(self) -> float:
+        return self.start_frame / self.frame_rate
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.frame_count / self.frame_rate
+
+
+async def spool_audio(audio: bytes | AsyncIterable[bytes], directory: Path) -> Path:
+    """Schrijft de audio naar een tijdelijk bestand zodat we kunnen decoderen en seeken."""
+    path = directory / "input"
+    async with aiofiles.open(path, "wb") as handle:
+        if isinstance(audio, (bytes, bytearray)):
+            await handle.write(audio)
+        else:
+            async for chunk in audio:
+                await handle.write(chunk)
+    return path
+
+
+async def to_wav(source: Path, *, ffmpeg: str, sample_rate: int) -> Path | None:
+    """Geeft een PCM-WAV terug: de bron zelf als dat al kan, anders via ffmpeg (mono, `sample_rate`)."""
+    try:
+        with wave.open(str(source), "rb") as handle:
+            if handle.getsampwidth() in (1, 2, 4):
+                return source
+    except (wave.Error, EOFError):
+        pass
+
+    if shutil.which(ffmpeg) is None:
+        return None
+    target = source.with_name("decoded.wav")
+    process = await asyncio.create_subprocess_exec(
+        ffmpeg, "-nostdin", "-loglevel", "error", "-y", "-i", str(source),
+        "-ac", "1", "-ar", str(sample_rate), "-acodec", "pcm_s16le", str(target),
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    await process.wait()
+    if process.returncode != 0:
+        return None
+    return target
+
+
+def plan_segments(path: Path, *, segment_seconds: float, overlap_seconds: float) -> list[AudioSegment]:
+    """Overlappende segmentgrenzen; de bytes worden pas per segment gelezen (`read_segment`)."""
+    with wave.open(str(path), "rb") as source:
+        rate = source.getframerate()
+        total = source.getnframes()
+    step = max(int((segment_seconds - overlap_seconds) * rate), 1)
+    length = int(segment_seconds * rate)
+
+    segments: list[AudioSegment] = []
+    start = 0
+    while start < total:
+        segments.append(AudioSegment(len(segments), start, min(length, total - start), rate))
+        if start + length >= total:
+            break
+        start += step
+    return segments
+
+
+def read_segment(path: Path, segment: AudioSegment) -> bytes:
+    """Eén segment als zelfstandige WAV (blocking; draai in de threadpool)."""
+    with wave.open(str(path), "rb") as source:
+        source.setpos(segment.start_frame)
+        frames = source.readframes(segment.frame_count)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as target:
+            target.setnchannels(source.getnchannels())
+            target.setsampwidth(source.getsampwidth())
+            target.setframerate(source.getframerate())
+            target.writeframes(frames)
+    return buffer.getvalue()
+
+
+def stitch_segments(segments: list[AudioSegment], results: list[dict[str, Any]]) -> dict[str, Any]:
+    """Voegt segmenttranscripten samen in Deepgram-vorm; elk segment moet een resultaat hebben.
+
+    Woordtijden worden verschoven met de segmentoffset; in elke overlap knippen we op het midden,
+    zodat woorden uit de overlap precies één keer meetellen.
+    """
+    words: list[dict[str, Any]] = []
+    for position, (segment, result) in enumerate(zip(segments, results)):
+        lower = 0.0
+        if position > 0:
+            previous = segments[position - 1]
+            lower = (segment.offset_seconds + previous.offset_seconds + previous.duration_seconds) / 2
+        upper = float("inf")
+        if position + 1 < len(segments):
+            following = segments[position + 1]
+            upper = (following.offset_seconds + segment.offset_seconds + segment.duration_seconds) / 2
+
+        for word in result.get("words", []):
+            start = float(word.get("start", 0.0)) + segment.offset_seconds
+            if lower <= start < upper:
+                words.append({**word, "start": round(start, 3), "end": round(float(word.get("end", 0.0)) + segment.offset_seconds, 3)})
+
+    transcript = " ".join(word.get("punctuated_word") or word.get("word", "") for word in words).strip()
+    return {
+        "results": {"channels": [{"alternatives": [{"transcript": transcript, "words": words}]}]},
+        "metadata": {
+            "segments": len(segments),
+            "duration": round(segments[-1].offset_seconds + segments[-1].duration_seconds, 3) if segments else 0.0,
+        },
+    }
@@ -0,0 +1,198 @@
+import gzip
+import logging
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+from bson import json_util
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import CollectionInvalid
+
+from app.core.config import get_settings
+from app.db.indexes import apply_indexes, audit_partition_indexes
+from app.db.mongo import DatabaseBound
+from app.db.partitions import (
+    AUDIT_PARTITION_PREFIX,
+    add_months,
+    audit_partition,
+    audit_partition_month,
+    audit_partitions_between,
+    month_start,
+)
+from app.services.storage_backends import StorageBackend, get_storage_backend
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_sort
+
+logger = logging.getLogger(__name__)
+
+LEGACY_AUDIT_COLLECTION = "auditLogs"
+AUDIT_STREAM_BATCH = 500
+
+
+class AuditPartitions(DatabaseBound):
+    """Auditlog in maandcollecties: aanmaken met compressie + indexes, lezen per tenant, archiveren."""
+
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None, backend: Optional[StorageBackend] = None) -> None:
+        self.db = db
+        self.settings = get_settings()
+        self._backend = backend
+        self._ensured: set[str] = set()
+
+    @property
+    def backend(self) -> StorageBackend:
+        return self._backend or get_storage_backend()
+
+    async def ensure(self, name: str) -> None:
+        """Maakt de partitie eenmalig per proces aan; bestaat hij al, dan alleen de indexes (idempotent)."""
+        if name in self._ensured:
+            return
+        options: dict[str, Any] = {}
+        if self.settings.audit_block_compressor:
+            options["storageEngine"] = {"wiredTiger": {"configString": f"block_compressor={self.settings.audit_block_compressor}"}}
+        try:
+            await self.db.create_collection(name, **options)
+        except CollectionInvalid:
+            pass
+        await apply_indexes(self.db, audit_partition_indexes(name))
+        self._ensured.add(name)
+
+    async def ensure_upcoming(self, now: Optional[datetime] = None) -> None:
+        """Lopende en volgende maand klaarzetten, zodat de eerste write van de maand niet hoeft te wachten."""
+        now = now or datetime.utcnow()
+        for month in (now, add_months(now, 1)):
+            await self.ensure(audit_partition(month))
+
+    async def existing(self) -> list[str]:
+        """Bestaande partities, oudste eerst."""
+        names = await self.db.list_collection_names(filter={"name": {"$regex": f"^{AUDIT_PARTITION_PREFIX}"}})
+        return sorted(name for name in names if audit_partition_month(name) is not None)
+
+    async def _partitions(self, since: Optional[datetime], until: Optional[datetime]) -> list[str]:
+        return [
+            name
+            for name in await self.existing()
+            if (since is None or audit_partition_month(name) >= month_start(since))
+            and (until is None or audit_partition_month(name) < until)
+        ]
+
+    @staticmethod
+    def _query(
+        tenant_id: str, filters: dict[str, Any], since: Optional[datetime], until: Optional[datetime]
+    ) -> dict[str, Any]:
+        query: dict[str, Any] = {"tenantId": tenant_id, **{key: value for key, value in filters.items() if value is not None}}
+        created: dict[str, Any] = {}
+        if since is not None:
+            created["$gte"] = since
+        if until is not None:
+            created["$lt"] = until
+        if created:
+            query["createdAt"] = created
+        return query
+
+    async def page(
+        self,
+        tenant_id: str,
+        filters: dict[str, Any],
+        *,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int,
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """Nieuwste eerst over de partities heen; een cursor slaat partities na zijn maand over.
+
+        Gooit `InvalidCursor` bij een onleesbare cursor.
+        """
+        query = {**self._query(tenant_id, filters, since, until), **keyset_filter("createdAt", cursor)}
+        newest = month_start(decode_cursor(cursor)[0]) if cursor else None
+
+        docs: list[dict[str, Any]] = []
+        for name in reversed(await self._partitions(since, until)):
+            if newest is not None and audit_partition_month(name) > newest:
+                continue
+            remaining = limit + 1 - len(docs)
+            docs.extend(await self.db[name].find(query).sort(keyset_sort("createdAt")).limit(remaining).to_list(remaining))
+            if len(docs) > limit:
+                break
+
+        if len(docs) <= limit:
+            return docs, None
+        last = docs[limit - 1]
+        return docs[:limit], encode_cursor(last["createdAt"], last["_id"])
+
+    async def stream(
+        self,
+        tenant_id: str,
+        filters: dict[str, Any],
+        *,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Alle entries in chronologische volgorde, partitie na partitie, zonder alles in geheugen te laden."""
+        query = self._query(tenant_id, filters, since, until)
+        for name in await self._partitions(since, until):
+            cursor = self.db[name].find(query).sort(keyset_sort("createdAt", descending=False)).batch_size(AUDIT_STREAM_BATCH)
+            try:
+                async for doc in cursor:
+                    yield doc
+            finally:
+                await cursor.close()
+
+    def expired(self, names: list[str], now: Optional[datetime] = None) -> list[str]:
+        """Partities die volledig buiten `AUDIT_RETENTION_MONTHS` vallen."""
+        cutoff = add_months(month_start(now or datetime.utcnow()), -self.settings.audit_retention_months)
+        return [name for name in names if audit_partition_month(name) < cutoff]
+
+    def archive_key(self, name: str) -> str:
+        return f"{self.settings.audit_archive_prefix.rstrip('/')}/{name}.ndjson.gz"
+
+    async def archive(self, name: str) -> int:
+        """Schrijft een partitie als gzip-NDJSON (extended JSON) naar de storage-backend en dropt hem daarna.
+
+        De collectie wordt pas gedropt als het archief er staat en het aantal regels klopt.
+        """
+        collection = self.db[name]
+        expected = await collection.count_documents({})
+        written = 0
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / f"{name}.ndjson.gz"
+            with gzip.open(path, "wt", encoding="utf-8") as out:
+                cursor = collection.find({}).sort("_id", 1).batch_size(AUDIT_STREAM_BATCH)
+                async for doc in cursor:
+                    out.write(json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS) + "\n")
+                    written += 1
+            if written != expected:
+                raise RuntimeError(f"{name}: {written} van {expected} entries geëxporteerd, partitie blijft staan")
+            key = self.archive_key(name)
+            await self.backend.put_file(key, path, "application/gzip")
+        if await self.backend.size(key) is None:
+            raise RuntimeError(f"{name}: archief {key} niet gevonden na upload, partitie blijft staan")
+        await collection.drop()
+        self._ensured.discard(name)
+        logger.info("auditpartitie %s gearchiveerd naar %s (%s entries)", name, key, written)
+        return written
+
+    async def migrate_legacy(self) -> dict[str, int]:
+        """Kopieert de oude `auditLogs` collectie per maand naar partities; bestaande _id's blijven staan."""
+        legacy = self.db[LEGACY_AUDIT_COLLECTION]
+        first = await legacy.find_one({"createdAt": {"$type": "date"}}, sort=[("createdAt", 1)])
+        last = await legacy.find_one({"createdAt": {"$type": "date"}}, sort=[("createdAt", -1)])
+        if first is None:
+            return {}
+
+        copied: dict[str, int] = {}
+        for name in audit_partitions_between(first["createdAt"], add_months(last["createdAt"], 1)):
+            start = audit_partition_month(name)
+            match = {"createdAt": {"$gte": start, "$lt": add_months(start, 1)}}
+            count = await legacy.count_documents(match)
+            if not count:
+                continue
+            await self.ensure(name)
+            await legacy.aggregate(
+                [{"$match": match}, {"$merge": {"into": name, "on": "_id", "whenMatched": "keepExisting", "whenNotMatched": "insert"}}]
+            ).to_list(None)
+            copied[name] = count
+        return copied
+
+
+audit_partitions = AuditPartitions()
@@ -1,16 +1,54 @@
+import asyncio
+import logging
+import time
+from collections import deque
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError, PyMongoError
 
-from app.db.mongo import get_database
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+from app.db.partitions import audit_partition
+from app.services.audit_partitions import AuditPartitions, audit_partitions
 
+logger = logging.getLogger(__name__)
 
-class AuditService:
-    """Writes immutable audit trail to explain elke stap richting certificering."""
+DUPLICATE_KEY = 11000
 
-    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None) -> None:
-        self.db = db or get_database()
+
+class AuditService(DatabaseBound):
+    """Writes immutable audit trail to explain elke stap richting certificering.
+
+    Entries gaan eerst in een begrensde buffer en worden in batches weggeschreven (write-behind),
+    zodat een gebruikersactie niet op Mongo wacht. Zonder gestarte flusher (scripts) schrijven we direct.
+    Elke entry landt in de maandpartitie van zijn `createdAt` (`auditLogs_YYYYMM`).
+    """
+
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None, partitions: Optional[AuditPartitions] = None) -> None:
+        self.db = db
+        self.partitions = partitions or audit_partitions
+        self.settings = get_settings()
+        self._buffer: deque[dict[str, Any]] = deque()
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._space: asyncio.Event | None = None
+        self._stopping: asyncio.Event | None = None
+        self._flush_lock: asyncio.Lock | None = None
+        self.counters = {
+            "enqueued": 0,
+            "written": 0,
+            "direct": 0,
+            "dropped": 0,
+            "blocked": 0,
+            "flushes": 0,
+            "flushFailures": 0,
+        }
+        self._flush_ms_last = 0.0
+        self._flush_ms_max = 0.0
+        self._flush_ms_total = 0.0
 
     async def log(
         self,
@@ -21,7 +59,7 @@ class AuditService:
         target_type: str,
         target_id: str,
     ) -> None:
-        await self.db["auditLogs"].insert_one(
+        await self.write(
             {
                 "tenantId": tenant_id,
                 "userId": user_id,
@@ -32,5 +70,159 @@ class AuditService:
             }
         )
 
+    async def write(self, entry: dict[str, Any]) -> None:
+        """Zet een entry in de buffer; bij een volle buffer beslist `AUDIT_OVERFLOW_POLICY`."""
+        # Vaste _id vooraf: een herhaalde batch na een netwerkfout levert dan duplicate keys op, geen dubbelingen.
+        entry.setdefault("_id", ObjectId())
+        entry.setdefault("createdAt", datetime.utcnow())
+        if self._task is None:
+            await self._insert_direct(entry)
+            return
+
+        if len(self._buffer) >= self.settings.audit_queue_max:
+            policy = self.settings.audit_overflow_policy
+            if policy == "drop":
+                self.counters["dropped"] += 1
+                logger.error("audit-buffer vol, entry verworpen: %s", entry)
+                return
+            if policy == "write_through":
+                await self._insert_direct(entry)
+                return
+            self.counters["blocked"] += 1
+            while len(self._buffer) >= self.settings.audit_queue_max and self._task is not None:
+                self._space.clear()
+                self._wakeup.set()
+                await self._space.wait()
+            if self._task is None:
+                await self._insert_direct(entry)
+                return
+
+        self._buffer.append(entry)
+        self.counters["enqueued"] += 1
+        if len(self._buffer) >= self.settings.audit_batch_size:
+            self._wakeup.set()
+
+    async def _insert_direct(self, entry: dict[str, Any]) -> None:
+        name = audit_partition(entry["createdAt"])
+        try:
+            await self.partitions.ensure(name)
+            await self.db[name].insert_one(entry)
+        except PyMongoError as exc:
+            if getattr(exc, "code", None) != DUPLICATE_KEY:
+                raise
+        self.counters["direct"] += 1
+
+    async def start(self) -> None:
+        if self._task is None:
+            await self.partitions.ensure_upcoming()
+            self._wakeup = asyncio.Event()
+            self._space = asyncio.Event()
+            self._stopping = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stopt de flusher en schrijft wat nog in de buffer staat (lifespan-shutdown).
+
+        Niet annuleren: een lopende `insert_many` maakt zijn batch af, daarna draint `flush()` de rest.
+        """
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        self._stopping.set()
+        self._wakeup.set()
+        self._space.set()
+        try:
+            await task
+        except Exception:
+            logger.exception("audit-flusher was al gestopt met een fout")
+        await self.flush()
+        if self._buffer:
+            logger.error("audit: %s entries niet weggeschreven bij afsluiten", len(self._buffer))
+
+    async def _run(self) -> None:
+        interval = self.settings.audit_flush_interval_ms / 1000
+        while not self._stopping.is_set():
+            if len(self._buffer) < self.settings.audit_batch_size:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+            if self._stopping.is_set():
+                return
+            if not await self.flush():
+                # Mongo onbereikbaar: entries blijven staan, volgende poging na het interval (of bij stop).
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def flush(self) -> bool:
+        """Schrijft de buffer weg in unordered `insert_many`-batches; False als een batch terug moest."""
+        async with self._flush_lock:
+            while self._buffer:
+                size = min(self.settings.audit_batch_size, len(self._buffer))
+                batch = [self._buffer.popleft() for _ in range(size)]
+                self._space.set()
+                if not await self._insert_batch(batch):
+                    return False
+            return True
+
+    async def _insert_batch(self, batch: list[dict[str, Any]]) -> bool:
+        started = time.perf_counter()
+        written = 0
+        # Een batch rond de maandwissel raakt twee partities; per partitie één insert_many.
+        groups: dict[str, list[dict[str, Any]]] = {}
+        for entry in batch:
+            groups.setdefault(audit_partition(entry["createdAt"]), []).append(entry)
+
+        pending = list(groups.items())
+        while pending:
+            name, entries = pending[0]
+            try:
+                await self.partitions.ensure(name)
+                await self.db[name].insert_many(entries, ordered=False)
+                written += len(entries)
+            except BulkWriteError as exc:
+                errors = [error for error in exc.details.get("writeErrors", []) if error.get("code") != DUPLICATE_KEY]
+                for error in errors:
+                    logger.error("audit-entry geweigerd (%s): %s", error.get("errmsg"), entries[error["index"]])
+                written += len(entries) - len(errors)
+                self.counters["flushFailures"] += bool(errors)
+            except BaseException as exc:
+                # Ook bij annulering: de batch is al uit de buffer gehaald, dus terugzetten.
+                # Een deels geschreven insert_many geeft bij de retry alleen duplicate keys.
+                remaining = [entry for _, group in pending for entry in group]
+                self._buffer.extendleft(reversed(remaining))
+                self.counters["written"] += written
+                self.counters["flushFailures"] += 1
+                if not isinstance(exc, PyMongoError):
+                    raise
+                logger.warning("audit-flush van %s entries mislukt: %s", len(remaining), exc)
+                return False
+            pending.pop(0)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.counters["written"] += written
+        self.counters["flushes"] += 1
+        self._flush_ms_last = elapsed_ms
+        self._flush_ms_max = max(self._flush_ms_max, elapsed_ms)
+        self._flush_ms_total += elapsed_ms
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        flushes = self.counters["flushes"]
+        return {
+            **self.counters,
+            "running": self._task is not None,
+            "queueDepth": len(self._buffer),
+            "queueMax": self.settings.audit_queue_max,
+            "overflowPolicy": self.settings.audit_overflow_policy,
+            "flushMsLast": round(self._flush_ms_last, 2),
+            "flushMsMax": round(self._flush_ms_max, 2),
+            "flushMsAvg": round(self._flush_ms_total / flushes, 2) if flushes else 0.0,
+        }
+
 
 audit_service = AuditService()
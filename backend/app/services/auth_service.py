@@ -4,17 +4,17 @@ from fastapi import HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from passlib.context import CryptContext
 
-from app.db.mongo import get_database
+from app.db.mongo import DatabaseBound
 from app.utils.jwt import create_access_token
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-class AuthService:
+class AuthService(DatabaseBound):
     """Authenticates users zodat trajectdata enkel door juiste rol toegankelijk is."""
 
     def __init__(self, db: Optional[AsyncIOMotorDatabase] = None) -> None:
-        self.db = db or get_database()
+        self.db = db
 
     async def authenticate(self, email: str, password: str) -> str:
         user = await self.db["users"].find_one({"email": email})
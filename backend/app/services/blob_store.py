@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+from app.services.storage_backends import LocalStorageBackend, StorageBackend, get_storage_backend
+from app.services.upload_service import StagedUpload, upload_service
+
+logger = logging.getLogger(__name__)
+
+BLOB_REF_PREFIX = "sha256:"
+
+# Een blob met `deleting` wordt door release() opgeruimd; na deze tijd geldt de markering als
+# achtergelaten (crash tijdens het verwijderen) en mag een nieuwe upload hem overnemen.
+BLOB_DELETE_STALE_SECONDS = 60
+BLOB_REGISTER_ATTEMPTS = 50
+
+# Oudere evidence verwijst nog naar een relatief pad op schijf i.p.v. een blob-ref.
+_legacy_files = LocalStorageBackend(".")
+
+
+def is_blob_ref(ref: str | None) -> bool:
+    return bool(ref) and ref.startswith(BLOB_REF_PREFIX)
+
+
+def checksum_from_ref(ref: str) -> str:
+    return ref[len(BLOB_REF_PREFIX):]
+
+
+class BlobStore(DatabaseBound):
+    """Content-addressed opslag: identieke bytes staan één keer per tenant, met refcount in Mongo."""
+
+    def __init__(
+        self,
+        db: Optional[AsyncIOMotorDatabase] = None,
+        backend: Optional[StorageBackend] = None,
+    ) -> None:
+        self.db = db
+        self.backend = backend or get_storage_backend()
+        self.settings = get_settings()
+
+    @staticmethod
+    def key_for(tenant_id: str, checksum: str) -> str:
+        return f"blobs/{tenant_id}/{checksum[:2]}/{checksum}"
+
+    def local_path(self, tenant_id: str, ref: str) -> Path | None:
+        """Pad op schijf voor FileResponse; None wanneer de bytes in object storage staan."""
+        if is_blob_ref(ref):
+            return self.backend.local_path(self.key_for(tenant_id, checksum_from_ref(ref)))
+        return Path(ref)
+
+    def open_stream(self, tenant_id: str, ref: str) -> AsyncIterator[bytes]:
+        chunk_size = self.settings.upload_chunk_bytes
+        if is_blob_ref(ref):
+            return self.backend.open_stream(self.key_for(tenant_id, checksum_from_ref(ref)), chunk_size)
+        return _legacy_files.open_stream(ref, chunk_size)
+
+    async def download_url(self, tenant_id: str, ref: str, filename: str) -> str | None:
+        if not is_blob_ref(ref):
+            return None
+        return await self.backend.presigned_download_url(self.key_for(tenant_id, checksum_from_ref(ref)), filename)
+
+    async def _register(self, *, tenant_id: str, checksum: str, size_bytes: int, content_type: str) -> str:
+        """Telt een referentie op; zolang die staat kan release() de bytes niet verwijderen.
+
+        Is de blob net gemarkeerd als `deleting`, dan botst de upsert op de _id en wachten we tot
+        release() klaar is, zodat we nooit naar een object verwijzen dat zo verdwijnt.
+        """
+        blob_id = f"{tenant_id}:{checksum}"
+        for attempt in range(BLOB_REGISTER_ATTEMPTS):
+            now = datetime.utcnow()
+            try:
+                await self.db["blobs"].update_one(
+                    {"_id": blob_id, "deleting": {"$exists": False}},
+                    {
+                        "$inc": {"refCount": 1},
+                        "$set": {"lastReferencedAt": now},
+                        "$setOnInsert": {
+                            "tenantId": tenant_id,
+                            "checksum": checksum,
+                            "sizeBytes": size_bytes,
+                            "contentType": content_type,
+                            "createdAt": now,
+                        },
+                    },
+                    upsert=True,
+                )
+                return self.key_for(tenant_id, checksum)
+            except DuplicateKeyError:
+                stale = now - timedelta(seconds=BLOB_DELETE_STALE_SECONDS)
+                await self.db["blobs"].delete_one({"_id": blob_id, "deleting": {"$lt": stale}})
+                await asyncio.sleep(min(0.05 * (attempt + 1), 1.0))
+        raise RuntimeError(f"blob {blob_id} wordt nog verwijderd; upload later opnieuw proberen")
+
+    async def put(self, staged: StagedUpload, *, tenant_id: str) -> str:
+        """Registreert eerst een referentie en bewaart de bytes alleen als ze nog niet bestaan."""
+        key = await self._register(
+            tenant_id=tenant_id,
+            checksum=staged.checksum,
+            size_bytes=staged.size_bytes,
+            content_type=staged.content_type,
+        )
+        if await self.backend.exists(key):
+            await upload_service.discard(staged)
+        else:
+            await self.backend.put_file(key, staged.path, staged.content_type)
+        return f"{BLOB_REF_PREFIX}{staged.checksum}"
+
+    async def adopt(
+        self,
+        staging_key: str,
+        *,
+        tenant_id: str,
+        checksum: str,
+        size_bytes: int,
+        content_type: str,
+    ) -> str:
+        """Neemt een object over dat de browser direct in de backend heeft gezet (server-side copy)."""
+        key = await self._register(
+            tenant_id=tenant_id,
+            checksum=checksum,
+            size_bytes=size_bytes,
+            content_type=content_type,
+        )
+        if not await self.backend.exists(key):
+            await self.backend.copy(staging_key, key)
+        await self.backend.delete(staging_key)
+        return f"{BLOB_REF_PREFIX}{checksum}"
+
+    async def describe(self, tenant_id: str, ref: str) -> dict | None:
+        """Metadata van een bestaande blob zonder de refcount te wijzigen; None als hij onbekend is."""
+        if not is_blob_ref(ref):
+            return None
+        return await self.db["blobs"].find_one(
+            {"_id": f"{tenant_id}:{checksum_from_ref(ref)}", "deleting": {"$exists": False}},
+            {"checksum": 1, "sizeBytes": 1, "contentType": 1},
+        )
+
+    async def retain(self, tenant_id: str, ref: str) -> dict | None:
+        """Extra referentie op een bestaande blob (bulk-import); None als de blob onbekend is."""
+        if not is_blob_ref(ref):
+            return None
+        return await self.db["blobs"].find_one_and_update(
+            {"_id": f"{tenant_id}:{checksum_from_ref(ref)}", "deleting": {"$exists": False}},
+            {"$inc": {"refCount": 1}, "$set": {"lastReferencedAt": datetime.utcnow()}},
+            projection={"checksum": 1, "sizeBytes": 1, "contentType": 1},
+        )
+
+    async def release(self, tenant_id: str, ref: str) -> bool:
+        """Verlaagt de refcount; verwijdert de bytes pas bij de laatste referentie.
+
+        Eerst markeren we de blob als `deleting` (alleen bij refCount <= 0), dan pas gaan de bytes weg.
+        Nieuwe uploads van dezelfde inhoud wachten in `_register` tot het document weg is.
+        """
+        if not is_blob_ref(ref):
+            return False
+
+        checksum = checksum_from_ref(ref)
+        blob_id = f"{tenant_id}:{checksum}"
+        blob = await self.db["blobs"].find_one_and_update(
+            {"_id": blob_id},
+            {"$inc": {"refCount": -1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if blob is None or blob["refCount"] > 0:
+            return False
+
+        marked = await self.db["blobs"].update_one(
+            {"_id": blob_id, "refCount": {"$lte": 0}, "deleting": {"$exists": False}},
+            {"$set": {"deleting": datetime.utcnow()}},
+        )
+        if marked.modified_count == 0:
+            return False
+
+        await self.backend.delete(self.key_for(tenant_id, checksum))
+        await self.db["blobs"].delete_one({"_id": blob_id, "deleting": {"$exists": True}})
+        return True
+
+    async def sweep_orphans(self, now: Optional[datetime] = None) -> int:
+        """Rondt release() af voor blobs die bleven hangen (crash tussen refcount, markering en delete).
+
+        Een achtergelaten markering wordt eerst ververst, zodat `_register` hem niet tegelijk overneemt.
+        """
+        now = now or datetime.utcnow()
+        stale = now - timedelta(seconds=BLOB_DELETE_STALE_SECONDS)
+        swept = 0
+        async for blob in self.db["blobs"].find({"refCount": {"$lte": 0}}, {"tenantId": 1, "checksum": 1, "deleting": 1}):
+            if "deleting" in blob:
+                claim = {"_id": blob["_id"], "deleting": {"$lt": stale}}
+            else:
+                claim = {"_id": blob["_id"], "refCount": {"$lte": 0}, "deleting": {"$exists": False}}
+            marked = await self.db["blobs"].update_one(claim, {"$set": {"deleting": now}})
+            if marked.modified_count == 0:
+                # Opnieuw gerefereerd, of release() is er nog mee bezig.
+                continue
+            await self.backend.delete(self.key_for(blob["tenantId"], blob["checksum"]))
+            await self.db["blobs"].delete_one({"_id": blob["_id"], "deleting": {"$exists": True}})
+            swept += 1
+        if swept:
+            logger.info("%s verweesde blobs opgeruimd", swept)
+        return swept
+
+
+blob_store = BlobStore()
@@ -0,0 +1,310 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+from app.schemas.ai import BulkIngestItem
+from app.services.audit_service import audit_service
+from app.services.blob_store import blob_store
+from app.services.evidence_processor import PROCESS_EVIDENCE_JOB
+from app.services.job_queue import JOB_DEAD, JobQueue, job_queue
+
+# Checkpoint-statussen in `ingestItems`; `done`/`failed` zet de worker na afloop van de job.
+INGEST_PENDING = "pending"
+INGEST_QUEUED = "queued"
+INGEST_DONE = "done"
+INGEST_FAILED = "failed"
+
+
+def _evidence_type(content_type: str | None) -> str:
+    content_type = content_type or ""
+    for prefix in ("audio", "image", "video"):
+        if content_type.startswith(prefix):
+            return prefix
+    if "pdf" in content_type:
+        return "document"
+    return "text"
+
+
+class BulkIngestService(DatabaseBound):
+    """Importeert een NDJSON-manifest met bewijs; de verwerking loopt via de job queue.
+
+    Elk item krijgt een checkpoint in `ingestItems` (`<tenant>:<manifest>:<itemId>`) met een
+    vooraf gereserveerd evidenceId en jobId. De worker zet het checkpoint op done/failed, dus een
+    verbroken verbinding laat niets half achter. Opnieuw insturen van hetzelfde manifest slaat
+    afgeronde items over en wacht op items die nog in de queue staan. LLM-budget wordt per tenant
+    bewaakt door de rate limiter in de orchestrator.
+    """
+
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None, queue: Optional[JobQueue] = None) -> None:
+        self.db = db
+        self.queue = queue or job_queue
+        self.settings = get_settings()
+
+    @staticmethod
+    def checkpoint_id(tenant_id: str, manifest_id: str, item_id: str) -> str:
+        return f"{tenant_id}:{manifest_id}:{item_id}"
+
+    async def completed_item_ids(self, tenant_id: str, manifest_id: str) -> set[str]:
+        cursor = self.db["ingestItems"].find(
+            {"tenantId": tenant_id, "manifestId": manifest_id, "status": INGEST_DONE},
+            {"itemId": 1},
+        )
+        return {doc["itemId"] async for doc in cursor}
+
+    async def progress(self, tenant_id: str, manifest_id: str) -> dict[str, Any]:
+        counts = {INGEST_PENDING: 0, INGEST_QUEUED: 0, INGEST_DONE: 0, INGEST_FAILED: 0}
+        pipeline = [
+            {"$match": {"tenantId": tenant_id, "manifestId": manifest_id}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]
+        async for row in self.db["ingestItems"].aggregate(pipeline):
+            counts[row["_id"]] = row["count"]
+        return {"manifestId": manifest_id, "total": sum(counts.values()), **counts}
+
+    async def run(
+        self,
+        lines: AsyncIterable[bytes],
+        *,
+        tenant_id: str,
+        user_id: str,
+        manifest_id: str,
+        concurrency: int,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Levert per item een resultaat zodra zijn job klaar is (volgorde = voltooiing).
+
+        Hooguit `concurrency` items van dit manifest staan tegelijk in de queue; daarna leest de
+        stream pas verder als er één klaar is.
+        """
+        done_ids = await self.completed_item_ids(tenant_id, manifest_id)
+        seen: set[str] = set()
+        in_flight: dict[str, dict[str, Any]] = {}
+        line_number = 0
+
+        async for raw in _ndjson_lines(lines, self.settings.bulk_ingest_max_line_bytes):
+            line_number += 1
+            if raw is None:
+                yield {"line": line_number, "status": "invalid", "error": "Regel is langer dan bulk_ingest_max_line_bytes"}
+                continue
+            try:
+                item = BulkIngestItem.model_validate(json.loads(raw))
+            except (json.JSONDecodeError, ValidationError) as exc:
+                yield {"line": line_number, "status": "invalid", "error": str(exc)[:500]}
+                continue
+
+            if item.item_id in done_ids or item.item_id in seen:
+                yield {"line": line_number, "itemId": item.item_id, "status": "skipped"}
+                continue
+            seen.add(item.item_id)
+
+            result = await self._enqueue_item(item, line_number, tenant_id=tenant_id, user_id=user_id, manifest_id=manifest_id)
+            if result["status"] != INGEST_QUEUED:
+                yield result
+                continue
+            in_flight[result.pop("checkpointId")] = result
+            while len(in_flight) >= concurrency:
+                for finished in await self._wait_finished(in_flight):
+                    yield finished
+
+        while in_flight:
+            for finished in await self._wait_finished(in_flight):
+                yield finished
+
+    async def _enqueue_item(
+        self,
+        item: BulkIngestItem,
+        line_number: int,
+        *,
+        tenant_id: str,
+        user_id: str,
+        manifest_id: str,
+    ) -> dict[str, Any]:
+        """Checkpoint + evidence + job, alle drie idempotent zodat hervatten niets dubbel aanmaakt."""
+        result: dict[str, Any] = {"line": line_number, "itemId": item.item_id}
+        if item.tenant_id not in (None, tenant_id):
+            return {**result, "status": INGEST_FAILED, "error": "Cross-tenant access denied"}
+
+        checkpoint_id = self.checkpoint_id(tenant_id, manifest_id, item.item_id)
+        checkpoint = await self.db["ingestItems"].find_one_and_update(
+            {"_id": checkpoint_id},
+            {
+                "$setOnInsert": {
+                    "tenantId": tenant_id,
+                    "manifestId": manifest_id,
+                    "itemId": item.item_id,
+                    "evidenceId": ObjectId(),
+                    "jobId": ObjectId(),
+                    "status": INGEST_PENDING,
+                    "createdAt": datetime.utcnow(),
+                },
+                "$inc": {"attempts": 1},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        evidence_oid = checkpoint["evidenceId"]
+        result["evidenceId"] = str(evidence_oid)
+
+        try:
+            await self._create_evidence(item, evidence_oid, tenant_id=tenant_id, user_id=user_id)
+        except (LookupError, PermissionError) as exc:
+            return await self._finish(checkpoint_id, {**result, "status": INGEST_FAILED, "error": str(exc)})
+
+        payload = {"evidenceId": str(evidence_oid), "ingestItemId": checkpoint_id}
+        try:
+            await self.queue.enqueue(PROCESS_EVIDENCE_JOB, payload, tenant_id=tenant_id, job_id=checkpoint["jobId"])
+        except DuplicateKeyError:
+            # Hervatting: de job bestaat al. Een dead-letter job krijgt een nieuwe kans.
+            job = await self.db["jobs"].find_one({"_id": checkpoint["jobId"]}, {"status": 1})
+            if job and job["status"] == JOB_DEAD:
+                await self.queue.requeue_dead(str(checkpoint["jobId"]))
+
+        await self.db["ingestItems"].update_one(
+            {"_id": checkpoint_id, "status": {"$ne": INGEST_DONE}},
+            {"$set": {"status": INGEST_QUEUED, "error": None}},
+        )
+        return {**result, "status": INGEST_QUEUED, "checkpointId": checkpoint_id}
+
+    async def _wait_finished(self, in_flight: dict[str, dict[str, Any]]) -> list[dict[str, Any]]:
+        """Pollt de checkpoints tot er minstens één item klaar is; haalt die uit `in_flight`."""
+        while True:
+            cursor = self.db["ingestItems"].find(
+                {"_id": {"$in": list(in_flight)}, "status": {"$in": [INGEST_DONE, INGEST_FAILED]}},
+                {"status": 1, "error": 1, "evidenceStatus": 1},
+            )
+            checkpoints = [doc async for doc in cursor]
+            if checkpoints:
+                return [await self._outcome(in_flight.pop(doc["_id"]), doc) for doc in checkpoints]
+            await asyncio.sleep(self.settings.bulk_ingest_poll_seconds)
+
+    async def _outcome(self, result: dict[str, Any], checkpoint: dict[str, Any]) -> dict[str, Any]:
+        if checkpoint["status"] == INGEST_FAILED:
+            return {**result, "status": INGEST_FAILED, "error": checkpoint.get("error")}
+        evidence = await self.db["evidenceItems"].find_one(
+            {"_id": ObjectId(result["evidenceId"])},
+            {"mappedIndicators": 1, "aiGeneratedLikelihood": 1, "fraudFlags": 1},
+        ) or {}
+        return {
+            **result,
+            "status": INGEST_DONE,
+            "evidenceStatus": checkpoint.get("evidenceStatus"),
+            "mappedIndicators": evidence.get("mappedIndicators", []),
+            "aiGeneratedLikelihood": evidence.get("aiGeneratedLikelihood"),
+            "fraudFlags": evidence.get("fraudFlags", []),
+        }
+
+    async def _create_evidence(self, item: BulkIngestItem, evidence_oid: ObjectId, *, tenant_id: str, user_id: str) -> None:
+        """Idempotent: bij hervatten bestaat het evidence document al en wordt alleen een open blob-referentie afgemaakt.
+
+        Eerst het document (met `blobRetained: False`), dan pas de refcount. Zo laat een crash
+        ertussen geen referentie achter die niemand meer vrijgeeft.
+        """
+        existing = await self.db["evidenceItems"].find_one({"_id": evidence_oid}, {"blobRetained": 1})
+        if existing is None:
+            await self._insert_evidence(item, evidence_oid, tenant_id=tenant_id, user_id=user_id)
+            existing = {"blobRetained": False} if item.blob_ref else {}
+        if existing.get("blobRetained") is False:
+            await self._retain_blob(item, evidence_oid, tenant_id=tenant_id)
+
+    async def _insert_evidence(self, item: BulkIngestItem, evidence_oid: ObjectId, *, tenant_id: str, user_id: str) -> None:
+        try:
+            candidate = await self.db["candidates"].find_one({"_id": ObjectId(item.candidate_id)}, {"tenantId": 1})
+        except InvalidId:
+            candidate = None
+        if not candidate:
+            raise LookupError("Candidate not found")
+        if candidate["tenantId"] != tenant_id:
+            raise PermissionError("Cross-tenant access denied")
+
+        blob = None
+        if item.blob_ref:
+            blob = await blob_store.describe(tenant_id, item.blob_ref)
+            if blob is None:
+                raise LookupError(f"Blob {item.blob_ref} not found")
+        elif not item.text:
+            raise LookupError("Item bevat geen text of blobRef")
+
+        content_type = blob.get("contentType") if blob else None
+        await self.db["evidenceItems"].insert_one(
+            {
+                "_id": evidence_oid,
+                "tenantId": tenant_id,
+                "candidateId": item.candidate_id,
+                "uploadedByUserId": user_id,
+                "type": _evidence_type(content_type) if blob else "text",
+                "status": "uploaded",
+                "pathOrBlobRef": item.blob_ref or f"text::{item.candidate_id}::{datetime.utcnow().isoformat()}",
+                **({"blobRetained": False} if blob else {}),
+                "checksum": blob.get("checksum") if blob else None,
+                "sizeBytes": blob.get("sizeBytes") if blob else None,
+                "fileName": item.file_name,
+                "contentType": content_type,
+                "description": item.description,
+                "extractedText": item.text or None,
+                "indicatorHints": item.indicator_hints,
+                "metadata": item.metadata,
+                "timestamp": datetime.utcnow(),
+                "aiGeneratedLikelihood": None,
+                "mappedIndicators": [],
+                "transcript": None,
+                "fraudFlags": [],
+            }
+        )
+        await audit_service.log(
+            tenant_id=tenant_id,
+            user_id=user_id,
+            action="evidence_uploaded",
+            target_type="candidate",
+            target_id=item.candidate_id,
+        )
+
+    async def _retain_blob(self, item: BulkIngestItem, evidence_oid: ObjectId, *, tenant_id: str) -> None:
+        if await blob_store.retain(tenant_id, item.blob_ref) is None:
+            # Blob is na het aanmaken van het document verdwenen; volgende poging begint opnieuw.
+            await self.db["evidenceItems"].delete_one({"_id": evidence_oid})
+            raise LookupError(f"Blob {item.blob_ref} not found")
+        await self.db["evidenceItems"].update_one({"_id": evidence_oid}, {"$set": {"blobRetained": True}})
+
+    async def _finish(self, checkpoint_id: str, result: dict[str, Any]) -> dict[str, Any]:
+        await self.db["ingestItems"].update_one(
+            {"_id": checkpoint_id},
+            {"$set": {"status": result["status"], "error": result.get("error"), "finishedAt": datetime.utcnow()}},
+        )
+        return result
+
+
+async def _ndjson_lines(chunks: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[bytes | None]:
+    """Splitst een gestreamde body op regels zonder het hele manifest in geheugen te laden.
+
+    Een regel langer dan `max_line_bytes` wordt niet gebufferd maar overgeslagen en komt terug als None.
+    """
+    buffer = b""
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if oversized or len(line) > max_line_bytes:
+                oversized = False
+                yield None
+            elif line.strip():
+                yield line
+        if len(buffer) > max_line_bytes:
+            oversized = True
+            buffer = b""
+    if oversized or len(buffer) > max_line_bytes:
+        yield None
+    elif buffer.strip():
+        yield buffer
+
+
+bulk_ingest_service = BulkIngestService()
@@ -0,0 +1,169 @@
+from typing import Any, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+from app.services.traject_catalog import CatalogEntry, TrajectCatalog, traject_catalog
+
+RECOMPUTE_COVERAGE_JOB = "recompute_coverage"
+
+# Velden die /candidates/{id}/status nodig heeft.
+STATUS_PROJECTION = {
+    "tenantId": 1,
+    "trajectId": 1,
+    "indicatorCoverage": 1,
+    "coverageSummary": 1,
+    "fraudFlags": 1,
+    "statusPhase": 1,
+}
+
+
+def _percent(covered: Any, total: Any) -> dict[str, Any]:
+    return {"$cond": [{"$gt": [total, 0]}, {"$round": [{"$multiply": [{"$divide": [covered, total]}, 100]}, 1]}, 0.0]}
+
+
+def _covered_count(indicator_ids: list[str]) -> Any:
+    # Statische paden i.p.v. $getField, zodat het ook op oudere Mongo-versies draait.
+    return {"$add": [0, *({"$cond": [{"$eq": [f"$indicatorCoverage.{indicator_id}.covered", True]}, 1, 0]} for indicator_id in indicator_ids)]}
+
+
+def summary_stages(entry: CatalogEntry, required_percent: float) -> list[dict[str, Any]]:
+    """Pipeline-stages die `coverageSummary` herberekenen uit `indicatorCoverage` van hetzelfde document.
+
+    De trajectstructuur gaat als literal mee; Mongo telt op de actuele toestand van het document,
+    dus gelijktijdige updates van verschillende indicatoren overschrijven elkaars totalen niet.
+    """
+    areas = [
+        {
+            "areaId": {"$literal": str(area.get("id"))},
+            "name": {"$literal": area.get("name", "")},
+            "total": {"$literal": len(area.get("indicators", []))},
+            "covered": _covered_count([str(indicator.get("id")) for indicator in area.get("indicators", [])]),
+        }
+        for area in entry.doc.get("deskundigheidsgebieden", [])
+    ]
+    total = sum(len(area.get("indicators", [])) for area in entry.doc.get("deskundigheidsgebieden", []))
+    return [
+        {"$set": {"coverageSummary": {"areas": areas}}},
+        {
+            "$set": {
+                "coverageSummary.areas": {
+                    "$map": {
+                        "input": "$coverageSummary.areas",
+                        "as": "area",
+                        "in": {
+                            "$mergeObjects": [
+                                "$$area",
+                                {
+                                    "percent": _percent("$$area.covered", "$$area.total"),
+                                    "ready": {"$gte": [_percent("$$area.covered", "$$area.total"), required_percent]},
+                                },
+                            ]
+                        },
+                    }
+                },
+                "coverageSummary.covered": {"$sum": "$coverageSummary.areas.covered"},
+                "coverageSummary.total": {"$literal": total},
+                "coverageSummary.requiredPercent": {"$literal": required_percent},
+                "coverageSummary.trajectVersion": {"$literal": entry.version},
+                "coverageSummary.updatedAt": "$$NOW",
+            }
+        },
+        {
+            "$set": {
+                "coverageSummary.percent": _percent("$coverageSummary.covered", "$coverageSummary.total"),
+                # Klaar voor de volgende fase als elk gebied (met indicatoren) de drempel haalt.
+                "coverageSummary.ready": {
+                    "$and": [
+                        {"$gt": ["$coverageSummary.total", 0]},
+                        {
+                            "$allElementsTrue": [
+                                {
+                                    "$map": {
+                                        "input": "$coverageSummary.areas",
+                                        "as": "area",
+                                        "in": {"$or": [{"$eq": ["$$area.total", 0]}, "$$area.ready"]},
+                                    }
+                                }
+                            ]
+                        },
+                    ]
+                },
+            }
+        },
+    ]
+
+
+def mark_covered_stage(indicators: list[str], evidence_id: str) -> dict[str, Any]:
+    """Zet indicatoren op gedekt en voegt het bewijs toe (zonder dubbelingen, volgorde behouden)."""
+    updates: dict[str, Any] = {}
+    for indicator in indicators:
+        evidence_ids = {"$ifNull": [f"$indicatorCoverage.{indicator}.evidenceIds", []]}
+        updates[f"indicatorCoverage.{indicator}.covered"] = {"$literal": True}
+        updates[f"indicatorCoverage.{indicator}.evidenceIds"] = {
+            "$cond": [{"$in": [evidence_id, evidence_ids]}, evidence_ids, {"$concatArrays": [evidence_ids, [evidence_id]]}]
+        }
+    return {"$set": updates}
+
+
+class CoverageService(DatabaseBound):
+    """Houdt per kandidaat de dekking per deskundigheidsgebied bij, atomair met de indicatorwijziging."""
+
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None, catalog: Optional[TrajectCatalog] = None) -> None:
+        self.db = db
+        self.catalog = catalog or traject_catalog
+        self.settings = get_settings()
+
+    def required_percent(self, entry: CatalogEntry) -> float:
+        return float(entry.doc.get("requiredCoveragePercent") or self.settings.coverage_required_percent)
+
+    async def record(self, candidate_oid: ObjectId, indicators: list[str], evidence_id: str) -> None:
+        """Indicatoren op gedekt zetten en de samenvatting herberekenen in één pipeline-update."""
+        if not indicators:
+            return
+        candidate = await self.db["candidates"].find_one({"_id": candidate_oid}, {"trajectId": 1})
+        entry = await self.catalog.get(str(candidate["trajectId"])) if candidate and candidate.get("trajectId") else None
+
+        pipeline = [mark_covered_stage(indicators, evidence_id)]
+        if entry is not None:
+            pipeline.extend(summary_stages(entry, self.required_percent(entry)))
+        await self.db["candidates"].update_one({"_id": candidate_oid}, pipeline)
+
+    async def recompute(self, *, tenant_id: str | None = None, traject_id: str | None = None) -> int:
+        """Repair: herberekent de samenvatting in bulk, één `update_many` per traject."""
+        query: dict[str, Any] = {}
+        if tenant_id:
+            query["tenantId"] = tenant_id
+        traject_ids = [traject_id] if traject_id else await self.db["candidates"].distinct("trajectId", query)
+
+        modified = 0
+        for current in traject_ids:
+            entry = await self.catalog.get(str(current))
+            if entry is None:
+                continue
+            result = await self.db["candidates"].update_many(
+                {**query, "trajectId": current},
+                summary_stages(entry, self.required_percent(entry)),
+            )
+            modified += result.modified_count
+        return modified
+
+    async def handle_job(self, payload: dict[str, Any]) -> None:
+        await self.recompute(tenant_id=payload.get("tenantId"), traject_id=payload.get("trajectId"))
+
+    async def status(self, candidate_oid: ObjectId, tenant_id: str) -> dict[str, Any] | None:
+        """Eén geprojecteerde fetch; een kandidaat van vóór de samenvatting wordt eenmalig bijgewerkt."""
+        candidate = await self.db["candidates"].find_one({"_id": candidate_oid}, STATUS_PROJECTION)
+        if candidate is None or candidate.get("tenantId") != tenant_id or candidate.get("coverageSummary"):
+            return candidate
+
+        entry = await self.catalog.get(str(candidate["trajectId"])) if candidate.get("trajectId") else None
+        if entry is None:
+            return candidate
+        await self.db["candidates"].update_one({"_id": candidate_oid}, summary_stages(entry, self.required_percent(entry)))
+        return await self.db["candidates"].find_one({"_id": candidate_oid}, STATUS_PROJECTION)
+
+
+coverage_service = CoverageService()
@@ -0,0 +1,155 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.db.mongo import DatabaseBound
+from app.services.analysis_orchestrator import analysis_orchestrator
+from app.services.audit_service import audit_service
+from app.services.blob_store import blob_store
+from app.services.coverage import coverage_service
+from app.services.image_hashes import image_hash_index, recycled_image_flag
+from app.services.near_duplicates import near_duplicate_flag, near_duplicate_index
+
+PROCESS_EVIDENCE_JOB = "process_evidence"
+
+# Vanaf deze AI-likelihood of flag-score gaat bewijs naar 'flagged' voor handmatige controle.
+FLAG_THRESHOLD = 0.7
+
+
+class EvidenceProcessor(DatabaseBound):
+    """Verwerkt geüpload bewijs buiten de request: STT, indicator-mapping en fraudescore."""
+
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None) -> None:
+        self.db = db
+
+    async def handle_job(self, payload: dict[str, Any]) -> None:
+        status = await self.process(payload["evidenceId"])
+        if payload.get("ingestItemId"):
+            # Bulk-import: checkpoint afronden, ook als de client de stream al heeft verlaten.
+            await self.db["ingestItems"].update_one(
+                {"_id": payload["ingestItemId"]},
+                {"$set": {"status": "done", "evidenceStatus": status, "error": None, "finishedAt": datetime.utcnow()}},
+            )
+
+    async def handle_dead_job(self, payload: dict[str, Any], error: str) -> None:
+        """Na de laatste mislukte poging: bewijs markeren zodat een begeleider het oppakt."""
+        if payload.get("ingestItemId"):
+            await self.db["ingestItems"].update_one(
+                {"_id": payload["ingestItemId"]},
+                {"$set": {"status": "failed", "error": error[:500], "finishedAt": datetime.utcnow()}},
+            )
+        await self.db["evidenceItems"].update_one(
+            {"_id": ObjectId(payload["evidenceId"])},
+            {
+                "$set": {"status": "flagged", "processedAt": datetime.utcnow()},
+                "$push": {
+                    "fraudFlags": {
+                        "type": "processing_failed",
+                        "message": "Automatische verwerking mislukt; handmatige beoordeling noodzakelijk.",
+                        "score": 0.0,
+                        "details": error[:500],
+                    }
+                },
+            },
+        )
+
+    async def process(self, evidence_id: str) -> str | None:
+        """Zet status `processing → ready/flagged` en werkt indicator-dekking bij."""
+        evidence_oid = ObjectId(evidence_id)
+        evidence = await self.db["evidenceItems"].find_one_and_update(
+            {"_id": evidence_oid},
+            {"$set": {"status": "processing", "processingStartedAt": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not evidence:
+            return None
+
+        try:
+            return await self._analyze(evidence)
+        except Exception:
+            # Terug naar 'uploaded' zodat de retry van de queue schoon opnieuw begint.
+            await self.db["evidenceItems"].update_one({"_id": evidence_oid}, {"$set": {"status": "uploaded"}})
+            raise
+
+    async def _analyze(self, evidence: dict[str, Any]) -> str:
+        evidence_id = str(evidence["_id"])
+        tenant_id = evidence["tenantId"]
+        candidate_id = evidence["candidateId"]
+        description = evidence.get("description") or ""
+
+        audio = None
+        if evidence["type"] == "audio" and evidence.get("pathOrBlobRef"):
+            audio = blob_store.open_stream(tenant_id, evidence["pathOrBlobRef"])
+
+        outcome = await analysis_orchestrator.analyze(
+            candidate_id=candidate_id,
+            text=evidence.get("extractedText") or description,
+            audio=audio,
+            audio_mimetype=evidence.get("contentType") or "audio/mpeg",
+            indicator_hints=evidence.get("indicatorHints", []),
+            tenant_id=tenant_id,
+        )
+
+        duplicates = await near_duplicate_index.check_and_add(
+            tenant_id=tenant_id,
+            candidate_id=candidate_id,
+            evidence_id=evidence_id,
+            text=outcome.content_text,
+        )
+        if duplicates:
+            outcome.fraud_flags.append(near_duplicate_flag(duplicates))
+
+        perceptual_hashes = None
+        if evidence["type"] == "image" and evidence.get("pathOrBlobRef"):
+            hashes = await image_hash_index.hash_stream(blob_store.open_stream(tenant_id, evidence["pathOrBlobRef"]))
+            if hashes is not None:
+                perceptual_hashes = {name: f"{getattr(hashes, name):016x}" for name in ("ahash", "dhash", "phash")}
+                recycled = await image_hash_index.check_and_add(
+                    tenant_id=tenant_id,
+                    candidate_id=candidate_id,
+                    evidence_id=evidence_id,
+                    hashes=hashes,
+                )
+                if recycled:
+                    outcome.fraud_flags.append(recycled_image_flag(recycled))
+
+        flagged = outcome.ai_generated_likelihood >= FLAG_THRESHOLD or any(
+            float(flag.get("score", 0.0) or 0.0) >= FLAG_THRESHOLD for flag in outcome.fraud_flags if isinstance(flag, dict)
+        )
+        status = "flagged" if flagged else "ready"
+
+        await self.db["evidenceItems"].update_one(
+            {"_id": evidence["_id"]},
+            {
+                "$set": {
+                    "status": status,
+                    "aiGeneratedLikelihood": outcome.ai_generated_likelihood,
+                    "mappedIndicators": outcome.mapped_indicators,
+                    "transcript": outcome.transcript,
+                    "fraudFlags": outcome.fraud_flags,
+                    "analysisSteps": [step.summary() for step in outcome.steps],
+                    "perceptualHashes": perceptual_hashes,
+                    "processedAt": datetime.utcnow(),
+                }
+            },
+        )
+
+        await self.update_indicator_coverage(ObjectId(candidate_id), outcome.mapped_indicators, evidence_id)
+        await audit_service.log(
+            tenant_id=tenant_id,
+            user_id=evidence["uploadedByUserId"],
+            action="evidence_processed",
+            target_type="candidate",
+            target_id=candidate_id,
+        )
+        return status
+
+    async def update_indicator_coverage(self, candidate_oid: ObjectId, indicators: list[str], evidence_id: str) -> None:
+        """Zet indicatoren op 'gedekt' en werkt in dezelfde update de dekking per gebied bij."""
+        await coverage_service.record(candidate_oid, indicators, evidence_id)
+
+
+evidence_processor = EvidenceProcessor()
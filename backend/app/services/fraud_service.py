@@ -1,25 +1,87 @@
 import json
-from typing import Any
-
-import httpx
+from dataclasses import replace
+from typing import Any, Optional
 
 from app.core.config import get_settings
+from app.services.http_client import HTTPClientPool, http_client_pool
+from app.services.llm_cache import LLMCache, llm_cache
+from app.services.stylometry import StyleScore, score_batch
+
+FRAUD_MODEL = "gpt-4o-mini"
+FRAUD_PROMPT_VERSION = "ai-origin-v1"
 
 
 class FraudService:
     """Signaleert AI-gegenereerde teksten zodat begeleiders gericht kunnen checken."""
 
-    def __init__(self) -> None:
+    def __init__(self, http: Optional[HTTPClientPool] = None, cache: Optional[LLMCache] = None) -> None:
+        self.http = http or http_client_pool
+        self.cache = cache or llm_cache
         self.settings = get_settings()
 
+    def needs_llm(self, style: StyleScore) -> bool:
+        """Alleen een lange tekst met een duidelijk lage stijlscore slaat de LLM over (en alleen met de gate aan)."""
+        if not self.settings.fraud_local_gate:
+            return True
+        return style.word_count < self.settings.fraud_local_min_words or style.likelihood > self.settings.fraud_local_low
+
+    def _local_result(self, style: StyleScore, *, llm_failed: bool = False) -> dict[str, Any]:
+        if style.word_count < self.settings.fraud_local_min_words:
+            # Te weinig tekst voor stilometrie: score naar neutraal trekken naar rato van de lengte.
+            confidence = style.word_count / self.settings.fraud_local_min_words
+            style = replace(style, likelihood=round(0.5 + (style.likelihood - 0.5) * confidence, 4))
+
+        fraud_flags: list[dict[str, Any]] = []
+        if style.likelihood >= 0.5:
+            fraud_flags.append(
+                {
+                    "type": "ai_style_suspected",
+                    "message": "Schrijfstijl lijkt op AI-gegenereerde tekst (stilometrie).",
+                    "score": style.likelihood,
+                    "details": style.features,
+                }
+            )
+        if llm_failed:
+            fraud_flags.append(
+                {
+                    "type": "analysis_unavailable",
+                    "message": "AI-herkomst analyse via LLM faalde; lokale stilometrische score gebruikt.",
+                    "score": 0.2,
+                }
+            )
+        return {"aiGeneratedLikelihood": style.likelihood, "fraudFlags": fraud_flags, "method": "stylometry"}
+
+    def score_batch_local(self, texts: list[str]) -> list[dict[str, Any]]:
+        """Snelle eerste schifting voor een batch; `needsLlm` markeert teksten die de LLM moet beoordelen."""
+        return [
+            {**self._local_result(style), "needsLlm": self.needs_llm(style)}
+            for style in score_batch(texts)
+        ]
+
     async def score_text_for_ai_origin(self, text: str) -> dict[str, Any]:
-        """Vraagt LLM om waarschijnlijkheid AI-tekst te scoren (0-1) met toelichting."""
+        """Scoort AI-herkomst (0-1) via de LLM; stilometrie is alleen een voorfilter voor duidelijk menselijke tekst."""
+        style = score_batch([text])[0]
+        if not self.needs_llm(style):
+            return self._local_result(style)
+        return await self._score_with_llm(text, style)
+
+    async def _score_with_llm(self, text: str, style: StyleScore) -> dict[str, Any]:
+        cache_key, cache_meta = self.cache.make_key(
+            namespace="ai_origin",
+            text=text,
+            prompt_version=FRAUD_PROMPT_VERSION,
+            model=FRAUD_MODEL,
+        )
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         prompt = (
             "Beoordeel of de tekst vermoedelijk AI-gegenereerd is. "
             "Geef json met 'aiGeneratedLikelihood' (0-1) en 'fraudFlags'."
         )
         payload = {
-            "model": "gpt-4o-mini",
+            "model": FRAUD_MODEL,
             "messages": [
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": text},
@@ -27,29 +89,23 @@ class FraudService:
             "response_format": {"type": "json_object"},
         }
         try:
-            async with httpx.AsyncClient(timeout=20.0) as client:
-                response = await client.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.settings.openai_api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json=payload,
-                )
-                response.raise_for_status()
-                data = response.json()
-                return json.loads(data["choices"][0]["message"]["content"])
+            response = await self.http.client.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.settings.openai_api_key}",
+                    "Content-Type": "application/json",
+                },
+                json=payload,
+                timeout=20.0,
+            )
+            response.raise_for_status()
+            data = response.json()
+            result = json.loads(data["choices"][0]["message"]["content"])
         except Exception:
-            return {
-                "aiGeneratedLikelihood": 0.5,
-                "fraudFlags": [
-                    {
-                        "type": "analysis_unavailable",
-                        "message": "AI-herkomst analyse faalde; voer manuele beoordeling uit.",
-                        "score": 0.5,
-                    }
-                ],
-            }
+            return self._local_result(style, llm_failed=True)
+
+        await self.cache.set(cache_key, cache_meta, result)
+        return result
 
 
 fraud_service = FraudService()
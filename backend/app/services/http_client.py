@@ -0,0 +1,61 @@
+import asyncio
+import importlib.util
+import logging
+
+import httpx
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPClientPool:
+    """Eén gedeelde httpx-client per proces zodat AI-calls DNS/TCP/TLS-handshakes hergebruiken."""
+
+    def __init__(self) -> None:
+        self.settings = get_settings()
+        self._client: httpx.AsyncClient | None = None
+
+    def _build(self) -> httpx.AsyncClient:
+        http2 = self.settings.http2_enabled and importlib.util.find_spec("h2") is not None
+        if self.settings.http2_enabled and not http2:
+            logger.warning("HTTP/2 gevraagd maar pakket 'h2' ontbreekt; val terug op HTTP/1.1")
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=self.settings.http_max_connections,
+                max_keepalive_connections=self.settings.http_max_keepalive_connections,
+                keepalive_expiry=self.settings.http_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Lazy fallback voor scripts zonder lifespan; de app start de pool expliciet.
+        if self._client is None or self._client.is_closed:
+            self._client = self._build()
+        return self._client
+
+    async def startup(self) -> None:
+        self._client = self._build()
+        await self.warm_up()
+
+    async def warm_up(self) -> None:
+        """Opent alvast verbindingen naar de AI-providers zodat de eerste upload geen handshake betaalt."""
+
+        async def _touch(url: str) -> None:
+            try:
+                await self.client.head(url, timeout=5.0)
+            except httpx.HTTPError as exc:
+                logger.info("warm-up naar %s mislukt: %s", url, exc)
+
+        await asyncio.gather(*(_touch(url) for url in self.settings.http_warmup_urls))
+
+    async def shutdown(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_client_pool = HTTPClientPool()
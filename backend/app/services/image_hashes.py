@@ -0,0 +1,186 @@
+import io
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from itertools import combinations
+from typing import Any, AsyncIterable, Optional
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+
+HASH_BITS = 64
+
+
+@dataclass
+class ImageHashes:
+    ahash: int
+    dhash: int
+    phash: int
+
+
+@dataclass
+class ImageMatch:
+    evidence_id: str
+    candidate_id: str
+    distances: dict[str, int]
+
+
+@lru_cache
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormale DCT-II basis, zodat pHash zonder SciPy kan."""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+
+def compute_hashes(data: bytes) -> ImageHashes:
+    """aHash, dHash en pHash (elk 64 bits) op een grijswaardeversie van de afbeelding."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert("L")
+        small = np.asarray(image.resize((8, 8), Image.Resampling.LANCZOS), dtype=np.float64)
+        wide = np.asarray(image.resize((9, 8), Image.Resampling.LANCZOS), dtype=np.float64)
+        large = np.asarray(image.resize((32, 32), Image.Resampling.LANCZOS), dtype=np.float64)
+
+    dct = _dct_matrix(32)
+    low = (dct @ large @ dct.T)[:8, :8]
+    # Mediaan zonder de DC-component, die alleen de gemiddelde helderheid draagt.
+    median = np.median(low.ravel()[1:])
+    return ImageHashes(
+        ahash=_bits_to_int(small > small.mean()),
+        dhash=_bits_to_int(wide[:, 1:] > wide[:, :-1]),
+        phash=_bits_to_int(low > median),
+    )
+
+
+def hamming(left: int, right: int) -> int:
+    return (left ^ right).bit_count()
+
+
+def _to_hex(value: int) -> str:
+    return f"{value:016x}"
+
+
+class ImageHashIndex(DatabaseBound):
+    """Multi-index hashing op pHash in `imageHashes`, per tenant.
+
+    De 64-bit pHash wordt in `chunks` stukken geknipt. Ligt een hash binnen afstand r, dan ligt
+    minstens één stuk binnen r // chunks; de lookup vraagt daarom per stuk alle waarden binnen die
+    kleine straal op via de (tenantId, chunks) index, in plaats van de hele tenant te scannen.
+    """
+
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None) -> None:
+        self.db = db
+        self.settings = get_settings()
+        self.chunks = self.settings.image_hash_chunks
+        self.chunk_bits = HASH_BITS // self.chunks
+        self.chunk_radius = self.settings.image_hash_max_distance // self.chunks
+
+    @property
+    def collection(self):
+        return self.db["imageHashes"]
+
+    def _chunk_values(self, phash: int) -> list[int]:
+        mask = (1 << self.chunk_bits) - 1
+        return [(phash >> (index * self.chunk_bits)) & mask for index in range(self.chunks)]
+
+    def chunk_keys(self, phash: int) -> list[str]:
+        return [f"{index}:{value:x}" for index, value in enumerate(self._chunk_values(phash))]
+
+    def probe_keys(self, phash: int) -> list[str]:
+        """Alle stukwaarden binnen `chunk_radius` bitflips van de stukken van `phash`."""
+        keys = []
+        for index, value in enumerate(self._chunk_values(phash)):
+            for radius in range(self.chunk_radius + 1):
+                for positions in combinations(range(self.chunk_bits), radius):
+                    flipped = value
+                    for position in positions:
+                        flipped ^= 1 << position
+                    keys.append(f"{index}:{flipped:x}")
+        return keys
+
+    async def hash_stream(self, stream: AsyncIterable[bytes]) -> ImageHashes | None:
+        """Leest de afbeelding (tot de limiet) en hasht in de threadpool; None bij onleesbare data."""
+        buffer = bytearray()
+        async for chunk in stream:
+            buffer.extend(chunk)
+            if len(buffer) > self.settings.image_hash_max_bytes:
+                return None
+        try:
+            return await run_in_threadpool(compute_hashes, bytes(buffer))
+        except Exception:
+            return None
+
+    async def check_and_add(
+        self,
+        *,
+        tenant_id: str,
+        candidate_id: str,
+        evidence_id: str,
+        hashes: ImageHashes,
+    ) -> list[ImageMatch]:
+        matches: list[ImageMatch] = []
+        # Eigen afbeeldingen al in Mongo uitsluiten, anders vullen die de limit.
+        cursor = self.collection.find(
+            {
+                "tenantId": tenant_id,
+                "chunks": {"$in": self.probe_keys(hashes.phash)},
+                "candidateId": {"$ne": candidate_id},
+                "_id": {"$ne": evidence_id},
+            },
+            {"candidateId": 1, "ahash": 1, "dhash": 1, "phash": 1},
+        ).limit(self.settings.image_hash_candidate_limit)
+        async for doc in cursor:
+            distances = {
+                name: hamming(getattr(hashes, name), int(doc[name], 16)) for name in ("ahash", "dhash", "phash")
+            }
+            if distances["phash"] <= self.settings.image_hash_max_distance:
+                matches.append(ImageMatch(doc["_id"], doc["candidateId"], distances))
+
+        await self.collection.replace_one(
+            {"_id": evidence_id},
+            {
+                "tenantId": tenant_id,
+                "candidateId": candidate_id,
+                "ahash": _to_hex(hashes.ahash),
+                "dhash": _to_hex(hashes.dhash),
+                "phash": _to_hex(hashes.phash),
+                "chunks": self.chunk_keys(hashes.phash),
+                "createdAt": datetime.utcnow(),
+            },
+            upsert=True,
+        )
+        matches.sort(key=lambda match: match.distances["phash"])
+        return matches[: self.settings.image_hash_max_matches]
+
+    async def remove(self, evidence_id: str) -> None:
+        await self.collection.delete_one({"_id": evidence_id})
+
+
+def recycled_image_flag(matches: list[ImageMatch]) -> dict[str, Any]:
+    best = matches[0].distances["phash"]
+    return {
+        "type": "recycled_image",
+        "message": "Afbeelding lijkt sterk op eerder bewijs van een andere kandidaat.",
+        "score": round(1 - best / HASH_BITS, 3),
+        "details": {
+            "matches": [
+                {"evidenceId": match.evidence_id, "candidateId": match.candidate_id, "distances": match.distances}
+                for match in matches
+            ]
+        },
+    }
+
+
+image_hash_index = ImageHashIndex()
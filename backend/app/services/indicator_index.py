@@ -0,0 +1,119 @@
+import zlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.services.traject_catalog import TrajectCatalog, traject_catalog
+from app.utils.dutch import content_words
+
+# Tekengrammen vangen Nederlandse samenstellingen ("veiligheidsplan" ~ "veiligheid").
+CHAR_NGRAM = 4
+
+
+def _features(text: str) -> list[str]:
+    tokens = content_words(text)
+    features = [f"w:{token}" for token in tokens]
+    features.extend(f"b:{left}_{right}" for left, right in zip(tokens, tokens[1:]))
+    for token in tokens:
+        padded = f"<{token}>"
+        features.extend(f"c:{padded[i:i + CHAR_NGRAM]}" for i in range(max(len(padded) - CHAR_NGRAM + 1, 1)))
+    return features
+
+
+def hash_vectorize(texts: list[str], n_features: int) -> np.ndarray:
+    """Hashing vectorizer met sublineaire tf; geen vocabulaire of extern model nodig."""
+    matrix = np.zeros((len(texts), n_features), dtype=np.float32)
+    for row, text in enumerate(texts):
+        features = _features(text)
+        if not features:
+            continue
+        hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint64, count=len(features))
+        np.add.at(matrix[row], (hashes % n_features).astype(np.int64), 1.0)
+    np.log1p(matrix, out=matrix)
+    return matrix
+
+
+def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+@dataclass
+class IndicatorMatch:
+    indicator_id: str
+    label: str
+    area_id: str
+    score: float
+
+
+class TrajectIndex:
+    """TF-IDF-matrix over `label` + `description` van alle indicatoren van één traject."""
+
+    def __init__(self, traject: dict[str, Any], n_features: int) -> None:
+        self.n_features = n_features
+        self.ids: list[str] = []
+        self.labels: list[str] = []
+        self.area_ids: list[str] = []
+        documents: list[str] = []
+        for area in traject.get("deskundigheidsgebieden", []):
+            for indicator in area.get("indicators", []):
+                self.ids.append(indicator["id"])
+                self.labels.append(indicator.get("label", ""))
+                self.area_ids.append(area["id"])
+                documents.append(f"{area.get('name', '')} {indicator.get('label', '')} {indicator.get('description', '')}")
+
+        counts = hash_vectorize(documents, n_features) if documents else np.zeros((0, n_features), dtype=np.float32)
+        document_frequency = (counts > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(documents)) / (1 + document_frequency)) + 1).astype(np.float32)
+        self.matrix = _l2_normalize(counts * self.idf)
+
+    def search(self, text: str, k: int) -> list[IndicatorMatch]:
+        if not self.ids:
+            return []
+        query = _l2_normalize(hash_vectorize([text], self.n_features) * self.idf)[0]
+        scores = self.matrix @ query
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [
+            IndicatorMatch(self.ids[i], self.labels[i], self.area_ids[i], round(float(scores[i]), 4))
+            for i in top
+            if scores[i] > 0
+        ]
+
+
+class IndicatorIndex:
+    """Houdt per traject een index in geheugen; een nieuwe trajectversie bouwt hem opnieuw op."""
+
+    def __init__(self, catalog: Optional[TrajectCatalog] = None) -> None:
+        self.catalog = catalog or traject_catalog
+        self.settings = get_settings()
+        self._indexes: dict[str, tuple[str, TrajectIndex]] = {}
+
+    async def for_traject(self, traject_id: str, version: str) -> TrajectIndex | None:
+        cached = self._indexes.get(traject_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        entry = await self.catalog.get(traject_id)
+        if not entry:
+            return None
+
+        index = await run_in_threadpool(TrajectIndex, entry.doc, self.settings.indicator_index_features)
+        self._indexes[traject_id] = (version, index)
+        return index
+
+    async def shortlist(self, traject_id: str, version: str, text: str, k: int | None = None) -> list[IndicatorMatch]:
+        index = await self.for_traject(traject_id, version)
+        if index is None:
+            return []
+        return await run_in_threadpool(index.search, text, k or self.settings.indicator_shortlist_k)
+
+    def known_ids(self, traject_id: str) -> set[str]:
+        cached = self._indexes.get(traject_id)
+        return set(cached[1].ids) if cached else set()
+
+
+indicator_index = IndicatorIndex()
@@ -0,0 +1,182 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+
+JOB_QUEUED = "queued"
+JOB_LEASED = "leased"
+JOB_DONE = "done"
+JOB_DEAD = "dead"
+
+
+class JobQueue(DatabaseBound):
+    """Duurzame takenqueue in de `jobs` collectie zodat LLM-werk een worker-herstart overleeft."""
+
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None) -> None:
+        self.db = db
+        self.settings = get_settings()
+
+    @property
+    def collection(self):
+        return self.db["jobs"]
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: dict[str, Any],
+        *,
+        tenant_id: str,
+        max_attempts: int | None = None,
+        run_at: datetime | None = None,
+        job_id: ObjectId | None = None,
+    ) -> str:
+        """Zet een job klaar; met een vaste `job_id` is dubbel inplannen een DuplicateKeyError."""
+        now = datetime.utcnow()
+        result = await self.collection.insert_one(
+            {
+                **({"_id": job_id} if job_id is not None else {}),
+                "kind": kind,
+                "tenantId": tenant_id,
+                "payload": payload,
+                "status": JOB_QUEUED,
+                "attempts": 0,
+                "maxAttempts": max_attempts or self.settings.job_max_attempts,
+                "runAt": run_at or now,
+                "leasedBy": None,
+                "leaseExpiresAt": None,
+                "lastError": None,
+                "createdAt": now,
+                "updatedAt": now,
+            }
+        )
+        return str(result.inserted_id)
+
+    def _attempts_left(self, left: bool) -> dict[str, Any]:
+        max_attempts = {"$ifNull": ["$maxAttempts", self.settings.job_max_attempts]}
+        return {"$expr": {"$lt" if left else "$gte": ["$attempts", max_attempts]}}
+
+    async def lease(self, worker_id: str, kinds: list[str] | None = None) -> dict[str, Any] | None:
+        """Claimt atomair de oudste klare job; verlopen leases worden opnieuw uitgedeeld.
+
+        Een verlopen lease op de laatste poging (worker gecrasht) wordt niet opnieuw uitgedeeld;
+        die pakt `dead_letter_expired()` op.
+        """
+        now = datetime.utcnow()
+        query: dict[str, Any] = {
+            "$or": [
+                {"status": JOB_QUEUED, "runAt": {"$lte": now}},
+                {"status": JOB_LEASED, "leaseExpiresAt": {"$lte": now}, **self._attempts_left(True)},
+            ]
+        }
+        if kinds:
+            query["kind"] = {"$in": kinds}
+
+        return await self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": JOB_LEASED,
+                    "leasedBy": worker_id,
+                    "leaseExpiresAt": now + timedelta(seconds=self.settings.job_visibility_timeout_seconds),
+                    "updatedAt": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("runAt", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def extend_lease(self, job: dict[str, Any]) -> bool:
+        """Heartbeat voor lange jobs; False als een andere worker de lease al heeft overgenomen."""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"_id": job["_id"], "status": JOB_LEASED, "leasedBy": job["leasedBy"]},
+            {
+                "$set": {
+                    "leaseExpiresAt": now + timedelta(seconds=self.settings.job_visibility_timeout_seconds),
+                    "updatedAt": now,
+                }
+            },
+        )
+        return result.modified_count == 1
+
+    async def complete(self, job: dict[str, Any]) -> None:
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"_id": job["_id"], "leasedBy": job["leasedBy"]},
+            {"$set": {"status": JOB_DONE, "leaseExpiresAt": None, "finishedAt": now, "updatedAt": now}},
+        )
+
+    def backoff_seconds(self, attempts: int) -> float:
+        """Exponentiële backoff met jitter, begrensd door `job_backoff_max_seconds`."""
+        delay = self.settings.job_backoff_base_seconds * (2 ** max(attempts - 1, 0))
+        delay = min(delay, self.settings.job_backoff_max_seconds)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def fail(self, job: dict[str, Any], error: str) -> str | None:
+        """Plant een retry in of zet de job in de dead-letter staat; geeft de nieuwe status terug.
+
+        None als de lease intussen door een andere worker is overgenomen; dan verandert er niets.
+        """
+        now = datetime.utcnow()
+        if job["attempts"] >= job.get("maxAttempts", self.settings.job_max_attempts):
+            update = {"status": JOB_DEAD, "deadAt": now}
+        else:
+            update = {"status": JOB_QUEUED, "runAt": now + timedelta(seconds=self.backoff_seconds(job["attempts"]))}
+
+        result = await self.collection.update_one(
+            {"_id": job["_id"], "leasedBy": job["leasedBy"]},
+            {"$set": {**update, "leasedBy": None, "leaseExpiresAt": None, "lastError": error[:2000], "updatedAt": now}},
+        )
+        if result.modified_count != 1:
+            return None
+        return update["status"]
+
+    async def dead_letter_expired(self) -> list[dict[str, Any]]:
+        """Jobs waarvan de lease op de laatste poging verliep (crash, OOM) naar de dead-letter staat."""
+        dead: list[dict[str, Any]] = []
+        while True:
+            now = datetime.utcnow()
+            job = await self.collection.find_one_and_update(
+                {"status": JOB_LEASED, "leaseExpiresAt": {"$lte": now}, **self._attempts_left(False)},
+                {
+                    "$set": {
+                        "status": JOB_DEAD,
+                        "deadAt": now,
+                        "leasedBy": None,
+                        "leaseExpiresAt": None,
+                        "lastError": "lease verlopen op de laatste poging (worker gestopt of gecrasht)",
+                        "updatedAt": now,
+                    }
+                },
+                return_document=ReturnDocument.AFTER,
+            )
+            if job is None:
+                return dead
+            dead.append(job)
+
+    async def latest_for_evidence(self, evidence_id: str) -> dict[str, Any] | None:
+        """Meest recente job voor een evidence item (statuspoll); via de index op payload.evidenceId."""
+        return await self.collection.find_one(
+            {"payload.evidenceId": evidence_id},
+            {"status": 1, "attempts": 1, "maxAttempts": 1, "runAt": 1, "lastError": 1},
+            sort=[("createdAt", -1)],
+        )
+
+    async def requeue_dead(self, job_id: str) -> bool:
+        """Zet een dead-letter job handmatig terug in de queue (na fix van de oorzaak)."""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"_id": ObjectId(job_id), "status": JOB_DEAD},
+            {"$set": {"status": JOB_QUEUED, "attempts": 0, "runAt": now, "updatedAt": now}},
+        )
+        return result.modified_count == 1
+
+
+job_queue = JobQueue()
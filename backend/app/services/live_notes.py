@@ -0,0 +1,170 @@
+import asyncio
+import logging
+from datetime import datetime
+from itertools import count
+from typing import Any, Awaitable, Callable, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SPILLED_NOTES_COLLECTION = "assessmentNotes"
+DUPLICATE_KEY = 11000
+
+PersistedCallback = Callable[[list[int]], Awaitable[None]]
+
+
+class LiveNoteBuffer:
+    """Buffer per live-websocket: notities worden direct ge-ackt en in batches weggeschreven.
+
+    Flush na `LIVE_NOTES_FLUSH_COUNT` notities of `LIVE_NOTES_FLUSH_MS`, en bij `close()`. Met
+    `LIVE_NOTES_INLINE_MAX` gaan notities boven die grens naar `assessmentNotes` in plaats van
+    in de `notes` array, zodat het assessment-document niet onbegrensd groeit.
+
+    Elke notitie krijgt een `noteId` (`<verbinding>:<volgnummer>`); daarmee is een herhaalde flush
+    na een fout idempotent, ook als Mongo de eerste poging toch had uitgevoerd.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        *,
+        tenant_id: str,
+        candidate_id: str,
+        assessor_id: str,
+        on_persisted: Optional[PersistedCallback] = None,
+    ) -> None:
+        self.db = db
+        self.settings = get_settings()
+        self.filter = {"tenantId": tenant_id, "candidateId": candidate_id, "assessorId": assessor_id}
+        self.on_persisted = on_persisted
+        self._pending: list[dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+        self._due = asyncio.Event()
+        self._closing = False
+        self._last_seq = 0
+        self._connection_id = str(ObjectId())
+        self._note_numbers = count(1)
+        self._unreported: list[int] = []
+        self._assessment_id: Any = None
+        self._inline_count = 0
+
+    def next_seq(self, client_seq: Any = None) -> int:
+        """Volgnummer van de client als die er een meestuurt, anders doortellen per verbinding."""
+        if isinstance(client_seq, int) and not isinstance(client_seq, bool):
+            self._last_seq = max(self._last_seq, client_seq)
+            return client_seq
+        self._last_seq += 1
+        return self._last_seq
+
+    def add(self, note: dict[str, Any]) -> None:
+        """Zet de notitie in de buffer; wegschrijven gebeurt op de achtergrond, de ack hoeft niet te wachten."""
+        note.setdefault("noteId", f"{self._connection_id}:{next(self._note_numbers)}")
+        self._pending.append(note)
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        if len(self._pending) >= self.settings.live_notes_flush_count:
+            self._due.set()
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.wait_for(self._due.wait(), timeout=self.settings.live_notes_flush_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+        self._due.clear()
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception:
+            # Notities staan weer in de buffer; volgende poging na het interval.
+            logger.exception("live-notities flushen mislukt (%s in buffer)", len(self._pending))
+            if self._timer is None and not self._closing:
+                self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        async with self._lock:
+            notes, self._pending = self._pending, []
+            if not notes:
+                return
+            unwritten = list(notes)
+            try:
+                await self._write(unwritten)
+            except BaseException:
+                # Alleen terugzetten wat nog niet is weggeschreven; melden gebeurt bij de volgende flush.
+                self._pending[:0] = unwritten
+                self._unreported.extend(note["seq"] for note in notes[: len(notes) - len(unwritten)] if "seq" in note)
+                raise
+            seqs, self._unreported = [*self._unreported, *(note["seq"] for note in notes if "seq" in note)], []
+        if self.on_persisted is not None and seqs:
+            await self.on_persisted(seqs)
+
+    async def close(self) -> None:
+        """Bij disconnect: lopende flush laten afronden (niet annuleren, anders dubbele notities) en de rest wegschrijven."""
+        self._closing = True
+        if self._timer is not None:
+            self._due.set()
+            await asyncio.gather(self._timer, return_exceptions=True)
+        await self.flush()
+
+    async def _load_assessment(self) -> None:
+        """Eenmalig per verbinding: document aanmaken of ophalen; daarna schrijven we op `_id`."""
+        await self.db["assessments"].update_one(
+            self.filter,
+            {
+                "$setOnInsert": {
+                    "sessionMeta": {},
+                    "mediaIds": [],
+                    "draftReportText": None,
+                    "notes": [],
+                    "createdAt": datetime.utcnow(),
+                }
+            },
+            upsert=True,
+        )
+        docs = await self.db["assessments"].aggregate(
+            [
+                {"$match": self.filter},
+                {"$limit": 1},
+                {"$project": {"count": {"$size": {"$ifNull": ["$notes", []]}}}},
+            ]
+        ).to_list(1)
+        self._assessment_id = docs[0]["_id"]
+        self._inline_count = docs[0]["count"]
+
+    async def _write(self, notes: list[dict[str, Any]]) -> None:
+        """Schrijft `notes` weg en haalt wat gelukt is er vooraan uit, zodat een retry alleen de rest doet."""
+        if self._assessment_id is None:
+            await self._load_assessment()
+        inline_max = self.settings.live_notes_inline_max
+        room = len(notes) if inline_max is None else max(inline_max - self._inline_count, 0)
+        inline, spill = notes[:room], notes[room:]
+
+        if inline:
+            # Eén update op één document is atomair: de batch staat er al helemaal (eerdere poging) of nog niet.
+            await self.db["assessments"].update_one(
+                {"_id": self._assessment_id, "notes.noteId": {"$nin": [note["noteId"] for note in inline]}},
+                {"$push": {"notes": {"$each": inline}}},
+            )
+            self._inline_count += len(inline)
+            del notes[: len(inline)]
+
+        if spill:
+            now = datetime.utcnow()
+            try:
+                await self.db[SPILLED_NOTES_COLLECTION].insert_many(
+                    [
+                        {"_id": note["noteId"], **self.filter, "assessmentId": self._assessment_id, "createdAt": now, "note": note}
+                        for note in spill
+                    ],
+                    ordered=False,
+                )
+            except BulkWriteError as exc:
+                if any(error.get("code") != DUPLICATE_KEY for error in exc.details.get("writeErrors", [])):
+                    raise
+            await self.db["assessments"].update_one({"_id": self._assessment_id}, {"$set": {"hasSpilledNotes": True}})
+            del notes[:]
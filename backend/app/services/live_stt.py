@@ -0,0 +1,120 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+from urllib.parse import urlencode
+
+import websockets
+from websockets.exceptions import ConnectionClosed
+
+from app.core.config import get_settings
+
+
+@dataclass
+class TranscriptSegment:
+    text: str
+    is_final: bool
+    start: float
+    end: float
+
+
+class LiveSTTSession(ABC):
+    """Eén streaming-transcriptie: audio erin via `send`, segmenten eruit via `results`."""
+
+    @abstractmethod
+    async def send(self, chunk: bytes) -> None:
+        """Stuurt een audioframe door."""
+
+    @abstractmethod
+    async def finish(self) -> None:
+        """Einde audio; `results` levert nog de laatste finale segmenten en stopt dan."""
+
+    @abstractmethod
+    def results(self) -> AsyncIterator[TranscriptSegment]:
+        """Interim- en finale segmenten in volgorde van binnenkomst."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Verbinding direct dicht, ook als er nog segmenten onderweg zijn."""
+
+
+def parse_deepgram_result(message: dict[str, Any]) -> TranscriptSegment | None:
+    """Zet een Deepgram live `Results`-bericht om; None voor metadata en lege transcripties."""
+    if message.get("type") != "Results":
+        return None
+    alternatives = message.get("channel", {}).get("alternatives") or [{}]
+    text = (alternatives[0].get("transcript") or "").strip()
+    if not text:
+        return None
+    start = float(message.get("start", 0.0))
+    return TranscriptSegment(
+        text=text,
+        is_final=bool(message.get("is_final")),
+        start=round(start, 3),
+        end=round(start + float(message.get("duration", 0.0)), 3),
+    )
+
+
+class DeepgramLiveSession(LiveSTTSession):
+    def __init__(self, connection: Any) -> None:
+        self.connection = connection
+
+    async def send(self, chunk: bytes) -> None:
+        await self.connection.send(chunk)
+
+    async def finish(self) -> None:
+        try:
+            await self.connection.send(json.dumps({"type": "CloseStream"}))
+        except ConnectionClosed:
+            pass
+
+    async def results(self) -> AsyncIterator[TranscriptSegment]:
+        try:
+            async for message in self.connection:
+                if isinstance(message, bytes):
+                    continue
+                segment = parse_deepgram_result(json.loads(message))
+                if segment is not None:
+                    yield segment
+        except ConnectionClosed:
+            return
+
+    async def close(self) -> None:
+        await self.connection.close()
+
+
+class LiveSTTService:
+    """Opent streaming-sessies tegen Deepgram (of de lokale mock via `STT_BASE_URL`)."""
+
+    def __init__(self, *, base_url: Optional[str] = None) -> None:
+        self.settings = get_settings()
+        http_url = (base_url or self.settings.stt_base_url).rstrip("/")
+        # Zelfde host als de batch-transport, maar dan via ws(s)://.
+        self.url = "ws" + http_url[len("http"):] if http_url.startswith("http") else http_url
+
+    def _params(self, encoding: str | None, sample_rate: int | None) -> dict[str, str]:
+        params = {
+            "interim_results": "true",
+            "smart_format": "true",
+            "language": self.settings.live_stt_language,
+        }
+        # Zonder encoding detecteert Deepgram containers (webm/ogg uit MediaRecorder) zelf.
+        if encoding:
+            params["encoding"] = encoding
+            params["sample_rate"] = str(sample_rate or self.settings.stt_sample_rate)
+            params["channels"] = "1"
+        return params
+
+    async def open_session(self, *, encoding: str | None = None, sample_rate: int | None = None) -> LiveSTTSession:
+        connection = await asyncio.wait_for(
+            websockets.connect(
+                f"{self.url}/v1/listen?{urlencode(self._params(encoding, sample_rate))}",
+                extra_headers={"Authorization": f"Token {self.settings.deepgram_api_key}"},
+            ),
+            timeout=self.settings.live_stt_connect_timeout_seconds,
+        )
+        return DeepgramLiveSession(connection)
+
+
+live_stt_service = LiveSTTService()
@@ -0,0 +1,134 @@
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC + samengevouwen witruimte, zodat opnieuw geplakte tekst dezelfde hash krijgt."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+class LLMCache(DatabaseBound):
+    """Twee-laags cache voor LLM-resultaten: in-process LRU vóór de `llmCache` collectie (TTL).
+
+    De sleutel bevat tekst-hash, promptversie, model en trajectversie; een nieuwe prompt of
+    trajectdefinitie levert dus vanzelf nieuwe sleutels op. `invalidate` ruimt oude entries op.
+    """
+
+    def __init__(
+        self,
+        db: Optional[AsyncIOMotorDatabase] = None,
+        *,
+        max_entries: int | None = None,
+        ttl_seconds: int | None = None,
+    ) -> None:
+        settings = get_settings()
+        self.db = db
+        self.max_entries = max_entries or settings.llm_cache_max_entries
+        self.ttl_seconds = ttl_seconds or settings.llm_cache_ttl_seconds
+        self._memory: OrderedDict[str, tuple[float, dict[str, Any], Any]] = OrderedDict()
+        self.counters = {"memoryHits": 0, "mongoHits": 0, "misses": 0, "writes": 0, "invalidated": 0}
+
+    @property
+    def collection(self):
+        return self.db["llmCache"]
+
+    @staticmethod
+    def make_key(
+        *,
+        namespace: str,
+        text: str,
+        prompt_version: str,
+        model: str,
+        traject_version: str = "-",
+    ) -> tuple[str, dict[str, str]]:
+        text_hash = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        meta = {
+            "namespace": namespace,
+            "textHash": text_hash,
+            "promptVersion": prompt_version,
+            "model": model,
+            "trajectVersion": traject_version,
+        }
+        key = hashlib.sha256("|".join(meta.values()).encode("utf-8")).hexdigest()
+        return key, meta
+
+    def _remember(self, key: str, meta: dict[str, Any], value: Any) -> None:
+        self._memory[key] = (time.monotonic() + self.ttl_seconds, meta, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, _, value = entry
+            if expires_at > time.monotonic():
+                self._memory.move_to_end(key)
+                self.counters["memoryHits"] += 1
+                return value
+            del self._memory[key]
+
+        doc = await self.collection.find_one({"_id": key})
+        if doc and doc["createdAt"] > datetime.utcnow() - timedelta(seconds=self.ttl_seconds):
+            self.counters["mongoHits"] += 1
+            meta = {field: doc.get(field) for field in ("namespace", "promptVersion", "model", "trajectVersion", "trajectId")}
+            self._remember(key, meta, doc["value"])
+            return doc["value"]
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, meta: dict[str, Any], value: Any, *, traject_id: str | None = None) -> None:
+        meta = {**meta, "trajectId": traject_id}
+        self._remember(key, meta, value)
+        await self.collection.replace_one(
+            {"_id": key},
+            {**meta, "value": value, "createdAt": datetime.utcnow()},
+            upsert=True,
+        )
+        self.counters["writes"] += 1
+
+    async def invalidate(
+        self,
+        *,
+        namespace: str | None = None,
+        prompt_version: str | None = None,
+        traject_id: str | None = None,
+    ) -> int:
+        """Verwijdert entries na een prompt- of trajectwijziging; zonder filters alles."""
+        criteria = {
+            field: value
+            for field, value in (("namespace", namespace), ("promptVersion", prompt_version), ("trajectId", traject_id))
+            if value is not None
+        }
+        for key, (_, meta, _) in list(self._memory.items()):
+            if all(meta.get(field) == value for field, value in criteria.items()):
+                del self._memory[key]
+
+        result = await self.collection.delete_many(criteria)
+        self.counters["invalidated"] += result.deleted_count
+        return result.deleted_count
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.counters["memoryHits"] + self.counters["mongoHits"] + self.counters["misses"]
+        hits = self.counters["memoryHits"] + self.counters["mongoHits"]
+        return {
+            **self.counters,
+            "memoryEntries": len(self._memory),
+            "hitRatio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+llm_cache = LLMCache()
@@ -0,0 +1,147 @@
+import hashlib
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+from app.utils.dutch import words
+
+# Priemgetal > 2^32: (a * x) past in uint64 omdat zowel a als de crc32-shingle-hash < 2^32 zijn.
+_PRIME = np.uint64(4294967311)
+_SEED = 20240601
+
+
+@dataclass
+class DuplicateMatch:
+    evidence_id: str
+    candidate_id: str
+    similarity: float
+
+
+class MinHasher:
+    """MinHash over woord-shingles met `num_perm` universele hashfuncties (NumPy)."""
+
+    def __init__(self, *, num_perm: int, bands: int, shingle_size: int, min_shingles: int = 1) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm moet deelbaar zijn door bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_shingles = min_shingles
+        rng = np.random.default_rng(_SEED)
+        self._a = rng.integers(1, 2**32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2**32, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        tokens = words(text)
+        size = self.shingle_size
+        grams = {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+        return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray | None:
+        shingles = self.shingles(text)
+        # Te korte teksten geven toevallige overeenkomsten; die slaan we over.
+        if shingles.size < self.min_shingles:
+            return None
+        # (num_perm, n_shingles) in één keer; minimum per hashfunctie.
+        hashed = ((np.outer(self._a, shingles) % _PRIME) + self._b[:, None]) % _PRIME
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray) -> list[str]:
+        return [
+            f"{band}:{hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).hexdigest()}"
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarity(left: np.ndarray, right: np.ndarray) -> float:
+        return float((left == right).mean())
+
+
+class NearDuplicateIndex(DatabaseBound):
+    """LSH-index van MinHash-signaturen per tenant in `evidenceSignatures`.
+
+    Kandidaten komen uit een multikey-index op (tenantId, bands): alleen items die minstens één
+    band delen worden vergeleken, dus geen paarsgewijze scan over het hele corpus.
+    """
+
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None) -> None:
+        self.db = db
+        self.settings = get_settings()
+        self.hasher = MinHasher(
+            num_perm=self.settings.near_duplicate_num_perm,
+            bands=self.settings.near_duplicate_bands,
+            shingle_size=self.settings.near_duplicate_shingle_size,
+            min_shingles=self.settings.near_duplicate_min_shingles,
+        )
+
+    @property
+    def collection(self):
+        return self.db["evidenceSignatures"]
+
+    async def check_and_add(
+        self,
+        *,
+        tenant_id: str,
+        candidate_id: str,
+        evidence_id: str,
+        text: str,
+    ) -> list[DuplicateMatch]:
+        """Zoekt bijna-duplicaten van andere kandidaten en registreert daarna dit item."""
+        signature = await run_in_threadpool(self.hasher.signature, text)
+        if signature is None:
+            return []
+        bands = self.hasher.band_keys(signature)
+
+        matches: list[DuplicateMatch] = []
+        # Hergebruik binnen het eigen dossier is geen fraude; al in Mongo filteren, vóór de limit,
+        # anders vullen eigen bijna-identieke inzendingen de limit en vallen echte matches weg.
+        cursor = self.collection.find(
+            {"tenantId": tenant_id, "bands": {"$in": bands}, "candidateId": {"$ne": candidate_id}, "_id": {"$ne": evidence_id}},
+            {"candidateId": 1, "signature": 1},
+        ).limit(self.settings.near_duplicate_candidate_limit)
+        async for doc in cursor:
+            similarity = self.hasher.similarity(signature, np.frombuffer(doc["signature"], dtype=np.uint32))
+            if similarity >= self.settings.near_duplicate_threshold:
+                matches.append(DuplicateMatch(doc["_id"], doc["candidateId"], round(similarity, 3)))
+
+        await self.collection.replace_one(
+            {"_id": evidence_id},
+            {
+                "tenantId": tenant_id,
+                "candidateId": candidate_id,
+                "signature": signature.tobytes(),
+                "bands": bands,
+                "createdAt": datetime.utcnow(),
+            },
+            upsert=True,
+        )
+        matches.sort(key=lambda match: match.similarity, reverse=True)
+        return matches[: self.settings.near_duplicate_max_matches]
+
+    async def remove(self, evidence_id: str) -> None:
+        await self.collection.delete_one({"_id": evidence_id})
+
+
+def near_duplicate_flag(matches: list[DuplicateMatch]) -> dict[str, Any]:
+    return {
+        "type": "near_duplicate",
+        "message": "Tekst komt grotendeels overeen met eerder bewijs van een andere kandidaat.",
+        "score": max(match.similarity for match in matches),
+        "details": {
+            "matches": [
+                {"evidenceId": match.evidence_id, "candidateId": match.candidate_id, "similarity": match.similarity}
+                for match in matches
+            ]
+        },
+    }
+
+
+near_duplicate_index = NearDuplicateIndex()
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+from app.services.blob_store import BlobStore, blob_store
+from app.services.storage_backends import StorageBackend, get_storage_backend
+
+logger = logging.getLogger(__name__)
+
+
+class PendingUploadSweeper(DatabaseBound):
+    """Ruimt verlaten directe uploads op: multipart afbreken, staging-object weg, `pendingUploads` weg.
+
+    De TTL-index op `pendingUploads.createdAt` is alleen een vangnet; hij verwijdert het document
+    zonder de parts in de bucket op te ruimen, dus deze sweep moet ruim eerder draaien.
+    """
+
+    def __init__(
+        self,
+        db: Optional[AsyncIOMotorDatabase] = None,
+        backend: Optional[StorageBackend] = None,
+        blobs: Optional[BlobStore] = None,
+    ) -> None:
+        self.db = db
+        self.settings = get_settings()
+        self._backend = backend
+        self.blobs = blobs or blob_store
+
+    @property
+    def backend(self) -> StorageBackend:
+        return self._backend or get_storage_backend()
+
+    async def sweep(self, now: Optional[datetime] = None) -> int:
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=self.settings.pending_upload_max_age_seconds)
+        swept = 0
+        async for pending in self.db["pendingUploads"].find({"createdAt": {"$lt": cutoff}}):
+            try:
+                await self.backend.abort_multipart_upload(pending["stagingKey"], pending["multipartUploadId"])
+            except Exception as exc:
+                # Al afgerond of al afgebroken; dan staat er hooguit nog een staging-object.
+                logger.info("multipart %s niet afgebroken: %s", pending["_id"], exc)
+            try:
+                await self.backend.delete(pending["stagingKey"])
+            except Exception as exc:
+                logger.warning("staging-object %s niet verwijderd: %s", pending["stagingKey"], exc)
+                continue
+            await self.db["pendingUploads"].delete_one({"_id": pending["_id"]})
+            swept += 1
+        if swept:
+            logger.info("%s verlaten uploads opgeruimd", swept)
+        return swept
+
+    async def run(self) -> None:
+        """Periodieke sweep voor de worker; ruimt ook blobs op waarvan release() halverwege stopte."""
+        while True:
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("sweep van pendingUploads mislukt")
+            try:
+                await self.blobs.sweep_orphans()
+            except Exception:
+                logger.exception("sweep van verweesde blobs mislukt")
+            await asyncio.sleep(self.settings.pending_upload_sweep_seconds)
+
+
+pending_upload_sweeper = PendingUploadSweeper()
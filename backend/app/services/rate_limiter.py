@@ -0,0 +1,73 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+from app.core.config import get_settings
+
+
+class TokenBucket:
+    """Klassieke token bucket: `rate` per seconde bijvullen tot `capacity`; wachters gaan FIFO."""
+
+    def __init__(self, *, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wacht tot `amount` beschikbaar is; geeft de wachttijd in seconden terug."""
+        # Grotere aanvragen dan de bucket kan bevatten zouden nooit slagen.
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+@dataclass
+class _TenantBuckets:
+    requests: TokenBucket
+    tokens: TokenBucket
+
+
+class TenantRateLimiter:
+    """Per-tenant limiet op LLM-requests én -tokens per minuut (per proces)."""
+
+    def __init__(self) -> None:
+        self.settings = get_settings()
+        self._buckets: dict[str, _TenantBuckets] = {}
+
+    def _buckets_for(self, tenant_id: str) -> _TenantBuckets:
+        buckets = self._buckets.get(tenant_id)
+        if buckets is None:
+            limits = self.settings.tenant_llm_limits.get(tenant_id, {})
+            requests_per_minute = limits.get("requestsPerMinute", self.settings.llm_requests_per_minute)
+            tokens_per_minute = limits.get("tokensPerMinute", self.settings.llm_tokens_per_minute)
+            buckets = _TenantBuckets(
+                requests=TokenBucket(rate=requests_per_minute / 60, capacity=requests_per_minute),
+                tokens=TokenBucket(rate=tokens_per_minute / 60, capacity=tokens_per_minute),
+            )
+            self._buckets[tenant_id] = buckets
+        return buckets
+
+    async def acquire(self, tenant_id: str, *, requests: int = 1, tokens: int = 0) -> float:
+        buckets = self._buckets_for(tenant_id)
+        waited = await buckets.requests.acquire(requests)
+        if tokens:
+            waited += await buckets.tokens.acquire(tokens)
+        return waited
+
+
+tenant_rate_limiter = TenantRateLimiter()
@@ -0,0 +1,107 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from app.utils.tokens import count_tokens, truncate_to_tokens
+
+UNMAPPED_AREA_ID = "overig"
+OBSERVATIONS_AREA_ID = "observaties"
+
+
+@dataclass
+class AreaSlice:
+    """Het deel van het dossier dat bij één deskundigheidsgebied hoort."""
+
+    area_id: str
+    name: str
+    indicators: list[dict[str, Any]] = field(default_factory=list)
+    evidence: list[dict[str, Any]] = field(default_factory=list)
+    notes: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not self.evidence and not self.notes
+
+
+def split_by_area(
+    traject: dict[str, Any] | None,
+    evidence: list[dict[str, Any]],
+    assessments: list[dict[str, Any]],
+) -> list[AreaSlice]:
+    """Verdeelt bewijs over gebieden via `mappedIndicators`; notities zonder indicator apart."""
+    slices: dict[str, AreaSlice] = {}
+    area_for_indicator: dict[str, str] = {}
+    for area in (traject or {}).get("deskundigheidsgebieden", []):
+        slices[area["id"]] = AreaSlice(area["id"], area.get("name", area["id"]), indicators=area.get("indicators", []))
+        for indicator in area.get("indicators", []):
+            area_for_indicator[indicator["id"]] = area["id"]
+
+    def slice_for(area_id: str, name: str) -> AreaSlice:
+        return slices.setdefault(area_id, AreaSlice(area_id, name))
+
+    for item in evidence:
+        areas = {area_for_indicator.get(indicator) for indicator in item.get("mappedIndicators") or []}
+        areas.discard(None)
+        if not areas:
+            slice_for(UNMAPPED_AREA_ID, "Niet-gekoppeld bewijs").evidence.append(item)
+        for area_id in sorted(areas):
+            slices[area_id].evidence.append(item)
+
+    for assessment in assessments:
+        for note in assessment.get("notes") or []:
+            area_id = area_for_indicator.get(note.get("indicatorId"))
+            if area_id:
+                slices[area_id].notes.append(note)
+            else:
+                slice_for(OBSERVATIONS_AREA_ID, "Praktijkobservaties").notes.append(note)
+
+    return list(slices.values())
+
+
+def _sort_key(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value or "")
+
+
+def render_area(
+    area: AreaSlice,
+    *,
+    coverage: dict[str, Any],
+    budget_tokens: int,
+    item_token_limit: int,
+) -> str:
+    """Tekst voor de map-stap; nieuwste items eerst tot het tokenbudget op is.
+
+    De uitvoer is deterministisch, zodat een ongewijzigd gebied dezelfde cachesleutel houdt.
+    """
+    lines = [f"Deskundigheidsgebied {area.area_id}: {area.name}"]
+    for indicator in area.indicators:
+        covered = (coverage.get(indicator["id"]) or {}).get("covered", False)
+        lines.append(f"- indicator {indicator['id']} ({'gedekt' if covered else 'open'}): {indicator.get('label', '')}")
+    header = "\n".join(lines)
+
+    items: list[str] = []
+    for item in sorted(area.evidence, key=lambda doc: (_sort_key(doc.get("timestamp")), str(doc["_id"])), reverse=True):
+        body = item.get("transcript") or item.get("extractedText") or item.get("description") or ""
+        label = f"[bewijs {item['_id']} | {item.get('type', 'text')} | indicatoren: {', '.join(item.get('mappedIndicators') or []) or '-'}"
+        likelihood = item.get("aiGeneratedLikelihood")
+        if likelihood is not None and likelihood >= 0.7:
+            label += f" | AI-kans {likelihood:.2f}"
+        items.append(f"{label}]\n{truncate_to_tokens(body, item_token_limit)}")
+    for note in sorted(area.notes, key=lambda doc: _sort_key(doc.get("timestamp")), reverse=True):
+        items.append(f"[observatie {note.get('timestamp', '')}]\n{truncate_to_tokens(note.get('text', ''), item_token_limit)}")
+
+    used = count_tokens(header)
+    kept: list[str] = []
+    for text in items:
+        cost = count_tokens(text)
+        if used + cost > budget_tokens:
+            break
+        kept.append(text)
+        used += cost
+
+    parts = [header, *kept]
+    if len(kept) < len(items):
+        parts.append(f"({len(items) - len(kept)} oudere items weggelaten wegens tokenbudget)")
+    return "\n\n".join(parts)
@@ -0,0 +1,152 @@
+import asyncio
+import time
+import uuid
+from contextlib import aclosing, suppress
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+from app.services.ai_service import REPORT_PLACEHOLDER, AIService, ai_service
+from app.services.audit_service import audit_service
+
+# (event, data, id) — de id is de tekenpositie in het concept, bruikbaar als Last-Event-ID.
+ReportEvent = tuple[str, dict[str, Any], Optional[int]]
+
+
+class ReportStreamService(DatabaseBound):
+    """Streamt een conceptrapport en bewaart het tussentijds in `assessments`.
+
+    Eén verbinding tegelijk is producent (lease op het document); een herverbinding leest
+    de bewaarde tekst vanaf haar offset en neemt de generatie over zodra de lease verlopen is.
+    """
+
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None, ai: Optional[AIService] = None) -> None:
+        self.db = db
+        self.ai = ai or ai_service
+        self.settings = get_settings()
+
+    async def create_draft(self, *, tenant_id: str, candidate_id: str, assessor_id: str) -> dict[str, Any]:
+        doc = {
+            "tenantId": tenant_id,
+            "candidateId": candidate_id,
+            "assessorId": assessor_id,
+            "sessionMeta": {},
+            "notes": [],
+            "mediaIds": [],
+            "draftReportText": "",
+            "draftStatus": "streaming",
+            "draftLeaseId": None,
+            "draftLeaseUntil": None,
+            "createdAt": datetime.utcnow(),
+        }
+        result = await self.db["assessments"].insert_one(doc)
+        doc["_id"] = result.inserted_id
+        return doc
+
+    async def get_draft(self, assessment_id: str) -> dict[str, Any] | None:
+        return await self.db["assessments"].find_one({"_id": ObjectId(assessment_id)})
+
+    async def _acquire_lease(self, assessment_oid: ObjectId) -> str | None:
+        lease_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        doc = await self.db["assessments"].find_one_and_update(
+            {
+                "_id": assessment_oid,
+                "draftStatus": "streaming",
+                "$or": [{"draftLeaseUntil": None}, {"draftLeaseUntil": {"$lt": now}}],
+            },
+            {"$set": {"draftLeaseId": lease_id, "draftLeaseUntil": now + timedelta(seconds=self.settings.report_draft_lease_seconds)}},
+        )
+        return lease_id if doc else None
+
+    async def _save(self, assessment_oid: ObjectId, lease_id: str, text: str, *, status: str = "streaming", release: bool = False) -> None:
+        now = datetime.utcnow()
+        lease_until = now if release else now + timedelta(seconds=self.settings.report_draft_lease_seconds)
+        await self.db["assessments"].update_one(
+            {"_id": assessment_oid, "draftLeaseId": lease_id},
+            {"$set": {"draftReportText": text, "draftStatus": status, "draftUpdatedAt": now, "draftLeaseUntil": lease_until}},
+        )
+
+    async def events(self, draft: dict[str, Any], *, offset: int = 0) -> AsyncIterator[ReportEvent]:
+        """Levert eerst de bewaarde tekst vanaf `offset`, daarna live tokens tot `done`."""
+        assessment_oid = draft["_id"]
+        yield "meta", {"assessmentId": str(assessment_oid), "status": draft.get("draftStatus")}, None
+
+        while True:
+            doc = await self.db["assessments"].find_one(
+                {"_id": assessment_oid}, {"draftReportText": 1, "draftStatus": 1, "candidateId": 1, "tenantId": 1, "assessorId": 1}
+            )
+            if doc is None:
+                # Concept verwijderd terwijl de client nog meeleest.
+                yield "error", {"message": "Concept bestaat niet meer", "resumable": False}, None
+                return
+            text = doc.get("draftReportText") or ""
+            if offset > len(text):
+                # Client zag meer dan er bewaard is (producent viel weg vóór de flush): opnieuw opbouwen.
+                yield "reset", {"text": text}, len(text)
+            elif offset < len(text):
+                yield "delta", {"text": text[offset:]}, len(text)
+            offset = len(text)
+
+            if doc.get("draftStatus") != "streaming":
+                yield "done", {"assessmentId": str(assessment_oid), "length": len(text)}, len(text)
+                return
+
+            lease_id = await self._acquire_lease(assessment_oid)
+            if lease_id:
+                # aclosing: bij een verbroken verbinding moet de finally van de producent direct lopen.
+                async with aclosing(self._produce(doc, lease_id, text)) as produce:
+                    async for event in produce:
+                        yield event
+                return
+
+            # Een andere verbinding genereert nog; meelezen via de bewaarde tekst.
+            await asyncio.sleep(self.settings.report_draft_flush_seconds)
+
+    async def _produce(self, doc: dict[str, Any], lease_id: str, text: str) -> AsyncIterator[ReportEvent]:
+        assessment_oid = doc["_id"]
+        started_with = len(text)
+        last_flush = time.monotonic()
+        finished = False
+        try:
+            try:
+                async with aclosing(self.ai.stream_assessment_report(doc["candidateId"], partial_text=text)) as deltas:
+                    async for delta in deltas:
+                        text += delta
+                        yield "delta", {"text": delta}, len(text)
+                        if time.monotonic() - last_flush >= self.settings.report_draft_flush_seconds:
+                            await self._save(assessment_oid, lease_id, text)
+                            last_flush = time.monotonic()
+            except Exception as exc:
+                if text:
+                    # Deels gegenereerd: bewaren en lease vrijgeven zodat een herverbinding hervat.
+                    await self._save(assessment_oid, lease_id, text, release=True)
+                    finished = True
+                    yield "error", {"message": f"{type(exc).__name__}: {exc}"[:300], "resumable": True}, len(text)
+                    return
+                delta = REPORT_PLACEHOLDER
+                text += delta
+                yield "delta", {"text": delta}, len(text)
+
+            await self._save(assessment_oid, lease_id, text, status="complete", release=True)
+            finished = True
+            await audit_service.log(
+                tenant_id=doc["tenantId"],
+                user_id=doc["assessorId"],
+                action="assessment_draft_generated",
+                target_type="candidate",
+                target_id=doc["candidateId"],
+            )
+            yield "done", {"assessmentId": str(assessment_oid), "length": len(text), "resumedAt": started_with}, len(text)
+        finally:
+            if not finished:
+                # Client weg: laatste stand bewaren; de flush moet de annulering overleven.
+                with suppress(asyncio.CancelledError):
+                    await asyncio.shield(self._save(assessment_oid, lease_id, text, release=True))
+
+
+report_stream_service = ReportStreamService()
@@ -0,0 +1,270 @@
+import math
+import os
+import shutil
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import aiofiles
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+
+S3_MIN_PART_BYTES = 5 * 1024 * 1024
+S3_MAX_PARTS = 10_000
+
+
+class StorageBackend(ABC):
+    """Opslaglaag voor evidence-bytes; routers praten alleen met keys, niet met paden of buckets."""
+
+    supports_presigned_uploads: bool = False
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def put_file(self, key: str, source: Path, content_type: str) -> None:
+        """Neemt een lokaal (staging-)bestand over onder `key`; de bron verdwijnt daarbij."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    async def copy(self, source_key: str, destination_key: str) -> None: ...
+
+    @abstractmethod
+    async def size(self, key: str) -> int | None: ...
+
+    @abstractmethod
+    def open_stream(self, key: str, chunk_size: int) -> AsyncIterator[bytes]: ...
+
+    def local_path(self, key: str) -> Path | None:
+        """Pad op schijf als de backend dat heeft (voor FileResponse/sendfile)."""
+        return None
+
+    async def presigned_download_url(self, key: str, filename: str) -> str | None:
+        return None
+
+    async def create_multipart_upload(self, key: str, content_type: str, size_bytes: int) -> dict[str, Any]:
+        raise NotImplementedError("Backend ondersteunt geen pre-signed multipart uploads")
+
+    async def complete_multipart_upload(self, key: str, upload_id: str, parts: list[dict[str, Any]]) -> None:
+        raise NotImplementedError("Backend ondersteunt geen pre-signed multipart uploads")
+
+    async def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        raise NotImplementedError("Backend ondersteunt geen pre-signed multipart uploads")
+
+
+def _move(source: Path, destination: Path) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, destination)
+
+
+def _copy(source: Path, destination: Path) -> None:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(source, destination)
+
+
+def _size(path: Path) -> int | None:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return None
+
+
+class LocalStorageBackend(StorageBackend):
+    """Bewaart objecten onder een lokale map; standaard voor `APP_ENV=local`."""
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self.local_path(key).exists)
+
+    async def put_file(self, key: str, source: Path, content_type: str) -> None:
+        await run_in_threadpool(_move, source, self.local_path(key))
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(self.local_path(key).unlink, True)
+
+    async def copy(self, source_key: str, destination_key: str) -> None:
+        await run_in_threadpool(_copy, self.local_path(source_key), self.local_path(destination_key))
+
+    async def size(self, key: str) -> int | None:
+        return await run_in_threadpool(_size, self.local_path(key))
+
+    async def open_stream(self, key: str, chunk_size: int) -> AsyncIterator[bytes]:
+        async with aiofiles.open(self.local_path(key), "rb") as handle:
+            while chunk := await handle.read(chunk_size):
+                yield chunk
+
+
+class S3StorageBackend(StorageBackend):
+    """S3-compatibele backend (MinIO lokaal, S3/Blob-gateway in productie) via boto3."""
+
+    supports_presigned_uploads = True
+
+    def __init__(
+        self,
+        *,
+        bucket: str,
+        endpoint_url: str | None = None,
+        access_key: str | None = None,
+        secret_key: str | None = None,
+        region: str = "us-east-1",
+        presign_expiry_seconds: int = 3600,
+        part_bytes: int = 64 * 1024 * 1024,
+        client: Any = None,
+    ) -> None:
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.presign_expiry_seconds = presign_expiry_seconds
+        self.part_bytes = max(part_bytes, S3_MIN_PART_BYTES)
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            try:
+                import boto3
+                from botocore.config import Config
+            except ImportError as exc:  # pragma: no cover - afhankelijk van deployment
+                raise RuntimeError("STORAGE_BACKEND=s3 vereist het 'boto3' pakket") from exc
+
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                aws_access_key_id=self.access_key,
+                aws_secret_access_key=self.secret_key,
+                region_name=self.region,
+                config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+            )
+        return self._client
+
+    async def exists(self, key: str) -> bool:
+        return await self.size(key) is not None
+
+    async def size(self, key: str) -> int | None:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = await run_in_threadpool(self.client.head_object, Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return None
+            raise
+        return int(head["ContentLength"])
+
+    async def put_file(self, key: str, source: Path, content_type: str) -> None:
+        await run_in_threadpool(
+            self.client.upload_file,
+            str(source),
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": content_type},
+        )
+        await run_in_threadpool(source.unlink, True)
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    async def copy(self, source_key: str, destination_key: str) -> None:
+        # Managed copy splitst objecten > 5 GB automatisch in server-side UploadPartCopy.
+        await run_in_threadpool(
+            self.client.copy,
+            {"Bucket": self.bucket, "Key": source_key},
+            self.bucket,
+            destination_key,
+        )
+
+    async def open_stream(self, key: str, chunk_size: int) -> AsyncIterator[bytes]:
+        response = await run_in_threadpool(self.client.get_object, Bucket=self.bucket, Key=key)
+        body = response["Body"]
+        try:
+            while chunk := await run_in_threadpool(body.read, chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    async def presigned_download_url(self, key: str, filename: str) -> str:
+        return await run_in_threadpool(
+            self.client.generate_presigned_url,
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=self.presign_expiry_seconds,
+        )
+
+    def part_size_for(self, size_bytes: int) -> int:
+        return max(self.part_bytes, math.ceil(size_bytes / S3_MAX_PARTS))
+
+    async def create_multipart_upload(self, key: str, content_type: str, size_bytes: int) -> dict[str, Any]:
+        """Start een multipart upload en tekent één PUT-URL per part voor de browser."""
+        created = await run_in_threadpool(
+            self.client.create_multipart_upload,
+            Bucket=self.bucket,
+            Key=key,
+            ContentType=content_type,
+        )
+        upload_id = created["UploadId"]
+        part_size = self.part_size_for(size_bytes)
+        part_count = max(1, math.ceil(size_bytes / part_size))
+
+        def _sign_parts() -> list[dict[str, Any]]:
+            return [
+                {
+                    "partNumber": number,
+                    "url": self.client.generate_presigned_url(
+                        "upload_part",
+                        Params={"Bucket": self.bucket, "Key": key, "UploadId": upload_id, "PartNumber": number},
+                        ExpiresIn=self.presign_expiry_seconds,
+                    ),
+                }
+                for number in range(1, part_count + 1)
+            ]
+
+        parts = await run_in_threadpool(_sign_parts)
+        return {"uploadId": upload_id, "partSize": part_size, "parts": parts}
+
+    async def complete_multipart_upload(self, key: str, upload_id: str, parts: list[dict[str, Any]]) -> None:
+        await run_in_threadpool(
+            self.client.complete_multipart_upload,
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": int(part["partNumber"]), "ETag": part["etag"]}
+                    for part in sorted(parts, key=lambda part: int(part["partNumber"]))
+                ]
+            },
+        )
+
+    async def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        await run_in_threadpool(self.client.abort_multipart_upload, Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+
+@lru_cache
+def get_storage_backend() -> StorageBackend:
+    settings = get_settings()
+    if settings.storage_backend == "s3":
+        return S3StorageBackend(
+            bucket=settings.s3_bucket,
+            endpoint_url=settings.s3_endpoint_url,
+            access_key=settings.s3_access_key,
+            secret_key=settings.s3_secret_key,
+            region=settings.s3_region,
+            presign_expiry_seconds=settings.s3_presign_expiry_seconds,
+            part_bytes=settings.s3_multipart_part_bytes,
+        )
+    return LocalStorageBackend(settings.local_storage_root)
@@ -1,33 +1,134 @@
-import httpx
+import asyncio
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+import aiofiles
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import get_settings
+from app.services.audio_segments import AudioSegment, plan_segments, read_segment, spool_audio, stitch_segments, to_wav
+from app.services.http_client import HTTPClientPool
+from app.services.llm_cache import LLMCache, llm_cache
+from app.services.stt_transport import DeepgramTransport, STTTransport
+
+# Verhoog bij andere Deepgram-parameters zodat gecachete segmenten niet meer matchen.
+STT_SEGMENT_VERSION = "deepgram-smart-v1"
+STT_UNAVAILABLE = {"transcript": "Transcriptie niet beschikbaar; voer handmatige notities in."}
+
+
+class TranscriptionIncomplete(Exception):
+    """Niet alle segmenten zijn getranscribeerd; de job moet opnieuw (gelukte segmenten staan in de cache)."""
+
+    def __init__(self, failed: list[int], total: int) -> None:
+        super().__init__(f"{len(failed)} van {total} segmenten niet getranscribeerd: {failed}")
+        self.failed = failed
+
+
+def _alternative(result: dict[str, Any]) -> dict[str, Any]:
+    alternative = result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0]
+    return {"transcript": alternative.get("transcript", ""), "words": alternative.get("words", [])}
 
 
 class STTService:
-    """Zorgt dat praktijk-audio snel transcript wordt voor indicator-mapping."""
+    """Zorgt dat praktijk-audio snel transcript wordt voor indicator-mapping.
+
+    Lange opnames worden in overlappende segmenten geknipt en begrensd parallel getranscribeerd;
+    segmentresultaten staan in de cache op content-hash, zodat een retry alleen mislukte segmenten overdoet.
+    Mist er een segment, dan volgt `TranscriptionIncomplete` in plaats van een transcript met gaten.
+    """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        http: Optional[HTTPClientPool] = None,
+        *,
+        transport: Optional[STTTransport] = None,
+        cache: Optional[LLMCache] = None,
+    ) -> None:
+        self.transport = transport or DeepgramTransport(http)
+        self.cache = cache or llm_cache
         self.settings = get_settings()
 
-    async def transcribe_audio(self, file_bytes: bytes, mimetype: str = "audio/mpeg") -> dict:
+    async def transcribe_audio(self, audio: bytes | AsyncIterable[bytes], mimetype: str = "audio/mpeg") -> dict:
         """Stuurt audio naar Deepgram zodat assessor-notities direct bruikbaar zijn."""
-        url = "https://api.deepgram.com/v1/listen"
-        headers = {
-            "Authorization": f"Token {self.settings.deepgram_api_key}",
-            "Content-Type": mimetype,
-        }
+        with tempfile.TemporaryDirectory(prefix="stt-") as directory:
+            source = await spool_audio(audio, Path(directory))
+            wav = await to_wav(source, ffmpeg=self.settings.stt_ffmpeg_path, sample_rate=self.settings.stt_sample_rate)
+            if wav is None:
+                # Niet te decoderen (geen ffmpeg): als geheel streamen; duur onbekend.
+                return await self._transcribe_whole(source, mimetype)
+
+            segments = await run_in_threadpool(
+                plan_segments,
+                wav,
+                segment_seconds=self.settings.stt_segment_seconds,
+                overlap_seconds=self.settings.stt_overlap_seconds,
+            )
+            if len(segments) <= 1:
+                duration = segments[0].duration_seconds if segments else 0.0
+                return await self._transcribe_whole(source, mimetype, duration_seconds=duration)
+
+            semaphore = asyncio.Semaphore(self.settings.stt_concurrency)
+
+            async def run(segment: AudioSegment) -> dict[str, Any] | None:
+                async with semaphore:
+                    return await self._transcribe_segment(wav, segment)
+
+            results = await asyncio.gather(*(run(segment) for segment in segments))
+
+        failed = [segment.index for segment, result in zip(segments, results) if result is None]
+        if failed:
+            raise TranscriptionIncomplete(failed, len(segments))
+        return stitch_segments(segments, results)
+
+    def whole_timeout(self, size_bytes: int, duration_seconds: float | None = None) -> float:
+        """Timeout voor één request met de hele opname: de segmenttimeout per `STT_SEGMENT_SECONDS` audio.
+
+        Zonder decoder is de duur onbekend; dan schatten we die uit de grootte via `STT_WHOLE_BYTES_PER_SECOND`.
+        """
+        if duration_seconds is None:
+            duration_seconds = size_bytes / self.settings.stt_whole_bytes_per_second
+        return self.settings.stt_segment_timeout_seconds * max(1.0, duration_seconds / self.settings.stt_segment_seconds)
+
+    async def _transcribe_whole(self, source: Path, mimetype: str, *, duration_seconds: float | None = None) -> dict:
+        timeout = self.whole_timeout(source.stat().st_size, duration_seconds)
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    url,
-                    headers=headers,
-                    content=file_bytes,
-                    params={"smart_format": "true"},
-                )
-                response.raise_for_status()
-                return response.json()
+            return await self.transport.transcribe(_read_chunks(source, self.settings.upload_chunk_bytes), mimetype, timeout=timeout)
         except Exception:
-            return {"transcript": "Transcriptie niet beschikbaar; voer handmatige notities in."}
+            return dict(STT_UNAVAILABLE)
+
+    async def _transcribe_segment(self, wav: Path, segment: AudioSegment) -> dict[str, Any] | None:
+        data = await run_in_threadpool(read_segment, wav, segment)
+        cache_key, cache_meta = self.cache.make_key(
+            namespace="stt_segment",
+            text=hashlib.sha256(data).hexdigest(),
+            prompt_version=STT_SEGMENT_VERSION,
+            model="deepgram",
+        )
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        for attempt in range(self.settings.stt_segment_attempts):
+            try:
+                result = await self.transport.transcribe(
+                    data, "audio/wav", timeout=self.settings.stt_segment_timeout_seconds
+                )
+            except Exception:
+                if attempt + 1 < self.settings.stt_segment_attempts:
+                    await asyncio.sleep(min(2**attempt, 10))
+                continue
+            alternative = _alternative(result)
+            await self.cache.set(cache_key, cache_meta, alternative)
+            return alternative
+        return None
+
+
+async def _read_chunks(path: Path, chunk_size: int) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, "rb") as handle:
+        while chunk := await handle.read(chunk_size):
+            yield chunk
 
 
 stt_service = STTService()
@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterable, Optional
+
+from app.core.config import get_settings
+from app.services.http_client import HTTPClientPool, http_client_pool
+
+
+class STTTransport(ABC):
+    """Eén transcriptie-request; verwisselbaar zodat tests tegen een lokale mock-server kunnen."""
+
+    @abstractmethod
+    async def transcribe(self, audio: bytes | AsyncIterable[bytes], mimetype: str, *, timeout: float) -> dict[str, Any]:
+        """Geeft een Deepgram-achtig antwoord terug; gooit bij fouten."""
+
+
+class DeepgramTransport(STTTransport):
+    def __init__(self, http: Optional[HTTPClientPool] = None, *, base_url: str | None = None) -> None:
+        self.http = http or http_client_pool
+        self.settings = get_settings()
+        self.base_url = (base_url or self.settings.stt_base_url).rstrip("/")
+
+    async def transcribe(self, audio: bytes | AsyncIterable[bytes], mimetype: str, *, timeout: float) -> dict[str, Any]:
+        response = await self.http.client.post(
+            f"{self.base_url}/v1/listen",
+            headers={
+                "Authorization": f"Token {self.settings.deepgram_api_key}",
+                "Content-Type": mimetype,
+            },
+            content=audio,
+            params={"smart_format": "true"},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,101 @@
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.utils.dutch import DUTCH_FUNCTION_WORDS, words
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+_FIRST_PERSON = frozenset({"ik", "mij", "me", "mijn", "wij", "we", "ons", "onze"})
+MATTR_WINDOW = 50
+
+FEATURE_NAMES = (
+    "burstiness",
+    "sentenceLengthStd",
+    "typeTokenRatio",
+    "commaRate",
+    "colonSemicolonRate",
+    "exclamationQuestionRate",
+    "dashRate",
+    "functionWordRate",
+    "firstPersonRate",
+    "meanWordLength",
+    "lowercaseSentenceStarts",
+)
+
+# Heuristische priors (gemiddelde/spreiding van menselijke Nederlandse bewijsteksten en
+# richting richting AI-tekst). Herijken zodra er gelabelde evidence beschikbaar is.
+_MEAN = np.array([0.55, 7.0, 0.72, 0.06, 0.008, 0.01, 0.002, 0.42, 0.05, 5.0, 0.05], dtype=np.float64)
+_STD = np.array([0.2, 3.5, 0.08, 0.03, 0.008, 0.012, 0.004, 0.06, 0.03, 0.6, 0.08], dtype=np.float64)
+_WEIGHTS = np.array([-1.1, -0.6, 0.3, 0.35, 0.45, -0.5, 0.6, -0.35, -0.7, 0.55, -0.6], dtype=np.float64)
+_BIAS = -0.2
+
+
+@dataclass
+class StyleScore:
+    likelihood: float
+    word_count: int
+    features: dict[str, float]
+
+
+def _mattr(tokens: list[str]) -> float:
+    """Moving-average type-token ratio; minder lengte-afhankelijk dan gewone TTR."""
+    if len(tokens) <= MATTR_WINDOW:
+        return len(set(tokens)) / max(len(tokens), 1)
+    ids = np.unique(np.array(tokens), return_inverse=True)[1]
+    windows = np.lib.stride_tricks.sliding_window_view(ids, MATTR_WINDOW)
+    # Aantal unieke waarden per venster via sorteren en tellen van overgangen.
+    sorted_windows = np.sort(windows, axis=1)
+    unique_counts = 1 + (np.diff(sorted_windows, axis=1) != 0).sum(axis=1)
+    return float(unique_counts.mean() / MATTR_WINDOW)
+
+
+def _raw_features(text: str) -> tuple[np.ndarray, int]:
+    tokens = words(text)
+    word_count = len(tokens)
+    sentences = [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence.strip()]
+    lengths = np.array([len(words(sentence)) for sentence in sentences] or [0], dtype=np.float64)
+    lengths = lengths[lengths > 0] if (lengths > 0).any() else lengths
+    mean_length = lengths.mean() if lengths.size else 0.0
+
+    per_word = max(word_count, 1)
+    token_array = np.array(tokens or [""])
+    features = np.array(
+        [
+            lengths.std() / mean_length if mean_length else 0.0,
+            lengths.std(),
+            _mattr(tokens),
+            text.count(",") / per_word,
+            (text.count(":") + text.count(";")) / per_word,
+            (text.count("!") + text.count("?")) / per_word,
+            (text.count("—") + text.count("–") + text.count(" - ")) / per_word,
+            np.isin(token_array, list(DUTCH_FUNCTION_WORDS)).sum() / per_word,
+            np.isin(token_array, list(_FIRST_PERSON)).sum() / per_word,
+            float(np.char.str_len(token_array).mean()) if tokens else 0.0,
+            sum(1 for sentence in sentences if sentence.lstrip()[:1].islower()) / max(len(sentences), 1),
+        ],
+        dtype=np.float64,
+    )
+    return features, word_count
+
+
+def score_batch(texts: list[str]) -> list[StyleScore]:
+    """Stilometrische AI-waarschijnlijkheid voor een batch teksten (logistisch model, gevectoriseerd)."""
+    if not texts:
+        return []
+    rows = [_raw_features(text) for text in texts]
+    matrix = np.vstack([features for features, _ in rows])
+    z = np.clip((matrix - _MEAN) / _STD, -4.0, 4.0)
+    likelihoods = 1.0 / (1.0 + np.exp(-(z @ _WEIGHTS + _BIAS)))
+    return [
+        StyleScore(
+            likelihood=round(float(likelihood), 4),
+            word_count=word_count,
+            features={name: round(float(value), 4) for name, value in zip(FEATURE_NAMES, features)},
+        )
+        for likelihood, (features, word_count) in zip(likelihoods, rows)
+    ]
+
+
+def score(text: str) -> StyleScore:
+    return score_batch([text])[0]
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.config import get_settings
+from app.db.mongo import DatabaseBound
+from app.models.traject import Traject
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndicatorRef:
+    area_id: str
+    area_name: str
+    label: str
+
+
+@dataclass
+class CatalogEntry:
+    """Eén traject zoals gelezen uit Mongo, plus alles wat lezers er telkens van afleidden."""
+
+    doc: dict[str, Any]
+    traject: Traject | None
+    version: str
+    body: bytes | None
+    etag: str
+    indicators: dict[str, IndicatorRef] = field(default_factory=dict)
+
+    @property
+    def traject_id(self) -> str:
+        return self.doc["_id"]
+
+
+def _lookup_id(traject_id: str) -> Any:
+    try:
+        return ObjectId(traject_id)
+    except (InvalidId, TypeError):
+        return traject_id
+
+
+def build_entry(doc: dict[str, Any]) -> CatalogEntry:
+    doc = {**doc, "_id": str(doc["_id"])}
+    version = str(doc.get("version") or doc.get("updatedAt") or "0")
+    indicators = {
+        str(indicator.get("id")): IndicatorRef(str(area.get("id")), area.get("name", ""), indicator.get("label", ""))
+        for area in doc.get("deskundigheidsgebieden", [])
+        for indicator in area.get("indicators", [])
+    }
+    try:
+        traject: Traject | None = Traject.model_validate(doc)
+    except ValidationError as exc:
+        logger.warning("traject %s voldoet niet aan het model: %s", doc["_id"], exc)
+        traject = None
+
+    body = traject.model_dump_json(by_alias=True).encode() if traject is not None else None
+    digest = hashlib.sha256(body or json.dumps(doc, default=str, sort_keys=True).encode()).hexdigest()[:32]
+    return CatalogEntry(doc=doc, traject=traject, version=version, body=body, etag=f'"{digest}"', indicators=indicators)
+
+
+def list_etag(entries: list[CatalogEntry]) -> str:
+    digest = hashlib.sha256(",".join(entry.etag for entry in entries).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+class TrajectCatalog(DatabaseBound):
+    """Cache van trajecten per proces, geïnvalideerd via een change stream op `trajecten`.
+
+    Zonder replica set (geen change streams) pollen we een vingerafdruk van de volledige
+    documenten; niet elke schrijver verhoogt `version`/`updatedAt`. Zolang er geen watcher
+    draait (scripts, of de stream is even weg) lezen we gewoon door naar Mongo.
+    """
+
+    def __init__(self, db: Optional[AsyncIOMotorDatabase] = None) -> None:
+        self.db = db
+        self.settings = get_settings()
+        self._entries: dict[str, CatalogEntry | None] = {}
+        self._lists: dict[tuple[str, str | None], list[str]] = {}
+        self._generation = 0
+        self._live = False
+        self._task: asyncio.Task | None = None
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def collection(self):
+        return self.db["trajecten"]
+
+    def invalidate(self, traject_id: str | None = None) -> None:
+        """Zonder id alles; met id dat traject en alle lijsten (die zijn klein)."""
+        self._generation += 1
+        self.counters["invalidations"] += 1
+        if traject_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(traject_id, None)
+        self._lists.clear()
+
+    async def get(self, traject_id: str) -> CatalogEntry | None:
+        traject_id = str(traject_id)
+        if self._live and traject_id in self._entries:
+            self.counters["hits"] += 1
+            return self._entries[traject_id]
+
+        self.counters["misses"] += 1
+        generation = self._generation
+        doc = await self.collection.find_one({"_id": _lookup_id(traject_id)})
+        entry = build_entry(doc) if doc else None
+        # Alleen bewaren als er tijdens het lezen geen invalidatie langskwam.
+        if self._live and generation == self._generation:
+            self._entries[traject_id] = entry
+        return entry
+
+    async def list_for(self, tenant_id: str, domain: str | None = None) -> list[CatalogEntry]:
+        key = (tenant_id, domain)
+        if self._live and key in self._lists:
+            ids = self._lists[key]
+            if all(self._entries.get(traject_id) is not None for traject_id in ids):
+                self.counters["hits"] += 1
+                return [self._entries[traject_id] for traject_id in ids]
+
+        self.counters["misses"] += 1
+        generation = self._generation
+        query: dict[str, Any] = {"tenantId": tenant_id}
+        if domain is not None:
+            query["domain"] = domain
+        docs = await self.collection.find(query).to_list(length=100)
+        entries = [build_entry(doc) for doc in docs]
+        if self._live and generation == self._generation:
+            for entry in entries:
+                self._entries[entry.traject_id] = entry
+            self._lists[key] = [entry.traject_id for entry in entries]
+        return entries
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        self._live = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.invalidate()
+
+    async def _watch(self) -> None:
+        while True:
+            try:
+                async with self.collection.watch() as stream:
+                    # Wijzigingen van vóór de stream kennen we niet: begin leeg.
+                    self.invalidate()
+                    self._live = True
+                    async for change in stream:
+                        key = change.get("documentKey", {}).get("_id")
+                        self.invalidate(str(key) if key is not None and change["operationType"] != "invalidate" else None)
+            except OperationFailure as exc:
+                logger.info("geen change streams beschikbaar (%s); traject-cache pollt", exc)
+                self._live = False
+                await self._poll()
+                return
+            except PyMongoError as exc:
+                logger.warning("change stream op trajecten onderbroken: %s", exc)
+            self._live = False
+            self.invalidate()
+            await asyncio.sleep(self.settings.traject_cache_retry_seconds)
+
+    async def _fingerprint(self) -> str:
+        # Trajecten zijn klein en weinig; de hele inhoud hashen is goedkoop genoeg.
+        digest = hashlib.sha256()
+        async for doc in self.collection.find({}).sort("_id", 1):
+            digest.update(json.dumps(doc, default=str, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    async def _poll(self) -> None:
+        previous: str | None = None
+        while True:
+            try:
+                current = await self._fingerprint()
+                if current != previous:
+                    self.invalidate()
+                    previous = current
+                self._live = True
+            except PyMongoError as exc:
+                logger.warning("polling van trajecten mislukt: %s", exc)
+                self._live = False
+                previous = None
+            await asyncio.sleep(self.settings.traject_cache_poll_seconds)
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.counters, "live": self._live, "entries": len(self._entries)}
+
+
+traject_catalog = TrajectCatalog()
@@ -0,0 +1,88 @@
+import hashlib
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+
+
+@dataclass
+class StagedUpload:
+    """Upload dat volledig naar staging is gekopieerd, met checksum en grootte."""
+
+    path: Path
+    checksum: str
+    size_bytes: int
+    content_type: str
+    filename: str
+
+
+def _open_for_write(path: Path) -> BinaryIO:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path.open("wb")
+
+
+def _write_chunk(handle: BinaryIO, digest: "hashlib._Hash", chunk: bytes) -> None:
+    digest.update(chunk)
+    handle.write(chunk)
+
+
+class UploadService:
+    """Kopieert uploads in vaste chunks naar opslag zodat grote video's het geheugen niet vullen."""
+
+    def __init__(self) -> None:
+        self.settings = get_settings()
+
+    def limit_for(self, tenant_id: str) -> int:
+        """Maximale uploadgrootte in bytes; tenant-specifieke limiet gaat voor de default."""
+        return self.settings.tenant_upload_limits.get(tenant_id, self.settings.max_upload_bytes)
+
+    async def stage(self, upload: UploadFile, *, tenant_id: str) -> StagedUpload:
+        """Streamt de upload naar een staging-bestand en berekent SHA-256 + bytecount onderweg."""
+        limit = self.limit_for(tenant_id)
+        chunk_size = self.settings.upload_chunk_bytes
+        staging_path = Path(self.settings.upload_staging_dir) / tenant_id / f"{uuid.uuid4().hex}.part"
+
+        digest = hashlib.sha256()
+        size = 0
+        handle = await run_in_threadpool(_open_for_write, staging_path)
+        try:
+            while chunk := await upload.read(chunk_size):
+                size += len(chunk)
+                if size > limit:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Upload exceeds tenant limit of {limit} bytes",
+                    )
+                await run_in_threadpool(_write_chunk, handle, digest, chunk)
+        except BaseException:
+            await run_in_threadpool(handle.close)
+            await run_in_threadpool(staging_path.unlink, True)
+            raise
+        await run_in_threadpool(handle.close)
+
+        return StagedUpload(
+            path=staging_path,
+            checksum=digest.hexdigest(),
+            size_bytes=size,
+            content_type=upload.content_type or "application/octet-stream",
+            filename=upload.filename or "upload.bin",
+        )
+
+    async def checksum_stream(self, chunks: AsyncIterator[bytes]) -> str:
+        """SHA-256 over een stream, bijv. een object dat de browser direct in de bucket heeft gezet."""
+        digest = hashlib.sha256()
+        async for chunk in chunks:
+            # Hashen van MB-chunks blokkeert anders de event loop; hashlib geeft de GIL vrij.
+            await run_in_threadpool(digest.update, chunk)
+        return digest.hexdigest()
+
+    async def discard(self, staged: StagedUpload) -> None:
+        await run_in_threadpool(staged.path.unlink, True)
+
+
+upload_service = UploadService()
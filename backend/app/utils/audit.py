@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any
 
-from app.db.mongo import get_database
+from app.services.audit_service import audit_service
 
 
 async def audit_log(
@@ -17,7 +17,6 @@ async def audit_log(
     ip_address: str | None = None,
     user_agent: str | None = None,
 ) -> None:
-    db = get_database()
     payload = {
         "tenantId": tenant_id,
         "actorId": actor_id,
@@ -31,4 +30,4 @@ async def audit_log(
         "userAgent": user_agent,
         "createdAt": datetime.utcnow(),
     }
-    await db["auditLogs"].insert_one(payload)
+    await audit_service.write(payload)
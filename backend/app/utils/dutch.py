@@ -0,0 +1,26 @@
+import re
+import unicodedata
+
+_WORD = re.compile(r"[^\W\d_]+(?:[-'][^\W\d_]+)*", re.UNICODE)
+
+# Veelvoorkomende Nederlandse functiewoorden; niet informatief voor inhoudelijke matching.
+DUTCH_FUNCTION_WORDS = frozenset(
+    """
+    aan al alle als bij dan dat de deze die dit door een en er ge geen had heb hebben heeft het hier hij
+    hoe hun ik in is je kan kon maar me meer men met mij mijn na naar niet niets nog nu of om omdat ons
+    ook op over te tegen toch toen tot u uit van veel voor want was wat we wel werd wie wij wordt worden
+    zal ze zelf zich zij zijn zo zonder zou
+    """.split()
+)
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def words(text: str) -> list[str]:
+    return _WORD.findall(normalize(text))
+
+
+def content_words(text: str) -> list[str]:
+    return [word for word in words(text) if len(word) > 1 and word not in DUTCH_FUNCTION_WORDS]
@@ -0,0 +1,232 @@
+import os
+import secrets
+import stat
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from pathlib import Path
+from urllib.parse import quote
+
+import anyio
+from fastapi import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+CHUNK_SIZE = 256 * 1024
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def etag_matches(header: str | None, etag: str, *, weak: bool = True) -> bool:
+    """Vergelijkt een If-None-Match / If-Range header met onze ETag."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if weak:
+            candidate = candidate.removeprefix("W/")
+        if candidate == (opaque if weak else etag):
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    """RFC 9110 conditional GET: If-None-Match gaat voor If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def parse_range_header(header: str, size: int) -> list[tuple[int, int]]:
+    """Parseert `bytes=a-b,c-,-n` naar inclusieve (start, end) paren binnen het bestand."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        raise RangeNotSatisfiable(header)
+
+    ranges: list[tuple[int, int]] = []
+    for part in spec.split(","):
+        start_text, sep, end_text = part.strip().partition("-")
+        if not sep:
+            raise RangeNotSatisfiable(header)
+        try:
+            if start_text == "":
+                suffix = int(end_text)
+                if suffix <= 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+            else:
+                start = int(start_text)
+                end = int(end_text) if end_text else size - 1
+        except ValueError as exc:
+            raise RangeNotSatisfiable(header) from exc
+        if start > end or start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    if not ranges or len(ranges) > MAX_RANGES:
+        raise RangeNotSatisfiable(header)
+
+    # Overlappende of aansluitende ranges samenvoegen (RFC 9110 §14.2)
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RangeFileResponse(Response):
+    """206-response voor één of meer byte-ranges; gebruikt zero-copy sendfile als de server dat kan."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        ranges: list[tuple[int, int]],
+        size: int,
+        media_type: str,
+        headers: dict[str, str],
+    ) -> None:
+        self.path = path
+        self.ranges = ranges
+        self.size = size
+        self.status_code = 206
+        self.background = None
+        self.boundary = secrets.token_hex(12)
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self.media_type = media_type
+            self.parts = [(b"", start, end)]
+            headers = {**headers, "content-range": f"bytes {start}-{end}/{size}"}
+            content_length = end - start + 1
+        else:
+            self.media_type = f"multipart/byteranges; boundary={self.boundary}"
+            self.parts = [
+                (
+                    (
+                        f"--{self.boundary}\r\n"
+                        f"Content-Type: {media_type}\r\n"
+                        f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                    ).encode("latin-1"),
+                    start,
+                    end,
+                )
+                for start, end in ranges
+            ]
+            self.trailer = f"\r\n--{self.boundary}--\r\n".encode("latin-1")
+            content_length = (
+                sum(len(preamble) + end - start + 1 for preamble, start, end in self.parts)
+                + 2 * (len(self.parts) - 1)
+                + len(self.trailer)
+            )
+        self.init_headers({**headers, "content-length": str(content_length)})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+        multipart = len(self.parts) > 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            for index, (preamble, start, end) in enumerate(self.parts):
+                if index > 0:
+                    preamble = b"\r\n" + preamble
+                if preamble:
+                    await send({"type": "http.response.body", "body": preamble, "more_body": True})
+                if zerocopy:
+                    await send(
+                        {
+                            "type": ZEROCOPY_EXTENSION,
+                            "file": file.wrapped,
+                            "offset": start,
+                            "count": end - start + 1,
+                            "more_body": True,
+                        }
+                    )
+                else:
+                    await file.seek(start)
+                    remaining = end - start + 1
+                    while remaining > 0:
+                        chunk = await file.read(min(CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        remaining -= len(chunk)
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        trailer = self.trailer if multipart else b""
+        await send({"type": "http.response.body", "body": trailer, "more_body": False})
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+async def file_response(
+    request: Request,
+    path: Path,
+    *,
+    etag: str | None,
+    filename: str,
+    media_type: str | None = None,
+) -> Response:
+    """Serveert een bestand met ETag, conditional GET en (multi-)range ondersteuning.
+
+    Zonder checksum valt de ETag terug op een zwakke variant op basis van mtime en grootte.
+    """
+    stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise FileNotFoundError(path)
+    if etag is None:
+        etag = f'W/"{int(stat_result.st_mtime)}-{stat_result.st_size}"'
+
+    size = stat_result.st_size
+    last_modified = datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc)
+    media_type = media_type or guess_type(filename)[0] or "application/octet-stream"
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+        "cache-control": "private, max-age=0, must-revalidate",
+        "content-disposition": _content_disposition(filename),
+    }
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers={key: headers[key] for key in ("etag", "last-modified", "cache-control")})
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or etag_matches(if_range, etag, weak=False)):
+        try:
+            ranges = parse_range_header(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={"content-range": f"bytes */{size}", "etag": etag})
+        return RangeFileResponse(path, ranges=ranges, size=size, media_type=media_type, headers=headers)
+
+    # Volledige response: FileResponse gebruikt `http.response.pathsend` als de server dat ondersteunt
+    return FileResponse(path, headers=headers, media_type=media_type, stat_result=stat_result)
@@ -0,0 +1,49 @@
+import base64
+import binascii
+from typing import Any
+
+from bson import json_util
+from starlette.datastructures import URL
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_value: Any, doc_id: Any) -> str:
+    """Opaque cursor voor keyset-paginatie; bson-json houdt datetime en ObjectId intact."""
+    raw = json_util.dumps({"v": sort_value, "i": doc_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json_util.loads(raw)
+        return data["v"], data["i"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def keyset_filter(field: str, cursor: str | None, *, descending: bool = True) -> dict[str, Any]:
+    """Filter voor 'alles na de cursor' bij sortering op (field, _id)."""
+    if not cursor:
+        return {}
+    value, doc_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    return {"$or": [{field: {op: value}}, {field: value, "_id": {op: doc_id}}]}
+
+
+def keyset_sort(field: str, *, descending: bool = True) -> list[tuple[str, int]]:
+    direction = -1 if descending else 1
+    return [(field, direction), ("_id", direction)]
+
+
+def next_page_headers(url: URL, cursor: str | None) -> dict[str, str]:
+    """`Link: rel="next"` plus `X-Next-Cursor`, zodat de body een gewone lijst kan blijven."""
+    if cursor is None:
+        return {}
+    return {
+        "link": f'<{url.include_query_params(cursor=cursor)}>; rel="next"',
+        "x-next-cursor": cursor,
+    }
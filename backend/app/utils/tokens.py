@@ -0,0 +1,33 @@
+from functools import lru_cache
+from typing import Any
+
+# gpt-4o(-mini) gebruikt o200k_base; zonder tiktoken-bestanden vallen we terug op ~4 tekens/token.
+ENCODING_NAME = "o200k_base"
+
+
+@lru_cache
+def _encoding() -> Any | None:
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Knipt tekst af op een tokengrens zodat een prompt binnen budget blijft."""
+    encoding = _encoding()
+    if encoding is None:
+        return text[: max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
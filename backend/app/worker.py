@@ -0,0 +1,176 @@
+"""Worker entrypoint: `python -m app.worker` verwerkt jobs uit de `jobs` collectie."""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+from typing import Any, Awaitable, Callable
+
+from app.core.config import get_settings
+from app.db import mongo
+from app.services.audit_service import audit_service
+from app.services.coverage import RECOMPUTE_COVERAGE_JOB, coverage_service
+from app.services.evidence_processor import PROCESS_EVIDENCE_JOB, evidence_processor
+from app.services.http_client import http_client_pool
+from app.services.job_queue import JOB_DEAD, JobQueue, job_queue
+from app.services.pending_uploads import pending_upload_sweeper
+from app.services.traject_catalog import traject_catalog
+
+logger = logging.getLogger("skillval.worker")
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+DeadLetterHandler = Callable[[dict[str, Any], str], Awaitable[None]]
+
+HANDLERS: dict[str, JobHandler] = {
+    PROCESS_EVIDENCE_JOB: evidence_processor.handle_job,
+    RECOMPUTE_COVERAGE_JOB: coverage_service.handle_job,
+}
+DEAD_LETTER_HANDLERS: dict[str, DeadLetterHandler] = {
+    PROCESS_EVIDENCE_JOB: evidence_processor.handle_dead_job,
+}
+
+
+class Worker:
+    """Draait `concurrency` slots die elk een job leasen, uitvoeren en afronden."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        *,
+        concurrency: int,
+        poll_interval: float,
+        kinds: list[str] | None = None,
+    ) -> None:
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.kinds = kinds or list(HANDLERS)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info("worker %s gestart (concurrency=%s, kinds=%s)", self.worker_id, self.concurrency, self.kinds)
+        async with asyncio.TaskGroup() as group:
+            for slot in range(self.concurrency):
+                group.create_task(self._slot(slot))
+            group.create_task(self._reaper())
+        logger.info("worker %s gestopt", self.worker_id)
+
+    async def _slot(self, slot: int) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await self.queue.lease(f"{self.worker_id}/{slot}", self.kinds)
+            except Exception:
+                logger.exception("lease mislukt")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _reaper(self) -> None:
+        """Dead-lettert jobs waarvan de worker op de laatste poging verdween."""
+        while not self._stopping.is_set():
+            try:
+                for job in await self.queue.dead_letter_expired():
+                    logger.warning("job %s (%s) dead-letter: lease verlopen op poging %s", job["_id"], job["kind"], job["attempts"])
+                    await self._dead_letter(job, job["lastError"])
+            except Exception:
+                logger.exception("dead-letteren van verlopen jobs mislukt")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _heartbeat(self, job: dict[str, Any]) -> None:
+        interval = max(self.queue.settings.job_visibility_timeout_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                extended = await self.queue.extend_lease(job)
+            except Exception:
+                # Volgende poging na het interval; de lease loopt pas na de visibility timeout af.
+                logger.exception("lease voor job %s niet verlengd", job["_id"])
+                continue
+            if not extended:
+                logger.warning("lease voor job %s verloren", job["_id"])
+                return
+
+    async def _run_job(self, job: dict[str, Any]) -> None:
+        """Voert één job uit; fouten in de afhandeling mogen de andere slots niet stoppen."""
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await HANDLERS[job["kind"]](job["payload"])
+        except Exception as exc:
+            await self._fail(job, f"{type(exc).__name__}: {exc}")
+        else:
+            try:
+                await self.queue.complete(job)
+            except Exception:
+                # Lease loopt af en de job wordt opnieuw uitgevoerd (at-least-once).
+                logger.exception("job %s niet als klaar gemarkeerd", job["_id"])
+        finally:
+            heartbeat.cancel()
+
+    async def _fail(self, job: dict[str, Any], error: str) -> None:
+        logger.warning("job %s (%s) mislukt, poging %s: %s", job["_id"], job["kind"], job["attempts"], error)
+        try:
+            status = await self.queue.fail(job, error)
+        except Exception:
+            logger.exception("job %s niet als mislukt gemarkeerd", job["_id"])
+            return
+        if status is None:
+            logger.warning("job %s is al door een andere worker overgenomen", job["_id"])
+            return
+        if status == JOB_DEAD:
+            await self._dead_letter(job, error)
+
+    async def _dead_letter(self, job: dict[str, Any], error: str) -> None:
+        dead_handler = DEAD_LETTER_HANDLERS.get(job["kind"])
+        if dead_handler is None:
+            return
+        try:
+            await dead_handler(job["payload"], error)
+        except Exception:
+            logger.exception("dead-letter afhandeling van job %s mislukt", job["_id"])
+
+async def main(argv: list[str] | None = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="SkillVal job worker")
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency)
+    parser.add_argument("--poll-interval", type=float, default=settings.worker_poll_interval_seconds)
+    parser.add_argument("--kind", action="append", dest="kinds", help="Alleen deze job-kinds verwerken")
+    args = parser.parse_args(argv)
+
+    worker = Worker(job_queue, concurrency=args.concurrency, poll_interval=args.poll_interval, kinds=args.kinds)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+
+    await mongo.connect()
+    await http_client_pool.startup()
+    await traject_catalog.start()
+    await audit_service.start()
+    sweeper = asyncio.create_task(pending_upload_sweeper.run())
+    try:
+        await worker.run()
+    finally:
+        sweeper.cancel()
+        await audit_service.stop()
+        await traject_catalog.stop()
+        await http_client_pool.shutdown()
+        await mongo.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Retentie voor de auditlog: maandpartities ouder dan AUDIT_RETENTION_MONTHS gaan als gzip-NDJSON
+naar de storage-backend (onder AUDIT_ARCHIVE_PREFIX) en worden daarna gedropt.
+
+Voorbeelden:
+    python scripts/audit_retention.py --dry-run
+    python scripts/audit_retention.py
+    python scripts/audit_retention.py --migrate-legacy   # oude `auditLogs` naar maandpartities kopiëren
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import mongo
+from app.services.audit_partitions import audit_partitions
+
+
+async def run(args: argparse.Namespace) -> None:
+    await mongo.connect()
+    try:
+        if args.migrate_legacy:
+            copied = await audit_partitions.migrate_legacy()
+            for name, count in copied.items():
+                print(f"📦 {name}: {count} entries uit auditLogs gekopieerd")
+            if not copied:
+                print("✅ geen oude auditLogs om te kopiëren")
+
+        expired = audit_partitions.expired(await audit_partitions.existing())
+        if not expired:
+            print("✅ geen partities buiten de retentietermijn")
+            return
+        for name in expired:
+            if args.dry_run:
+                print(f"🗄️  {name} -> {audit_partitions.archive_key(name)} (dry-run)")
+                continue
+            count = await audit_partitions.archive(name)
+            print(f"🗄️  {name} gearchiveerd ({count} entries) -> {audit_partitions.archive_key(name)}")
+    finally:
+        await mongo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="alleen tonen wat gearchiveerd zou worden")
+    parser.add_argument("--migrate-legacy", action="store_true", help="eerst de oude auditLogs collectie overzetten")
+    asyncio.run(run(parser.parse_args()))
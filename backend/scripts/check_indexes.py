@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Vergelijkt de index-registry (app/db/indexes.py) met de live database.
+
+Meldt ontbrekende en afwijkende indexes, indexes die niet in de registry staan en indexes
+zonder gebruik sinds de laatste restart van mongod (`$indexStats`). Exit-code 1 als er iets
+ontbreekt of afwijkt, zodat het in een deploy-check kan.
+
+Voorbeelden:
+    python scripts/check_indexes.py
+    python scripts/check_indexes.py --apply
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import get_settings
+from app.db.indexes import apply_indexes, diff_indexes
+
+
+async def check(args: argparse.Namespace) -> int:
+    """Print het verschil tussen registry en database; met --apply eerst aanmaken."""
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongo_uri)
+    db = client[settings.mongo_db_name]
+
+    try:
+        if args.apply:
+            failed = await apply_indexes(db)
+            for name in failed:
+                print(f"⚠️  niet aangemaakt: {name}")
+
+        report = await diff_indexes(db)
+        for spec in report.missing:
+            print(f"❌ ontbreekt: {spec.collection}.{spec.name} {spec.options()}")
+        for spec, live in report.changed:
+            print(f"⚠️  wijkt af: {spec.collection}.{spec.name} gedeclareerd {spec.options()}, live {live}")
+        for collection, info in report.undeclared:
+            print(f"ℹ️  niet in registry: {collection}.{info['name']} {info.get('key')}")
+        for collection, name, accesses in report.unused:
+            print(f"💤 ongebruikt sinds {accesses.get('since')}: {collection}.{name}")
+        if report.in_sync:
+            print("✅ alle gedeclareerde indexes aanwezig")
+        return 0 if report.in_sync else 1
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="ontbrekende indexes eerst aanmaken")
+    sys.exit(asyncio.run(check(parser.parse_args())))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Ruimt LLM-cache entries op na een prompt- of trajectwijziging.
+
+Voorbeelden:
+    python scripts/invalidate_llm_cache.py --traject-id 65f0c0ffee...
+    python scripts/invalidate_llm_cache.py --namespace analyze_evidence --prompt-version analyze-evidence-v1
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import get_settings
+from app.services.llm_cache import LLMCache
+
+
+async def invalidate(args: argparse.Namespace) -> None:
+    """Verwijdert de gevraagde cache-entries uit Mongo."""
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongo_uri)
+    db = client[settings.mongo_db_name]
+
+    removed = await LLMCache(db).invalidate(
+        namespace=args.namespace,
+        prompt_version=args.prompt_version,
+        traject_id=args.traject_id,
+    )
+    print(f"🧹 {removed} LLM-cache entries verwijderd")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--namespace", help="bijv. analyze_evidence of ai_origin")
+    parser.add_argument("--prompt-version")
+    parser.add_argument("--traject-id")
+    parsed = parser.parse_args()
+    if not any((parsed.namespace, parsed.prompt_version, parsed.traject_id)):
+        parser.error("geef minstens één filter op")
+    asyncio.run(invalidate(parsed))
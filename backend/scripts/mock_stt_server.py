@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Lokale mock van Deepgram `/v1/listen` voor het testen van gesegmenteerde transcriptie.
+
+Geeft per seconde WAV-audio één woord terug (`s<gemiddelde amplitude>`), zodat stitching
+deterministisch te controleren is. De websocket op hetzelfde pad speelt Deepgram live na voor
+linear16-audio: per seconde een interim-resultaat en na elke `--final-every` woorden een finaal.
+Start en wijs de backend ernaar:
+
+    python scripts/mock_stt_server.py --port 8765 --fail-rate 0.2
+    STT_BASE_URL=http://localhost:8765 uvicorn app.main:app
+"""
+import argparse
+import io
+import json
+import random
+import wave
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+
+app = FastAPI(title="mock-stt")
+FAIL_RATE = 0.0
+FINAL_EVERY = 3
+
+
+def word_for(chunk: np.ndarray) -> str:
+    return f"s{int(round(np.abs(chunk).mean() / 100))}"
+
+
+def words_for(audio: bytes) -> list[dict]:
+    with wave.open(io.BytesIO(audio), "rb") as handle:
+        rate = handle.getframerate()
+        samples = np.frombuffer(handle.readframes(handle.getnframes()), dtype=np.int16)
+        samples = samples.reshape(-1, handle.getnchannels()).mean(axis=1)
+
+    words = []
+    for second, start in enumerate(range(0, len(samples), rate)):
+        chunk = samples[start:start + rate]
+        if len(chunk) < rate // 2:
+            break
+        token = word_for(chunk)
+        words.append({"word": token, "punctuated_word": token, "start": float(second), "end": second + 0.9, "confidence": 0.99})
+    return words
+
+
+@app.post("/v1/listen")
+async def listen(request: Request) -> dict:
+    if random.random() < FAIL_RATE:
+        raise HTTPException(status_code=503, detail="mock failure")
+    words = words_for(await request.body())
+    transcript = " ".join(word["word"] for word in words)
+    return {"results": {"channels": [{"alternatives": [{"transcript": transcript, "words": words}]}]}}
+
+
+def live_result(words: list[str], start: float, is_final: bool) -> str:
+    return json.dumps({
+        "type": "Results",
+        "start": start,
+        "duration": float(len(words)),
+        "is_final": is_final,
+        "channel": {"alternatives": [{"transcript": " ".join(words)}]},
+    })
+
+
+@app.websocket("/v1/listen")
+async def listen_live(websocket: WebSocket) -> None:
+    rate = int(websocket.query_params.get("sample_rate", 16000))
+    await websocket.accept()
+    buffer = bytearray()
+    words: list[str] = []
+    start = 0.0
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is not None:
+                buffer.extend(message["bytes"])
+                while len(buffer) >= rate * 2:
+                    words.append(word_for(np.frombuffer(bytes(buffer[: rate * 2]), dtype=np.int16)))
+                    del buffer[: rate * 2]
+                    final = len(words) >= FINAL_EVERY
+                    await websocket.send_text(live_result(words, start, final))
+                    if final:
+                        start += len(words)
+                        words = []
+            elif json.loads(message["text"]).get("type") == "CloseStream":
+                if words:
+                    await websocket.send_text(live_result(words, start, True))
+                await websocket.send_text(json.dumps({"type": "Metadata"}))
+                await websocket.close()
+                return
+    except WebSocketDisconnect:
+        return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--final-every", type=int, default=3)
+    args = parser.parse_args()
+    FAIL_RATE = args.fail_rate
+    FINAL_EVERY = args.final_every
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
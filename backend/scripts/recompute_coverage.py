@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Herberekent `coverageSummary` van kandidaten, bijv. na een trajectwijziging of een import.
+
+Voorbeelden:
+    python scripts/recompute_coverage.py --tenant-id skillval-demo
+    python scripts/recompute_coverage.py --traject-id 65f0c0ffee... --enqueue
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import mongo
+from app.services.coverage import RECOMPUTE_COVERAGE_JOB, coverage_service
+from app.services.job_queue import job_queue
+
+
+async def recompute(args: argparse.Namespace) -> None:
+    """Draait de repair direct, of zet hem als job klaar voor de worker."""
+    await mongo.connect()
+    try:
+        if args.enqueue:
+            payload = {"tenantId": args.tenant_id, "trajectId": args.traject_id}
+            job_id = await job_queue.enqueue(RECOMPUTE_COVERAGE_JOB, payload, tenant_id=args.tenant_id or "*")
+            print(f"📬 job {job_id} ingepland")
+            return
+        modified = await coverage_service.recompute(tenant_id=args.tenant_id, traject_id=args.traject_id)
+        print(f"📊 dekking bijgewerkt voor {modified} kandidaten")
+    finally:
+        await mongo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenant-id")
+    parser.add_argument("--traject-id")
+    parser.add_argument("--enqueue", action="store_true", help="via de job queue laten draaien")
+    asyncio.run(recompute(parser.parse_args()))
@@ -7,6 +7,7 @@ Run dit script om de jeugdzorg trajecten + indicatoren in MongoDB te laden.
 """
 import asyncio
 import sys
+from datetime import datetime
 from pathlib import Path
 
 # Add parent directory to path to import app modules
@@ -15,6 +16,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.core.config import get_settings
+from app.services.llm_cache import LLMCache
 
 
 async def seed_jeugdzorg_traject():
@@ -33,6 +35,7 @@ async def seed_jeugdzorg_traject():
         "tenantId": "skillval-demo",
         "name": "SKJ - Sociaal-pedagogisch werker Jeugdzorg",
         "domain": "jeugdzorg",
+        "updatedAt": datetime.utcnow(),
         "deskundigheidsgebieden": [
             {
                 "id": "dg1",
@@ -206,6 +209,8 @@ async def seed_jeugdzorg_traject():
         )
         traject_id = str(existing["_id"])
         print(f"✅ Traject updated met ID: {traject_id}")
+        removed = await LLMCache(db).invalidate(traject_id=traject_id)
+        print(f"🧹 {removed} LLM-cache entries voor dit traject verwijderd")
     else:
         print(f"✨ Nieuw traject aanmaken: '{traject_data['name']}'")
         result = await db.trajecten.insert_one(traject_data)
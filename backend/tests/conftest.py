@@ -0,0 +1,6 @@
+import os
+
+# Settings() eist deze secrets; tests draaien zonder .env en zonder netwerk.
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("DEEPGRAM_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
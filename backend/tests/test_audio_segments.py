@@ -0,0 +1,100 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.services.audio_segments import AudioSegment, plan_segments, read_segment, stitch_segments
+from app.services.llm_cache import LLMCache
+from app.services.stt_service import STTService, TranscriptionIncomplete
+from app.services.stt_transport import STTTransport
+
+RATE = 1000
+
+
+def _wav(seconds: int) -> bytes:
+    # Elke seconde een eigen amplitude, zodat het "woord" per seconde herkenbaar is.
+    samples = np.repeat(np.arange(1, seconds + 1, dtype=np.int16) * 100, RATE)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(RATE)
+        handle.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+class SecondsTransport(STTTransport):
+    """Eén woord per seconde audio, `s<n>`; `fail` bevat segment-offsets (in s) die één keer falen."""
+
+    def __init__(self, fail: set[int] | None = None) -> None:
+        self.fail = set(fail or ())
+        self.calls = 0
+
+    async def transcribe(self, audio, mimetype, *, timeout):
+        self.calls += 1
+        with wave.open(io.BytesIO(audio), "rb") as handle:
+            samples = np.frombuffer(handle.readframes(handle.getnframes()), dtype=np.int16)
+        seconds = [int(samples[start]) // 100 for start in range(0, len(samples), RATE)]
+        if seconds[0] - 1 in self.fail:
+            self.fail.discard(seconds[0] - 1)
+            raise RuntimeError("mock failure")
+        words = [{"word": f"s{n}", "start": float(i), "end": i + 0.9} for i, n in enumerate(seconds)]
+        return {"results": {"channels": [{"alternatives": [{"transcript": "", "words": words}]}]}}
+
+
+def test_plan_segments_overlap_and_cover(tmp_path):
+    path = tmp_path / "a.wav"
+    path.write_bytes(_wav(10))
+    segments = plan_segments(path, segment_seconds=4, overlap_seconds=1)
+    assert [(s.offset_seconds, s.duration_seconds) for s in segments] == [(0, 4), (3, 4), (6, 4)]
+    assert len(read_segment(path, segments[1])) > 3 * RATE * 2
+
+
+def test_stitch_keeps_overlap_words_once():
+    segments = [AudioSegment(0, 0, 4 * RATE, RATE), AudioSegment(1, 3 * RATE, 4 * RATE, RATE)]
+    results = [
+        {"words": [{"word": w, "start": float(i), "end": i + 0.9} for i, w in enumerate(["a", "b", "c", "d"])]},
+        {"words": [{"word": w, "start": float(i), "end": i + 0.9} for i, w in enumerate(["d", "e", "f", "g"])]},
+    ]
+    stitched = stitch_segments(segments, results)
+    alternative = stitched["results"]["channels"][0]["alternatives"][0]
+    assert alternative["transcript"] == "a b c d e f g"
+    assert [word["start"] for word in alternative["words"]] == [0, 1, 2, 3, 4, 5, 6]
+    assert stitched["metadata"] == {"segments": 2, "duration": 7.0}
+
+
+@pytest.fixture
+def stt(monkeypatch):
+    def build(transport: STTTransport) -> STTService:
+        service = STTService(transport=transport, cache=LLMCache(AsyncMongoMockClient()["t"]))
+        monkeypatch.setattr(service.settings, "stt_segment_seconds", 4.0)
+        monkeypatch.setattr(service.settings, "stt_overlap_seconds", 1.0)
+        monkeypatch.setattr(service.settings, "stt_segment_attempts", 1)
+        return service
+
+    return build
+
+
+async def test_failed_segment_raises_and_retry_uses_cache(stt):
+    transport = SecondsTransport(fail={3})
+    service = stt(transport)
+    with pytest.raises(TranscriptionIncomplete) as excinfo:
+        await service.transcribe_audio(_wav(10), "audio/wav")
+    assert excinfo.value.failed == [1]
+    assert transport.calls == 3
+
+    result = await service.transcribe_audio(_wav(10), "audio/wav")
+    # Alleen het mislukte segment gaat opnieuw naar de transport.
+    assert transport.calls == 4
+    words = [word["word"] for word in result["results"]["channels"][0]["alternatives"][0]["words"]]
+    assert words == [f"s{n}" for n in range(1, 11)]
+
+
+def test_whole_timeout_scales_with_duration(stt):
+    service = stt(SecondsTransport())
+    base = service.settings.stt_segment_timeout_seconds
+    assert service.whole_timeout(0, 2.0) == base
+    assert service.whole_timeout(0, 40.0) == base * 10
+    assert service.whole_timeout(service.settings.stt_whole_bytes_per_second * 8) == base * 2
@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import AutoReconnect
+
+from app.core.config import get_settings
+from app.db.partitions import audit_partition
+from app.services.audit_partitions import AuditPartitions
+from app.services.audit_service import AuditService
+
+
+@pytest.fixture
+def audit(monkeypatch):
+    settings = get_settings()
+    # mongomock kent geen storageEngine-opties bij create_collection.
+    monkeypatch.setattr(settings, "audit_block_compressor", "")
+    monkeypatch.setattr(settings, "audit_batch_size", 5)
+    monkeypatch.setattr(settings, "audit_flush_interval_ms", 20)
+    monkeypatch.setattr(settings, "audit_queue_max", 10)
+    db = AsyncMongoMockClient()["t"]
+    return AuditService(db, AuditPartitions(db))
+
+
+def _entry(i: int) -> dict:
+    return {"tenantId": "t1", "userId": "u", "action": f"a{i}", "targetType": "x", "targetId": "y"}
+
+
+async def _count(audit: AuditService) -> int:
+    return await audit.db[audit_partition(datetime.utcnow())].count_documents({})
+
+
+async def test_without_flusher_writes_directly(audit):
+    await audit.log(tenant_id="t1", user_id="u", action="login", target_type="user", target_id="u")
+    assert await _count(audit) == 1
+    assert audit.counters["direct"] == 1
+
+
+async def test_batches_and_flushes_on_stop(audit):
+    await audit.start()
+    for i in range(7):
+        await audit.write(_entry(i))
+    await asyncio.sleep(0.01)
+    # De volle batch van 5 is weg; de rest wacht op het interval of op stop().
+    assert audit.counters["written"] >= 5
+    await audit.stop()
+    assert await _count(audit) == 7
+    assert audit.stats()["queueDepth"] == 0
+
+
+async def test_failed_flush_requeues_and_retries(audit, monkeypatch):
+    await audit.start()
+    collection = audit.db[audit_partition(datetime.utcnow())]
+    original = type(collection).insert_many
+    failures = iter([AutoReconnect("weg")])
+
+    async def flaky(self, *args, **kwargs):
+        error = next(failures, None)
+        if error is not None:
+            raise error
+        return await original(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(collection), "insert_many", flaky)
+    for i in range(5):
+        await audit.write(_entry(i))
+    await asyncio.sleep(0.1)
+    assert audit.counters["flushFailures"] == 1
+    await audit.stop()
+    assert await _count(audit) == 5
+
+
+async def test_stop_does_not_lose_a_batch_in_flight(audit, monkeypatch):
+    await audit.start()
+    collection = audit.db[audit_partition(datetime.utcnow())]
+    original = type(collection).insert_many
+    started = asyncio.Event()
+
+    async def slow(self, *args, **kwargs):
+        started.set()
+        await asyncio.sleep(0.05)
+        return await original(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(collection), "insert_many", slow)
+    for i in range(5):
+        await audit.write(_entry(i))
+    await started.wait()
+    await audit.stop()
+    assert await _count(audit) == 5
+
+
+async def test_cancelled_batch_goes_back_in_the_buffer(audit, monkeypatch):
+    await audit.partitions.ensure(audit_partition(datetime.utcnow()))
+    collection = audit.db[audit_partition(datetime.utcnow())]
+    started = asyncio.Event()
+
+    async def hang(self, *args, **kwargs):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(type(collection), "insert_many", hang)
+    entries = [{**_entry(i), "_id": i, "createdAt": datetime.utcnow()} for i in range(3)]
+    task = asyncio.create_task(audit._insert_batch(entries))
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert [entry["_id"] for entry in audit._buffer] == [0, 1, 2]
+
+
+async def test_overflow_drop_policy(audit, monkeypatch):
+    monkeypatch.setattr(audit.settings, "audit_overflow_policy", "drop")
+    monkeypatch.setattr(audit.settings, "audit_batch_size", 100)
+    monkeypatch.setattr(audit.settings, "audit_flush_interval_ms", 10_000)
+    await audit.start()
+    for i in range(12):
+        await audit.write(_entry(i))
+    assert audit.counters["dropped"] == 2
+    await audit.stop()
+    assert await _count(audit) == 10
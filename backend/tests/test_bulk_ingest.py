@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+import app.db.mongo as mongo
+from app.schemas.ai import BulkIngestItem
+from app.services.bulk_ingest import BulkIngestService
+from app.services.evidence_processor import EvidenceProcessor
+from app.services.job_queue import JobQueue
+
+
+@pytest.fixture
+def env(monkeypatch):
+    db = AsyncMongoMockClient()["t"]
+    # Auditlog en blob store zijn singletons; die pakken de database via get_database().
+    monkeypatch.setattr(mongo, "get_database", lambda: db)
+    queue = JobQueue(db)
+    service = BulkIngestService(db, queue)
+    processor = EvidenceProcessor(db)
+    monkeypatch.setattr(service.settings, "bulk_ingest_poll_seconds", 0.01)
+    monkeypatch.setattr(service.settings, "audit_block_compressor", "")
+
+    async def process(evidence_id):
+        await db["evidenceItems"].update_one({"_id": ObjectId(evidence_id)}, {"$set": {"status": "ready"}})
+        return "ready"
+
+    monkeypatch.setattr(processor, "process", process)
+    return db, queue, service, processor
+
+
+async def _worker(queue: JobQueue, processor: EvidenceProcessor) -> None:
+    while True:
+        job = await queue.lease("test")
+        if job is None:
+            await asyncio.sleep(0.01)
+            continue
+        await processor.handle_job(job["payload"])
+        await queue.complete(job)
+
+
+def _manifest(candidate_id: str, count: int) -> list[bytes]:
+    lines = [json.dumps({"itemId": f"i{i}", "candidateId": candidate_id, "text": "tekst"}) for i in range(count)]
+    lines.append(json.dumps({"itemId": "kapot", "candidateId": "onbekend", "text": "x"}))
+    return [line.encode() + b"\n" for line in lines]
+
+
+async def _run(service: BulkIngestService, lines: list[bytes]) -> list[dict]:
+    async def body():
+        for line in lines:
+            yield line
+
+    return [
+        result
+        async for result in service.run(body(), tenant_id="t1", user_id="u1", manifest_id="m1", concurrency=2)
+    ]
+
+
+async def test_items_go_through_the_queue_and_resume_skips_done(env):
+    db, queue, service, processor = env
+    candidate_id = str((await db["candidates"].insert_one({"tenantId": "t1"})).inserted_id)
+    worker = asyncio.create_task(_worker(queue, processor))
+    try:
+        results = await _run(service, _manifest(candidate_id, 4))
+        assert sorted(r["itemId"] for r in results if r["status"] == "done") == ["i0", "i1", "i2", "i3"]
+        assert [r["error"] for r in results if r["status"] == "failed"] == ["Candidate not found"]
+        assert (await service.progress("t1", "m1"))["done"] == 4
+
+        again = await _run(service, _manifest(candidate_id, 4))
+        assert [r["status"] for r in again] == ["skipped"] * 4 + ["failed"]
+        assert await db["jobs"].count_documents({}) == 4
+    finally:
+        worker.cancel()
+
+
+async def test_worker_finishes_items_after_the_client_is_gone(env):
+    db, queue, service, processor = env
+    candidate_id = str((await db["candidates"].insert_one({"tenantId": "t1"})).inserted_id)
+
+    async def body():
+        for line in _manifest(candidate_id, 1)[:1]:
+            yield line
+
+    stream = service.run(body(), tenant_id="t1", user_id="u1", manifest_id="m1", concurrency=2)
+    with pytest.raises(asyncio.TimeoutError):
+        # Geen worker: de stream blijft wachten; de client haakt af.
+        await asyncio.wait_for(stream.__anext__(), timeout=0.1)
+    assert (await service.progress("t1", "m1"))["queued"] == 1
+
+    job = await queue.lease("test")
+    await processor.handle_job(job["payload"])
+    assert (await service.progress("t1", "m1"))["done"] == 1
+
+
+async def test_blob_reference_is_counted_once_after_the_evidence_exists(env):
+    db, queue, service, processor = env
+    candidate_id = str((await db["candidates"].insert_one({"tenantId": "t1"})).inserted_id)
+    await db["blobs"].insert_one(
+        {"_id": "t1:abc", "tenantId": "t1", "checksum": "abc", "sizeBytes": 3, "contentType": "application/pdf", "refCount": 1}
+    )
+    item = BulkIngestItem(itemId="b1", candidateId=candidate_id, blobRef="sha256:abc")
+    evidence_oid = ObjectId()
+
+    # Crash tussen insert en retain: het document bestaat al, de refcount nog niet opgehoogd.
+    await service._insert_evidence(item, evidence_oid, tenant_id="t1", user_id="u1")
+    assert (await db["blobs"].find_one({"_id": "t1:abc"}))["refCount"] == 1
+
+    await service._create_evidence(item, evidence_oid, tenant_id="t1", user_id="u1")
+    await service._create_evidence(item, evidence_oid, tenant_id="t1", user_id="u1")
+    assert (await db["blobs"].find_one({"_id": "t1:abc"}))["refCount"] == 2
+    assert (await db["evidenceItems"].find_one({"_id": evidence_oid}))["blobRetained"] is True
+
+
+async def test_oversized_line_is_rejected_without_buffering_it(env, monkeypatch):
+    db, queue, service, processor = env
+    monkeypatch.setattr(service.settings, "bulk_ingest_max_line_bytes", 200)
+    candidate_id = str((await db["candidates"].insert_one({"tenantId": "t1"})).inserted_id)
+    huge = [b'{"itemId": "groot", "text": "' + b"x" * 150, b"x" * 150 + b'"}\n']
+    worker = asyncio.create_task(_worker(queue, processor))
+    try:
+        results = await _run(service, huge + _manifest(candidate_id, 1)[:1] + [b"y" * 500])
+    finally:
+        worker.cancel()
+    by_line = {r["line"]: r for r in results}
+    assert by_line[1]["status"] == "invalid"
+    assert by_line[2]["status"] == "done"
+    assert by_line[3]["status"] == "invalid"
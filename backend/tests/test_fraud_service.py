@@ -0,0 +1,34 @@
+import pytest
+
+from app.services.fraud_service import FraudService
+from app.services.stylometry import StyleScore, score_batch
+
+
+def _style(likelihood: float, word_count: int) -> StyleScore:
+    return StyleScore(likelihood=likelihood, word_count=word_count, features={})
+
+
+@pytest.fixture
+def service():
+    return FraudService(http=object(), cache=object())
+
+
+def test_gate_off_sends_everything_to_llm(service, monkeypatch):
+    monkeypatch.setattr(service.settings, "fraud_local_gate", False)
+    assert service.needs_llm(_style(0.01, 500))
+    assert service.needs_llm(_style(0.99, 500))
+
+
+def test_gate_only_skips_clearly_human_long_texts(service, monkeypatch):
+    monkeypatch.setattr(service.settings, "fraud_local_gate", True)
+    assert not service.needs_llm(_style(0.05, 500))
+    # Hoge scores beslist de LLM, niet de ongekalibreerde stilometrie.
+    assert service.needs_llm(_style(0.95, 500))
+    assert service.needs_llm(_style(0.05, 10))
+
+
+def test_score_batch_shapes():
+    scores = score_batch(["Ik heb dit zelf gedaan. Echt waar!", "Kort."])
+    assert [s.word_count for s in scores] == [7, 1]
+    assert all(0.0 <= s.likelihood <= 1.0 for s in scores)
+    assert score_batch([]) == []
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.utils.http_range import RangeNotSatisfiable, etag_matches, file_response, parse_range_header
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("bytes=0-9", [(0, 9)]),
+        ("bytes=90-", [(90, 99)]),
+        ("bytes=-10", [(90, 99)]),
+        ("bytes=-500", [(0, 99)]),
+        ("bytes=95-200", [(95, 99)]),
+        ("bytes=0-9,5-20,21-30", [(0, 30)]),
+        ("bytes=50-59, 0-9", [(0, 9), (50, 59)]),
+        ("bytes=0-9,200-300", [(0, 9)]),
+    ],
+)
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 100) == expected
+
+
+@pytest.mark.parametrize(
+    "header",
+    ["items=0-9", "bytes=", "bytes=abc", "bytes=5", "bytes=100-", "bytes=9-0", "bytes=-0", ",".join(["bytes=0-0"] + [f"{i * 2}-{i * 2}" for i in range(1, 20)])],
+)
+def test_parse_range_header_unsatisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header(header, 100)
+
+
+def test_etag_matches_weak_and_strong():
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('W/"abc"', '"abc"', weak=False)
+    assert not etag_matches(None, '"abc"')
+
+
+@pytest.fixture
+def client(tmp_path: Path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(range(100)))
+    app = FastAPI()
+
+    @app.get("/file")
+    async def serve(request: Request):
+        return await file_response(request, path, etag='"v1"', filename="data.bin")
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def test_single_range_and_conditional_get(client):
+    async with client:
+        response = await client.get("/file", headers={"range": "bytes=10-19"})
+        assert response.status_code == 206
+        assert response.headers["content-range"] == "bytes 10-19/100"
+        assert response.content == bytes(range(10, 20))
+
+        assert (await client.get("/file", headers={"if-none-match": '"v1"'})).status_code == 304
+        # Verouderde If-Range: volledige response in plaats van de range.
+        stale = await client.get("/file", headers={"range": "bytes=0-1", "if-range": '"v0"'})
+        assert stale.status_code == 200 and len(stale.content) == 100
+
+
+async def test_multi_range_and_unsatisfiable(client):
+    async with client:
+        response = await client.get("/file", headers={"range": "bytes=0-1,50-51"})
+        assert response.status_code == 206
+        assert response.headers["content-type"].startswith("multipart/byteranges")
+        assert int(response.headers["content-length"]) == len(response.content)
+        assert b"Content-Range: bytes 50-51/100" in response.content
+
+        missing = await client.get("/file", headers={"range": "bytes=500-"})
+        assert missing.status_code == 416
+        assert missing.headers["content-range"] == "bytes */100"
@@ -0,0 +1,86 @@
+import io
+import random
+
+import numpy as np
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.services.image_hashes import HASH_BITS, ImageHashes, ImageHashIndex, compute_hashes, hamming
+
+
+@pytest.fixture
+def index():
+    return ImageHashIndex(AsyncMongoMockClient()["t"])
+
+
+def _flip(value: int, count: int, rng: random.Random) -> int:
+    for position in rng.sample(range(HASH_BITS), count):
+        value ^= 1 << position
+    return value
+
+
+def test_chunk_keys_cover_all_bits(index):
+    phash = 0x0123456789ABCDEF
+    values = [int(key.split(":")[1], 16) for key in index.chunk_keys(phash)]
+    assert len(values) == index.chunks
+    assert sum(value << (i * index.chunk_bits) for i, value in enumerate(values)) == phash
+
+
+def test_probe_keys_find_every_hash_within_max_distance(index):
+    # Duivenhokprincipe: binnen afstand r ligt minstens één stuk binnen r // chunks.
+    rng = random.Random(7)
+    for _ in range(200):
+        phash = rng.getrandbits(HASH_BITS)
+        other = _flip(phash, rng.randint(0, index.settings.image_hash_max_distance), rng)
+        assert set(index.probe_keys(phash)) & set(index.chunk_keys(other))
+
+
+def test_probe_key_count(index):
+    from math import comb
+
+    per_chunk = sum(comb(index.chunk_bits, r) for r in range(index.chunk_radius + 1))
+    assert len(index.probe_keys(0)) == index.chunks * per_chunk
+
+
+def _png(pixels: np.ndarray, size: int | None = None) -> bytes:
+    from PIL import Image
+
+    image = Image.fromarray(pixels.astype(np.uint8))
+    if size:
+        image = image.resize((size, size))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_compute_hashes_survives_resize_but_not_other_content(index):
+    from PIL import Image
+
+    rng = np.random.default_rng(1)
+    # Vloeiend willekeurig beeld: ruis van 8x8 opgeschaald, zodat er echte lage frequenties in zitten.
+    coarse = rng.integers(0, 256, (8, 8)).astype(np.uint8)
+    pattern = np.asarray(Image.fromarray(coarse).resize((128, 128), Image.Resampling.BICUBIC))
+    original = compute_hashes(_png(pattern))
+    resized = compute_hashes(_png(pattern, 96))
+    other = compute_hashes(_png(rng.integers(0, 256, (128, 128))))
+    limit = index.settings.image_hash_max_distance
+    assert hamming(original.phash, resized.phash) <= limit
+    assert hamming(original.phash, other.phash) > limit
+
+
+async def test_check_and_add_matches_other_candidates_only(index):
+    rng = random.Random(3)
+    base = rng.getrandbits(HASH_BITS)
+    hashes = ImageHashes(ahash=base, dhash=base, phash=base)
+    assert await index.check_and_add(tenant_id="t1", candidate_id="c1", evidence_id="e1", hashes=hashes) == []
+
+    near = _flip(base, 6, rng)
+    matches = await index.check_and_add(
+        tenant_id="t1", candidate_id="c2", evidence_id="e2", hashes=ImageHashes(near, near, near)
+    )
+    assert [(match.evidence_id, match.distances["phash"]) for match in matches] == [("e1", 6)]
+
+    far = _flip(base, 30, rng)
+    assert await index.check_and_add(
+        tenant_id="t1", candidate_id="c3", evidence_id="e3", hashes=ImageHashes(far, far, far)
+    ) == []
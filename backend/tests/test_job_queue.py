@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import app.worker as worker_module
+from app.services.job_queue import JOB_DEAD, JOB_QUEUED, JobQueue
+from app.worker import Worker
+
+
+@pytest.fixture
+def queue():
+    return JobQueue(AsyncMongoMockClient()["t"])
+
+
+async def _expire(queue: JobQueue, job_id) -> None:
+    await queue.collection.update_one({"_id": job_id}, {"$set": {"leaseExpiresAt": datetime.utcnow() - timedelta(seconds=1)}})
+
+
+async def test_expired_lease_on_last_attempt_is_dead_lettered(queue):
+    await queue.enqueue("k", {"n": 1}, tenant_id="t", max_attempts=2)
+    for attempt in (1, 2):
+        job = await queue.lease("w1")
+        assert job["attempts"] == attempt
+        await _expire(queue, job["_id"])
+
+    # Derde lease zou de job eindeloos laten rondgaan; hij moet naar dead-letter.
+    assert await queue.lease("w2") is None
+    dead = await queue.dead_letter_expired()
+    assert [job["status"] for job in dead] == [JOB_DEAD]
+    assert await queue.dead_letter_expired() == []
+
+
+async def test_fail_after_lease_takeover_changes_nothing(queue):
+    await queue.enqueue("k", {}, tenant_id="t")
+    first = await queue.lease("w1")
+    await _expire(queue, first["_id"])
+    second = await queue.lease("w2")
+    assert await queue.fail(first, "te laat") is None
+    assert await queue.fail(second, "echt mislukt") == JOB_QUEUED
+
+
+async def test_worker_survives_failing_bookkeeping(queue, monkeypatch):
+    handled, dead_calls = [], []
+
+    async def handler(payload):
+        handled.append(payload["n"])
+        raise RuntimeError("kapot")
+
+    async def dead_handler(payload, error):
+        dead_calls.append(payload["n"])
+        raise RuntimeError("dead-letter handler faalt ook")
+
+    monkeypatch.setitem(worker_module.HANDLERS, "k", handler)
+    monkeypatch.setitem(worker_module.DEAD_LETTER_HANDLERS, "k", dead_handler)
+    for n in range(3):
+        await queue.enqueue("k", {"n": n}, tenant_id="t", max_attempts=1)
+
+    worker = Worker(queue, concurrency=2, poll_interval=0.01, kinds=["k"])
+    run = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.2)
+    worker.stop()
+    await asyncio.wait_for(run, timeout=1)
+    assert sorted(handled) == [0, 1, 2]
+    assert sorted(dead_calls) == [0, 1, 2]
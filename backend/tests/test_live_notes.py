@@ -0,0 +1,89 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import AutoReconnect
+
+from app.services.live_notes import SPILLED_NOTES_COLLECTION, LiveNoteBuffer
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    persisted: list[int] = []
+
+    async def on_persisted(seqs):
+        persisted.extend(seqs)
+
+    notes = LiveNoteBuffer(
+        AsyncMongoMockClient()["t"], tenant_id="t1", candidate_id="c1", assessor_id="a1", on_persisted=on_persisted
+    )
+    monkeypatch.setattr(notes.settings, "live_notes_flush_count", 1000)
+    monkeypatch.setattr(notes.settings, "live_notes_flush_ms", 60_000)
+    monkeypatch.setattr(notes.settings, "live_notes_inline_max", 3)
+    notes.persisted = persisted
+    return notes
+
+
+def _add(buffer: LiveNoteBuffer, count: int) -> None:
+    for _ in range(count):
+        seq = buffer.next_seq()
+        buffer.add({"text": f"notitie {seq}", "seq": seq})
+
+
+async def _stored(buffer: LiveNoteBuffer) -> tuple[list[int], list[int]]:
+    assessment = await buffer.db["assessments"].find_one(buffer.filter)
+    spilled = await buffer.db[SPILLED_NOTES_COLLECTION].find({}).sort("note.seq", 1).to_list(None)
+    return [note["seq"] for note in assessment["notes"]], [doc["note"]["seq"] for doc in spilled]
+
+
+async def test_inline_until_max_then_spill(buffer):
+    _add(buffer, 2)
+    await buffer.flush()
+    _add(buffer, 3)
+    await buffer.close()
+    assert await _stored(buffer) == ([1, 2, 3], [4, 5])
+    assert buffer.persisted == [1, 2, 3, 4, 5]
+    assert await buffer.db["assessments"].count_documents({}) == 1
+
+
+async def test_retry_after_spill_failure_does_not_duplicate(buffer, monkeypatch):
+    _add(buffer, 5)
+    collection = buffer.db[SPILLED_NOTES_COLLECTION]
+    original = type(collection).insert_many
+    calls = []
+
+    async def flaky(self, *args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise AutoReconnect("weg")
+        return await original(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(collection), "insert_many", flaky)
+    with pytest.raises(AutoReconnect):
+        await buffer.flush()
+    # Alleen de notities voor assessmentNotes staan nog in de buffer.
+    assert [note["seq"] for note in buffer._pending] == [4, 5]
+    await buffer.close()
+    assert await _stored(buffer) == ([1, 2, 3], [4, 5])
+    assert buffer.persisted == [1, 2, 3, 4, 5]
+
+
+async def test_write_applied_but_reported_failed_is_idempotent(buffer, monkeypatch):
+    monkeypatch.setattr(buffer.settings, "live_notes_inline_max", None)
+    _add(buffer, 2)
+    await buffer.flush()
+    collection = buffer.db["assessments"]
+    original = type(collection).update_one
+    calls = []
+
+    async def applied_then_lost(self, *args, **kwargs):
+        result = await original(self, *args, **kwargs)
+        calls.append(1)
+        if len(calls) == 1:
+            raise AutoReconnect("antwoord kwijt")
+        return result
+
+    monkeypatch.setattr(type(collection), "update_one", applied_then_lost)
+    _add(buffer, 2)
+    with pytest.raises(AutoReconnect):
+        await buffer.flush()
+    await buffer.close()
+    assert await _stored(buffer) == ([1, 2, 3, 4], [])
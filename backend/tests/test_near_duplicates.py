@@ -0,0 +1,65 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.services.near_duplicates import MinHasher, NearDuplicateIndex
+
+TEXT = (
+    "Tijdens de stage heb ik samen met het team een nieuwe planning gemaakt voor de productielijn "
+    "en daarbij rekening gehouden met de beschikbaarheid van de machines en de wensen van de klant. "
+    "Ik heb de resultaten wekelijks besproken met mijn begeleider en waar nodig bijgestuurd."
+)
+
+
+@pytest.fixture
+def hasher():
+    return MinHasher(num_perm=128, bands=32, shingle_size=3)
+
+
+def test_bands_must_divide_num_perm():
+    with pytest.raises(ValueError):
+        MinHasher(num_perm=100, bands=32, shingle_size=3)
+
+
+def test_signature_is_deterministic_and_estimates_jaccard(hasher):
+    signature = hasher.signature(TEXT)
+    assert signature.shape == (128,)
+    assert (signature == MinHasher(num_perm=128, bands=32, shingle_size=3).signature(TEXT)).all()
+    assert hasher.similarity(signature, signature) == 1.0
+
+    edited = TEXT.replace("wekelijks", "maandelijks")
+    left, right = set(hasher.shingles(TEXT).tolist()), set(hasher.shingles(edited).tolist())
+    jaccard = len(left & right) / len(left | right)
+    estimate = hasher.similarity(signature, hasher.signature(edited))
+    # Standaardfout van MinHash met 128 permutaties is ~0.04.
+    assert abs(estimate - jaccard) < 0.15
+
+
+def test_similar_texts_share_a_band_and_unrelated_do_not(hasher):
+    bands = set(hasher.band_keys(hasher.signature(TEXT)))
+    assert len(bands) == 32
+    assert bands & set(hasher.band_keys(hasher.signature(TEXT + " Dat ging goed.")))
+    other = "De kat zat op de mat en keek naar de vogels in de tuin terwijl het buiten hard regende vandaag."
+    assert not bands & set(hasher.band_keys(hasher.signature(other)))
+
+
+def test_short_text_has_no_signature():
+    assert MinHasher(num_perm=8, bands=4, shingle_size=3, min_shingles=15).signature("te kort") is None
+
+
+async def test_check_and_add_ignores_own_candidate():
+    index = NearDuplicateIndex(AsyncMongoMockClient()["t"])
+    assert await index.check_and_add(tenant_id="t1", candidate_id="c1", evidence_id="e1", text=TEXT) == []
+    assert await index.check_and_add(tenant_id="t1", candidate_id="c1", evidence_id="e2", text=TEXT) == []
+    matches = await index.check_and_add(tenant_id="t1", candidate_id="c2", evidence_id="e3", text=TEXT)
+    assert [(match.evidence_id, match.similarity) for match in matches] == [("e1", 1.0), ("e2", 1.0)]
+    assert await index.check_and_add(tenant_id="t2", candidate_id="c3", evidence_id="e4", text=TEXT) == []
+
+
+async def test_own_submissions_do_not_crowd_out_other_candidates(monkeypatch):
+    index = NearDuplicateIndex(AsyncMongoMockClient()["t"])
+    monkeypatch.setattr(index.settings, "near_duplicate_candidate_limit", 2)
+    for i in range(3):
+        await index.check_and_add(tenant_id="t1", candidate_id="c1", evidence_id=f"own{i}", text=TEXT)
+    await index.check_and_add(tenant_id="t1", candidate_id="other", evidence_id="x", text=TEXT)
+    matches = await index.check_and_add(tenant_id="t1", candidate_id="c1", evidence_id="own3", text=TEXT)
+    assert [match.evidence_id for match in matches] == ["x"]
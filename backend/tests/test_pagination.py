@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from mongomock_motor import AsyncMongoMockClient
+from starlette.datastructures import URL
+
+import app.routers.evidence as evidence_router
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter, next_page_headers
+
+
+def test_cursor_round_trip_keeps_bson_types():
+    when, oid = datetime(2026, 3, 1, 12, 30, 15, 123000), ObjectId()
+    cursor = encode_cursor(when, oid)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (when, oid)
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "bm90LWpzb24", encode_cursor(1, 2)[:-3]])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_keyset_filter_breaks_ties_on_id():
+    assert keyset_filter("timestamp", None) == {}
+    when, oid = datetime(2026, 1, 1), ObjectId()
+    assert keyset_filter("timestamp", encode_cursor(when, oid), descending=False) == {
+        "$or": [{"timestamp": {"$gt": when}}, {"timestamp": when, "_id": {"$gt": oid}}]
+    }
+
+
+def test_next_page_headers():
+    assert next_page_headers(URL("http://x/items?limit=2"), None) == {}
+    headers = next_page_headers(URL("http://x/items?limit=2&cursor=old"), "abc")
+    assert headers["x-next-cursor"] == "abc"
+    assert headers["link"] == '<http://x/items?limit=2&cursor=abc>; rel="next"'
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    db = AsyncMongoMockClient()["t"]
+    monkeypatch.setattr(evidence_router, "get_collection", lambda name: db[name])
+    base = datetime(2026, 1, 1)
+    # Drie items met dezelfde timestamp: de _id moet de volgorde beslissen.
+    await db["evidence"].insert_many(
+        [
+            {"_id": f"e{i}", "candidateId": "c1", "type": "text", "pathOrBlobRef": "x",
+             "timestamp": base + timedelta(minutes=min(i, 3))}
+            for i in range(6)
+        ]
+    )
+    app = FastAPI()
+    app.include_router(evidence_router.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_without_limit_or_cursor_returns_everything(client):
+    response = await client.get("/evidence/candidate/c1")
+    assert [item["id"] for item in response.json()] == ["e5", "e4", "e3", "e2", "e1", "e0"]
+    assert "x-next-cursor" not in response.headers
+
+
+async def test_pages_follow_the_cursor_without_gaps(client):
+    seen, url = [], "/evidence/candidate/c1?limit=2"
+    while url:
+        response = await client.get(url)
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        url = f"/evidence/candidate/c1?limit=2&cursor={cursor}" if cursor else None
+    assert seen == ["e5", "e4", "e3", "e2", "e1", "e0"]
+
+    assert (await client.get("/evidence/candidate/c1?cursor=kapot")).status_code == 400
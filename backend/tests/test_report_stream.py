@@ -0,0 +1,14 @@
+from mongomock_motor import AsyncMongoMockClient
+
+from app.services.report_stream import ReportStreamService
+
+
+async def test_stream_ends_with_error_when_the_draft_is_deleted():
+    db = AsyncMongoMockClient()["t"]
+    service = ReportStreamService(db)
+    draft = await service.create_draft(tenant_id="t1", candidate_id="c1", assessor_id="a1")
+    await db["assessments"].delete_one({"_id": draft["_id"]})
+
+    events = [(event, data) async for event, data, _ in service.events(draft)]
+    assert [event for event, _ in events] == ["meta", "error"]
+    assert events[-1][1]["resumable"] is False
@@ -0,0 +1,22 @@
+from mongomock_motor import AsyncMongoMockClient
+
+from app.services.ai_service import AIService
+from app.services.traject_catalog import TrajectCatalog
+
+
+async def test_traject_version_follows_content_without_version_bump():
+    db = AsyncMongoMockClient()["t"]
+    catalog = TrajectCatalog(db)
+    ai = AIService(db, catalog=catalog)
+    await db["trajecten"].insert_one({"_id": "tr1", "tenantId": "t1", "version": 3, "deskundigheidsgebieden": []})
+    await db["candidates"].insert_one({"_id": "c1", "trajectId": "tr1"})
+
+    before = await ai.traject_version_for("c1")
+    fingerprint = await catalog._fingerprint()
+    # Bewerking zonder `version` of `updatedAt` op te hogen.
+    await db["trajecten"].update_one({"_id": "tr1"}, {"$set": {"deskundigheidsgebieden": [{"id": "a1", "indicators": []}]}})
+
+    after = await ai.traject_version_for("c1")
+    assert after[0] == before[0] == "tr1"
+    assert after[1] != before[1]
+    assert await catalog._fingerprint() != fingerprint